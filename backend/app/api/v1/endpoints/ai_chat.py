@@ -2,73 +2,235 @@
 AI Chat assistant endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Optional
 
-from app.core.database import get_db
-from app.schemas.chat import ChatMessageRequest, ChatMessageResponse, ChatHistoryResponse
-from app.services.ai_chat_service import AIChatService
+from app.core.auth import get_current_user
+from app.core.database import AsyncSessionLocal, get_db
+from app.core.llm import LLMRegistry, get_llm
+from app.core.llm_dispatcher import LLMQueueFull
+from app.core.responses import FastJSONResponse
+from app.core.security import require_admin
+from app.schemas.user import UserResponse
+from app.schemas.chat import ChatMessageRequest, ChatMessageResponse, ChatHistoryResponse, EnrichmentResponse
+from app.services.ai_chat_service import AIChatService, get_random_companion_avatar
+from app.services.chat_writer import ChatWriteQueue, get_chat_writer
+from app.services.conversation_cache import ConversationCache, get_conversation_cache
+from app.services.enrichment import EnrichmentPipeline, get_enrichment_pipeline
+from app.services.resource_index import ResourceRecommender, get_resource_recommender
 
 
 router = APIRouter()
 
 
+def raise_busy(e: LLMQueueFull):
+    """Answer 429 immediately instead of queueing behind an overloaded LLM"""
+    raise HTTPException(
+        status_code=429,
+        detail=f"AI service busy: {str(e)}",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+async def get_ai_chat_service(
+    db: AsyncSession = Depends(get_db),
+    llm: LLMRegistry = Depends(get_llm),
+    writer: Optional[ChatWriteQueue] = Depends(get_chat_writer),
+    enrichment: EnrichmentPipeline = Depends(get_enrichment_pipeline),
+    resources: ResourceRecommender = Depends(get_resource_recommender),
+    conversations: ConversationCache = Depends(get_conversation_cache)
+) -> AIChatService:
+    """
+    AI chat service dependency
+    Reuses the app-scoped LLM registry, write queue, enrichment pipeline,
+    resource index and conversation cache instead of building them per request
+    """
+    return AIChatService(db, llm, writer, enrichment, resources, conversations=conversations)
+
+
 @router.post("/message", response_model=ChatMessageResponse)
 async def send_chat_message(
     message_data: ChatMessageRequest,
-    db: Session = Depends(get_db)
+    ai_service: AIChatService = Depends(get_ai_chat_service),
+    current_user: UserResponse = Depends(get_current_user)
 ) -> ChatMessageResponse:
     """
     Send message to AI chat assistant
     Requires authentication
     """
     try:
-        ai_service = AIChatService(db)
+        user_id = current_user.id
+        
         return await ai_service.send_message(
             message=message_data.message,
-            context=message_data.context
+            context=message_data.context,
+            bypass_cache=message_data.bypass_cache,
+            user_id=user_id
         )
+    except LLMQueueFull as e:
+        raise_busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
 
 
+@router.post("/message/stream")
+async def stream_chat_message(
+    message_data: ChatMessageRequest,
+    ai_service: AIChatService = Depends(get_ai_chat_service),
+    current_user: UserResponse = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Send message to AI chat assistant and stream the reply as Server-Sent Events
+    Emits `token` events as text is generated, then a final `done` event
+    carrying suggestions, mood insights and timing
+    Requires authentication
+    """
+    user_id = current_user.id
+    
+    try:
+        ai_service.require_llm()
+        # Reject before the 200 is sent; once streaming, overload can only be an error event
+        ai_service.dispatcher.check_capacity(user_id)
+    except LLMQueueFull as e:
+        raise_busy(e)
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
+    
+    async def event_stream() -> AsyncIterator[str]:
+        async for event in ai_service.stream_message(
+            message=message_data.message,
+            context=message_data.context,
+            bypass_cache=message_data.bypass_cache,
+            user_id=user_id
+        ):
+            event_type = event.pop("type")
+            yield f"event: {event_type}\ndata: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering so tokens flush immediately
+        }
+    )
+
+
+@router.websocket("/ws")
+async def chat_websocket(
+    websocket: WebSocket,
+    db: AsyncSession = Depends(get_db),
+    llm: LLMRegistry = Depends(get_llm),
+    writer: Optional[ChatWriteQueue] = Depends(get_chat_writer),
+    enrichment: EnrichmentPipeline = Depends(get_enrichment_pipeline),
+    resources: ResourceRecommender = Depends(get_resource_recommender),
+    conversations: ConversationCache = Depends(get_conversation_cache),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Streaming chat over WebSocket
+    Each incoming ChatMessageRequest JSON frame is answered with `token`
+    frames followed by a `done` trailer frame
+    Requires authentication (pass the token as `?access_token=`)
+    """
+    # Sockets stay open for minutes: give back the connection the user lookup used,
+    # and open a session per message, so idle sockets don't pin pooled connections
+    await db.close()
+
+    def chat_service(session: Optional[AsyncSession]) -> AIChatService:
+        return AIChatService(session, llm, writer, enrichment, resources, conversations=conversations)
+
+    await websocket.accept()
+    try:
+        chat_service(None).require_llm()
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "detail": f"AI service error: {str(e)}"})
+        await websocket.close(code=1011)
+        return
+    
+    user_id = current_user.id
+    
+    try:
+        while True:
+            try:
+                message_data = ChatMessageRequest.model_validate(await websocket.receive_json())
+            except (ValidationError, ValueError) as e:
+                await websocket.send_json({"type": "error", "detail": f"Invalid message: {str(e)}"})
+                continue
+            
+            async with AsyncSessionLocal() as session:
+                async for event in chat_service(session).stream_message(
+                    message=message_data.message,
+                    context=message_data.context,
+                    bypass_cache=message_data.bypass_cache,
+                    user_id=user_id
+                ):
+                    await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get("/enrichment/{message_id}", response_model=EnrichmentResponse)
+async def get_message_enrichment(
+    message_id: str,
+    enrichment: EnrichmentPipeline = Depends(get_enrichment_pipeline),
+    current_user: UserResponse = Depends(get_current_user)
+) -> EnrichmentResponse:
+    """
+    Get enrichment results for one of the current user's chat messages
+    Poll this for the stages listed in `pending_enrichments` of a chat response
+    """
+    record = enrichment.get(message_id, current_user.id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Enrichment not found or expired")
+    return EnrichmentResponse(**record)
+
+
 @router.get("/history", response_model=ChatHistoryResponse)
 async def get_chat_history(
-    limit: int = 20,
-    db: Session = Depends(get_db)
-) -> ChatHistoryResponse:
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    ai_service: AIChatService = Depends(get_ai_chat_service),
+    current_user: UserResponse = Depends(get_current_user)
+) -> FastJSONResponse:
     """
-    Get user's chat history
+    Get user's chat history, newest page first
+    Pass `next_cursor` from the previous response as `cursor` to page back
     Requires authentication
     """
     try:
-        ai_service = AIChatService(db)
-        # TODO: Get actual user_id from authentication
-        user_id = 1  # Placeholder
+        user_id = current_user.id
         
-        messages = await ai_service.get_chat_history(user_id, limit)
+        messages, next_cursor = await ai_service.get_chat_history(user_id, limit, cursor)
         
-        return ChatHistoryResponse(
-            messages=messages,
-            total=len(messages)
-        )
+        # Rows come straight from our own table in ChatHistoryResponse's shape;
+        # returning the response skips validating and re-encoding every message
+        return FastJSONResponse({
+            "messages": messages,
+            "total": len(messages),
+            "next_cursor": next_cursor
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat history error: {str(e)}")
 
 
 @router.delete("/history")
 async def clear_chat_history(
-    db: Session = Depends(get_db)
+    ai_service: AIChatService = Depends(get_ai_chat_service),
+    current_user: UserResponse = Depends(get_current_user)
 ):
     """
     Clear user's chat history
     Requires authentication
     """
     try:
-        ai_service = AIChatService(db)
-        # TODO: Get actual user_id from authentication
-        user_id = 1  # Placeholder
+        user_id = current_user.id
         
         success = await ai_service.clear_chat_history(user_id)
         
@@ -80,16 +242,38 @@ async def clear_chat_history(
         raise HTTPException(status_code=500, detail=f"Clear history error: {str(e)}")
 
 
-@router.get("/companion-avatar")
-async def get_companion_avatar(
-    db: Session = Depends(get_db)
+@router.get("/stats", dependencies=[Depends(require_admin)])
+async def get_chat_stats(
+    llm: LLMRegistry = Depends(get_llm),
+    writer: Optional[ChatWriteQueue] = Depends(get_chat_writer),
+    resources: ResourceRecommender = Depends(get_resource_recommender),
+    conversations: ConversationCache = Depends(get_conversation_cache)
 ):
+    """
+    Operational statistics for the chat pipeline
+    Response cache hit rate, LLM calls saved by coalescing, LLM queue wait,
+    circuit breaker state / fallback rate, write-behind queue depth / flush
+    latency, resource lookup cost and conversation cache hit rate / size
+    Admin only (X-Admin-Key header)
+    """
+    return {
+        "response_cache": llm.response_cache.stats() if llm.response_cache else None,
+        "single_flight": llm.single_flight.stats(),
+        "llm_dispatcher": llm.dispatcher.stats(),
+        "llm_guard": llm.guard.stats(),
+        "write_queue": writer.stats() if writer else None,
+        "resource_index": resources.stats(),
+        "conversation_cache": conversations.stats()
+    }
+
+
+@router.get("/companion-avatar")
+async def get_companion_avatar():
     """
     Get a random AI companion avatar
     """
     try:
-        ai_service = AIChatService(db)
-        avatar = ai_service.get_random_companion_avatar()
+        avatar = get_random_companion_avatar()
         return {"avatar": avatar}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Avatar error: {str(e)}")
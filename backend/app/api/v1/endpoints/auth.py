@@ -2,10 +2,15 @@
 Authentication endpoints
 """
 
+from datetime import datetime, timezone
+from typing import Any, Dict
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth import get_token_claims
 from app.core.database import get_db
+from app.core.revocation import TokenRevocationList, get_revocation_list
+from app.core.security import PasswordHasher, PasswordHasherBusy, get_password_hasher
 from app.schemas.auth import LoginRequest, RegisterRequest, TokenResponse
 from app.services.auth_service import AuthService
 
@@ -13,53 +18,66 @@ from app.services.auth_service import AuthService
 router = APIRouter()
 
 
+def raise_busy(e: PasswordHasherBusy):
+    """Shed load when the password hashing pool is saturated"""
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, please try again",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
 @router.post("/login", response_model=TokenResponse)
 async def login(
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    hasher: PasswordHasher = Depends(get_password_hasher)
 ) -> TokenResponse:
     """
     User login endpoint
     Returns JWT access token
     """
-    # TODO: Implement authentication logic
-    # auth_service = AuthService(db)
-    # return await auth_service.login(login_data)
-    
-    # Placeholder response
-    return TokenResponse(
-        access_token="placeholder-token",
-        token_type="bearer",
-        expires_in=3600
-    )
+    try:
+        auth_service = AuthService(db, hasher)
+        return await auth_service.login(login_data)
+    except PasswordHasherBusy as e:
+        raise_busy(e)
 
 
 @router.post("/register", response_model=TokenResponse)
 async def register(
     register_data: RegisterRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    hasher: PasswordHasher = Depends(get_password_hasher)
 ) -> TokenResponse:
     """
     User registration endpoint
     Creates new user account and returns JWT token
     """
-    # TODO: Implement registration logic
-    # auth_service = AuthService(db)
-    # return await auth_service.register(register_data)
-    
-    # Placeholder response
-    return TokenResponse(
-        access_token="placeholder-token",
-        token_type="bearer",
-        expires_in=3600
-    )
+    try:
+        auth_service = AuthService(db, hasher)
+        return await auth_service.register(register_data)
+    except PasswordHasherBusy as e:
+        raise_busy(e)
 
 
 @router.post("/logout")
-async def logout():
+async def logout(
+    claims: Dict[str, Any] = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_db),
+    revocations: TokenRevocationList = Depends(get_revocation_list)
+):
     """
     User logout endpoint
-    Invalidate token (if using token blacklist)
+    Revokes the bearer token until it expires
     """
-    # TODO: Implement logout logic
+    jti = claims.get("jti")
+    if not jti:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token cannot be revoked, let it expire instead"
+        )
+    
+    expires_at = datetime.fromtimestamp(claims["exp"], tz=timezone.utc)
+    await revocations.revoke(jti, expires_at, db)
     return {"message": "Successfully logged out"}
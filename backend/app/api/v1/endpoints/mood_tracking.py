@@ -3,7 +3,7 @@ Mood tracking endpoints
 """
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
@@ -17,7 +17,7 @@ router = APIRouter()
 async def get_mood_entries(
     limit: int = 10,
     offset: int = 0,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get user's mood entries
@@ -45,7 +45,7 @@ async def get_mood_entries(
 @router.post("/entries")
 async def create_mood_entry(
     mood_data: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create new mood entry
@@ -68,7 +68,7 @@ async def create_mood_entry(
 @router.get("/analytics")
 async def get_mood_analytics(
     days: int = 30,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get mood analytics and insights
@@ -2,108 +2,122 @@
 Support resources endpoints
 """
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.security import require_admin
+from app.services.counseling_index import CounselingDirectory, get_counseling_directory
+from app.services.resource_index import ResourceRecommender, catalogue_resources, get_resource_recommender
+from app.services.resource_search import ResourceSearchIndex, get_resource_search_index
+from app.services.support_catalog import SupportCatalog, get_support_catalog
 
 
 router = APIRouter()
 
+# Bodies are pre-serialized bytes, so document the schema-less JSON response explicitly
+JSON_RESPONSES = {200: {"content": {"application/json": {}}}, 304: {"description": "Not modified"}}
 
-@router.get("/emergency-contacts")
-async def get_emergency_contacts():
+
+@router.get("/emergency-contacts", response_class=Response, responses=JSON_RESPONSES)
+async def get_emergency_contacts(
+    request: Request,
+    catalog: SupportCatalog = Depends(get_support_catalog)
+):
     """
     Get emergency support contacts
     Public endpoint - no authentication required
     """
-    # TODO: Store these in database or config
-    return {
-        "contacts": [
-            {
-                "name": "National Suicide Prevention Lifeline",
-                "phone": "988",
-                "available": "24/7",
-                "type": "crisis"
-            },
-            {
-                "name": "Crisis Text Line",
-                "text": "HOME to 741741",
-                "available": "24/7",
-                "type": "crisis"
-            },
-            {
-                "name": "University Counseling Center",
-                "phone": "(555) 123-4567",
-                "available": "Mon-Fri 8AM-5PM",
-                "type": "counseling"
-            }
-        ]
-    }
+    return catalog.response("emergency_contacts", request)
 
 
-@router.get("/mental-health-resources")
-async def get_mental_health_resources():
+@router.get("/mental-health-resources", response_class=Response, responses=JSON_RESPONSES)
+async def get_mental_health_resources(
+    request: Request,
+    catalog: SupportCatalog = Depends(get_support_catalog)
+):
     """
     Get mental health resources and articles
     Public endpoint - no authentication required
     """
-    # TODO: Store these in database
-    return {
-        "resources": [
-            {
-                "title": "Managing University Stress",
-                "description": "Tips for handling academic pressure",
-                "url": "https://example.com/stress-management",
-                "type": "article",
-                "tags": ["stress", "academic"]
-            },
-            {
-                "title": "Mindfulness for Students",
-                "description": "Introduction to mindfulness practices",
-                "url": "https://example.com/mindfulness",
-                "type": "guide",
-                "tags": ["mindfulness", "meditation"]
-            },
-            {
-                "title": "Sleep Hygiene for Better Mental Health",
-                "description": "How good sleep supports mental wellbeing",
-                "url": "https://example.com/sleep-health",
-                "type": "article",
-                "tags": ["sleep", "health"]
-            }
-        ]
-    }
+    return catalog.response("mental_health_resources", request)
 
 
-@router.get("/counseling-services")
+@router.get("/counseling-services", responses=JSON_RESPONSES)
 async def get_counseling_services(
-    location: str = "university",
-    db: Session = Depends(get_db)
+    request: Request,
+    location: Optional[str] = Query(None, description="Campus, city, region or service name (prefix match)"),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0),
+    limit: int = Query(10, ge=1, le=settings.COUNSELING_MAX_RESULTS),
+    directory: CounselingDirectory = Depends(get_counseling_directory)
 ):
     """
     Get available counseling services
-    Optionally filtered by location
+    Optionally filtered by location and/or sorted by distance from lat/lon;
+    without filters, every service is returned
+    """
+    if (lat is None) != (lon is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="lat and lon must be given together"
+        )
+    if not location and lat is None:
+        return directory.response(request)
+    
+    services = directory.index.search(location=location, lat=lat, lon=lon, limit=limit, radius_km=radius_km)
+    return directory.search_results(services)
+
+
+@router.get("/resources/search")
+async def search_mental_health_resources(
+    q: Optional[str] = Query(None, description="Words that must all appear in the title, description or tags"),
+    tag: List[str] = Query([], description="Repeat to require several tags"),
+    type: Optional[str] = Query(None, description="article, guide, exercise, ..."),
+    limit: int = Query(20, ge=1, le=settings.RESOURCE_SEARCH_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    index: ResourceSearchIndex = Depends(get_resource_search_index)
+):
+    """
+    Search mental health resources by tag, type and free text
+    Pass `next_cursor` from the previous response as `cursor` for the next page
+    Public endpoint - no authentication required
+    """
+    try:
+        resources, next_cursor = index.search(q=q, tags=tag, type=type, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"resources": resources, "next_cursor": next_cursor}
+
+
+@router.post("/reload", dependencies=[Depends(require_admin)])
+async def reload_support_resources(
+    catalog: SupportCatalog = Depends(get_support_catalog),
+    directory: CounselingDirectory = Depends(get_counseling_directory),
+    recommender: ResourceRecommender = Depends(get_resource_recommender),
+    search_index: ResourceSearchIndex = Depends(get_resource_search_index)
+):
+    """
+    Re-read the support data files, rebuilding cached responses and indexes
+    Requires the X-Admin-Key header
     """
-    # TODO: Implement location-based counseling service lookup
+    try:
+        await catalog.reload()
+        await recommender.reload(catalogue_resources(catalog.data))
+        await directory.reload()
+    except (OSError, KeyError, ValueError) as e:
+        # Whatever failed to load keeps serving its previous version
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Support resources not reloaded: {str(e)}"
+        )
+    # Only resources that were added, changed or removed are re-indexed
+    search_changes = search_index.update(catalogue_resources(catalog.data))
     return {
-        "services": [
-            {
-                "name": "University Counseling and Psychological Services",
-                "address": "123 Campus Drive, Student Health Center",
-                "phone": "(555) 123-4567",
-                "services": ["Individual therapy", "Group therapy", "Crisis intervention"],
-                "cost": "Free for students",
-                "appointment_required": True
-            },
-            {
-                "name": "Community Mental Health Center",
-                "address": "456 Main Street",
-                "phone": "(555) 987-6543",
-                "services": ["Individual therapy", "Family therapy", "Medication management"],
-                "cost": "Sliding scale fees",
-                "appointment_required": True
-            }
-        ]
+        "etags": {**catalog.etags(), "counseling_services": directory.payload.etag},
+        "counseling_services": len(directory.index),
+        "resource_index": recommender.index.fingerprint,
+        "resource_search": search_changes
     }
@@ -2,12 +2,20 @@
 User management endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 
+from app.core import auth
+from app.core.config import settings
 from app.core.database import get_db
-from app.schemas.user import UserResponse, UserCreate, UserUpdate
+from app.core.security import require_admin
+from app.schemas.user import UserResponse, UserUpdate
+from app.services.chat_writer import ChatWriteQueue, get_chat_writer
+from app.services.roster_import import (
+    RosterImporter, append_invites, checkpoint_path_for, invites_path_for, iter_lines, parse_roster, read_invites
+)
+from app.services.user_service import UserService
 
 
 router = APIRouter()
@@ -15,59 +23,80 @@ router = APIRouter()
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(auth.get_current_user)
 ) -> UserResponse:
     """
     Get current user profile
     Requires authentication
     """
-    # TODO: Implement user profile retrieval
-    # user_service = UserService(db)
-    # return await user_service.get_current_user()
-    
-    # Placeholder response
-    return UserResponse(
-        id=1,
-        email="user@example.com",
-        name="Test User",
-        is_active=True,
-        created_at="2024-01-01T00:00:00Z"
-    )
+    return current_user
 
 
 @router.put("/me", response_model=UserResponse)
 async def update_current_user(
     user_update: UserUpdate,
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db)
 ) -> UserResponse:
     """
     Update current user profile
     Requires authentication
     """
-    # TODO: Implement user profile update
-    # user_service = UserService(db)
-    # return await user_service.update_current_user(user_update)
-    
-    # Placeholder response
-    return UserResponse(
-        id=1,
-        email="user@example.com",
-        name="Updated User",
-        is_active=True,
-        created_at="2024-01-01T00:00:00Z"
-    )
+    user_service = UserService(db)
+    user = await user_service.update_user(current_user.id, user_update)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 
 @router.delete("/me")
 async def delete_current_user(
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db),
+    writer: Optional[ChatWriteQueue] = Depends(get_chat_writer)
 ):
     """
     Delete current user account
     Requires authentication
     """
-    # TODO: Implement user account deletion
-    # user_service = UserService(db)
-    # return await user_service.delete_current_user()
+    user_service = UserService(db, writer=writer)
+    if not await user_service.delete_user(current_user.id):
+        raise HTTPException(status_code=404, detail="User not found")
     
     return {"message": "User account deleted successfully"}
+
+
+@router.post("/import", dependencies=[Depends(require_admin)])
+async def import_roster(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    import_id: Optional[str] = Query(None, pattern="^[A-Za-z0-9_-]{1,64}$")
+):
+    """
+    Bulk-import a student roster streamed as the request body (CSV or NDJSON)
+    Rows need `email` and `name`; rows without `password` get an invite token
+    (their initial password), returned in `invite_tokens`. Re-send the same roster
+    with the same `import_id` to resume an interrupted import; with an `import_id`,
+    tokens are saved batch by batch and the resumed response returns all of them,
+    including those of batches committed before the interruption.
+    Requires the X-Admin-Key header
+    """
+    importer = RosterImporter(
+        workers=settings.ROSTER_IMPORT_WORKERS,
+        batch_size=settings.ROSTER_IMPORT_BATCH_SIZE,
+        checkpoint_path=checkpoint_path_for(import_id) if import_id else None
+    )
+    invites = []
+    invites_path = invites_path_for(import_id) if import_id else None
+    on_invites = (lambda batch: append_invites(invites_path, batch)) if invites_path else invites.extend
+    try:
+        report = await importer.run(parse_roster(iter_lines(request.stream()), format), on_invites=on_invites)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Roster import error: {str(e)}")
+    if invites_path:
+        invites = read_invites(invites_path)
+    
+    return {
+        **report.to_dict(),
+        "invite_tokens": [{"email": email, "invite_token": token} for email, token in invites]
+    }
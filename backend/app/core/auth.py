@@ -0,0 +1,127 @@
+"""
+Authenticated-user dependency with token and user caches
+"""
+
+import hashlib
+import time
+from typing import Any, Dict, Optional
+from fastapi import Depends, WebSocketException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import HTTPConnection
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.revocation import TokenRevocationList, get_revocation_list
+from app.core.security import credentials_exception, verify_token
+from app.models.user import User
+from app.schemas.user import UserResponse
+
+
+class TokenVerifier:
+    """
+    Caches decoded JWT claims so a token's signature is checked once, not per request
+    Entries are keyed by the token's SHA-256 digest (the raw token is never
+    kept) and expire at the token's own `exp`. Tokens that fail verification
+    are not cached.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.claims = TTLCache(max_entries=max_entries, ttl_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        claims = self.claims.get(digest)
+        if claims is not None:
+            return claims
+
+        claims = verify_token(token)
+        if claims is None:
+            return None
+        remaining = float(claims.get("exp", 0)) - time.time()
+        if remaining <= 0:
+            return None
+        self.claims.set(digest, claims, ttl_seconds=remaining)
+        return claims
+
+    def clear(self) -> None:
+        self.claims.clear()
+
+
+# Worker-wide caches
+token_verifier = TokenVerifier(max_entries=settings.AUTH_TOKEN_CACHE_MAX_ENTRIES)
+user_cache = TTLCache(max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES, ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a cached user after their row changes (per worker; others expire within the TTL)"""
+    user_cache.delete(user_id)
+
+
+def _bearer_token(connection: HTTPConnection) -> Optional[str]:
+    scheme, _, token = connection.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token.strip()
+    # Browsers can't set headers on WebSocket handshakes
+    if connection.scope["type"] == "websocket":
+        return connection.query_params.get("access_token")
+    return None
+
+
+def _unauthorized(connection: HTTPConnection) -> Exception:
+    if connection.scope["type"] == "websocket":
+        return WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="Could not validate credentials")
+    return credentials_exception
+
+
+async def get_token_claims(
+    connection: HTTPConnection,
+    db: AsyncSession = Depends(get_db),
+    revocations: TokenRevocationList = Depends(get_revocation_list)
+) -> Dict[str, Any]:
+    """
+    Verified, unrevoked claims of the request's bearer token
+    Usage: claims: Dict[str, Any] = Depends(get_token_claims)
+    """
+    token = _bearer_token(connection)
+    claims = token_verifier.verify(token) if token else None
+    if claims is None:
+        raise _unauthorized(connection)
+    jti = claims.get("jti")
+    if jti and await revocations.is_revoked(jti, db):
+        raise _unauthorized(connection)
+    return claims
+
+
+async def get_current_user(
+    connection: HTTPConnection,
+    claims: Dict[str, Any] = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_db)
+) -> UserResponse:
+    """
+    Authenticated user dependency
+    Usage: current_user: UserResponse = Depends(get_current_user)
+    Expects `Authorization: Bearer <token>` (or `?access_token=` on WebSockets)
+    """
+    user_id = claims.get("user_id")
+    if not isinstance(user_id, int):
+        raise _unauthorized(connection)
+
+    user: Optional[UserResponse] = user_cache.get(user_id)
+    if user is None:
+        row = await db.get(User, user_id)
+        if row is None:
+            raise _unauthorized(connection)
+        user = UserResponse.model_validate(row)
+        user_cache.set(user_id, user)
+
+    if not user.is_active:
+        raise _unauthorized(connection)
+    return user
+
+
+def auth_cache_stats() -> Dict[str, Any]:
+    return {
+        "token_claims": token_verifier.claims.stats(),
+        "users": user_cache.stats()
+    }
@@ -0,0 +1,179 @@
+"""
+In-memory caches
+"""
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with per-entry expiry
+    Not thread-safe: intended for use from a single event loop
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None when missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return a live value without touching recency or hit/miss counters"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entries when full"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?…]+$")
+
+
+def normalize_prompt_text(text: Optional[str]) -> str:
+    """Fold case, apostrophes, whitespace and trailing punctuation so near-identical openers share a key"""
+    if not text:
+        return ""
+    text = text.replace("’", "'").replace("‘", "'").lower()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+class _Variants:
+    """Several cached responses for one prompt, served round-robin"""
+
+    __slots__ = ("responses", "generated", "next_index")
+
+    def __init__(self):
+        self.responses: List[str] = []
+        self.generated = 0  # Fresh generations seen, including duplicates
+        self.next_index = 0
+
+
+class ResponseCache:
+    """
+    LLM response cache keyed on (prompt version, normalized message, context, conversation)
+    Keeps up to `variants_per_key` distinct responses per key: until a key has
+    collected them all, lookups miss so the LLM produces a fresh variant; after
+    that, cached variants are rotated so repeated openers don't read canned.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        variants_per_key: int = 3,
+        max_message_chars: int = 280
+    ):
+        self._cache = TTLCache(max_entries, ttl_seconds)
+        self.variants_per_key = max(1, variants_per_key)
+        self.max_message_chars = max_message_chars
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, prompt_version: str, message: str, context: Optional[str] = None,
+                 conversation: Optional[str] = None) -> Optional[str]:
+        """
+        Build a cache key, or None when the message is too long to be worth caching
+        `conversation` is the rendered conversation in the prompt, if any; it is
+        hashed in verbatim, so replies are only shared at identical points of a conversation
+        """
+        if len(message) > self.max_message_chars:
+            return None
+        raw = "\x1f".join((prompt_version, normalize_prompt_text(message), normalize_prompt_text(context),
+                           conversation or ""))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the next cached variant once the key holds a full set"""
+        variants: Optional[_Variants] = self._cache.get(key)
+        if variants is None or variants.generated < self.variants_per_key:
+            # Still filling: miss so the caller generates another variant
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        response = variants.responses[variants.next_index]
+        variants.next_index = (variants.next_index + 1) % len(variants.responses)
+        return response
+
+    def add(self, key: str, response: str) -> None:
+        """Record a freshly generated response as another variant for the key"""
+        variants: Optional[_Variants] = self._cache.peek(key)
+        if variants is None:
+            variants = _Variants()
+            self._cache.set(key, variants)
+        if variants.generated >= self.variants_per_key:
+            return
+        variants.generated += 1
+        if response not in variants.responses:
+            variants.responses.append(response)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "max_entries": self._cache.max_entries,
+            "variants_per_key": self.variants_per_key,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self._cache.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
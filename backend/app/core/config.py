@@ -22,8 +22,83 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"
     
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12  # Cost factor; existing weaker hashes are upgraded on login
+    PASSWORD_HASH_WORKERS: int = 4  # Threads running bcrypt (it releases the GIL)
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Queued + running operations before 503
+    
+    # Authenticated-user caches
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000  # Decoded claims; each expires with its token
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_USER_CACHE_TTL_SECONDS: int = 30  # Bounds staleness across workers
+    
+    # Token revocation
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = 100000  # Revocations before the filter is resized
+    TOKEN_REVOCATION_FALSE_POSITIVE_RATE: float = 0.001  # Share of valid tokens that still hit the DB
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 5.0  # Pick up revocations made by other workers
+    TOKEN_REVOCATION_PRUNE_SECONDS: int = 3600
+    
+    # Admin endpoints (disabled unless set; sent as the X-Admin-Key header)
+    ADMIN_API_KEY: Optional[str] = None
+    
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED: bool = True
+    
+    # Request profiling (X-Profile header signed with ADMIN_API_KEY, or random sampling)
+    PROFILING_ENABLED: bool = False  # Off: the middleware isn't installed at all
+    PROFILE_SAMPLE_RATE: float = 0.0  # Share of all requests profiled without the header
+    PROFILE_DIR: str = ".profiles"
+    PROFILE_INTERVAL_MS: float = 5.0  # Stack sampling period
+    PROFILE_MAX_FILES: int = 200
+    PROFILE_MAX_AGE_HOURS: int = 24
+    PROFILE_MAX_CONCURRENT: int = 4  # Requests sampled at once; further ones run unprofiled
+    
+    # Bulk roster import
+    ROSTER_IMPORT_BATCH_SIZE: int = 1000
+    ROSTER_IMPORT_WORKERS: Optional[int] = None  # Hashing processes; defaults to the CPU count
+    ROSTER_IMPORT_CHECKPOINT_DIR: str = ".roster_imports"
+    
     # Database
     DATABASE_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    
+    # Chat history
+    CHAT_HISTORY_MAX_PAGE_SIZE: int = 100
+    CHAT_HISTORY_DELETE_CHUNK_SIZE: int = 500
+    
+    # Conversation context in chat prompts
+    CHAT_CONTEXT_ENABLED: bool = True
+    CHAT_CONTEXT_TOKEN_BUDGET: int = 1500  # Recent turns + summary + the new message
+    CHAT_CONTEXT_MAX_TURNS: int = 12  # Rows read per message; older turns live in the summary
+    CHAT_SUMMARY_MAX_NOTES: int = 6
+    CHAT_SUMMARY_NOTE_CHARS: int = 160
+    CONVERSATION_CACHE_MAX_MB: int = 32  # Recent-turn windows kept per worker, LRU by size
+    CONVERSATION_CACHE_TTL_SECONDS: float = 120.0  # Re-read windows this often (turns served by other workers)
+    
+    # Chat write-behind queue
+    CHAT_WRITE_QUEUE_MAX_SIZE: int = 10000
+    CHAT_WRITE_BATCH_SIZE: int = 200
+    CHAT_WRITE_FLUSH_INTERVAL_SECONDS: float = 0.25
+    CHAT_WRITE_PUT_TIMEOUT_SECONDS: float = 0.5  # Then write inline instead of waiting longer
+    
+    # Chat enrichment (mood insights, suggestions)
+    ENRICHMENT_INLINE_BUDGET_MS: int = 150  # Wait after the LLM reply before deferring a stage
+    ENRICHMENT_MAX_RESULTS: int = 10000
+    ENRICHMENT_RESULT_TTL_SECONDS: int = 900
+    
+    # Support resources
+    SUPPORT_RESOURCES_FILE: Optional[str] = None  # Defaults to app/data/support_resources.json
+    SUPPORT_CACHE_MAX_AGE_SECONDS: int = 300  # Cache-Control max-age; clients revalidate with If-None-Match
+    COUNSELING_SERVICES_FILE: Optional[str] = None  # Defaults to app/data/counseling_services.json
+    COUNSELING_MAX_RESULTS: int = 50
+    RESOURCE_SEARCH_MAX_PAGE_SIZE: int = 50
+    
+    # Resource recommendations on chat replies
+    RESOURCE_INDEX_DIR: str = ".resource_index"  # Built vector indexes, one subdirectory per catalogue version
+    RESOURCE_INDEX_DIMS: int = 2048  # Hashed feature space
+    CHAT_RESOURCES_TOP_K: int = 3
+    CHAT_RESOURCES_MIN_SCORE: float = 0.05  # Cosine similarity below which a resource isn't offered
     
     # CORS
     ALLOWED_HOSTS: List[AnyHttpUrl] = [
@@ -38,6 +113,41 @@ class Settings(BaseSettings):
     ANTHROPIC_API_KEY: Optional[str] = None
     GOOGLE_API_KEY: Optional[str] = None
     
+    # LLM client
+    LLM_PROVIDER: str = "gemini"  # "gemini", or "fake" for the offline stand-in (load tests, local dev)
+    LLM_MODEL: str = "gemini-2.5-flash-lite"
+    LLM_TRANSPORT: Optional[str] = None  # "grpc" (default), "grpc_asyncio" or "rest"
+    LLM_WARMUP_ON_STARTUP: bool = False
+    FAKE_LLM_FIRST_TOKEN_MS: float = 300.0
+    FAKE_LLM_TOKEN_MS: float = 20.0  # Per streamed word
+    FAKE_LLM_ERROR_RATE: float = 0.0
+    FAKE_LLM_SEED: int = 0
+    
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    LLM_CACHE_VARIANTS: int = 3  # Distinct responses kept and rotated per prompt
+    LLM_CACHE_MAX_MESSAGE_CHARS: int = 280  # Longer messages rarely repeat; don't cache them
+    
+    # LLM admission control
+    LLM_MAX_CONCURRENCY: int = 8  # Upstream calls in flight per worker
+    LLM_MAX_QUEUED: int = 64  # Callers waiting for a slot before new ones get 429
+    LLM_MAX_QUEUED_PER_USER: int = 4
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    
+    # LLM call deadline, circuit breaker and hedging
+    LLM_DEADLINE_SECONDS: float = 20.0  # Per call; a stream must finish within it
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open the circuit
+    LLM_BREAKER_SLOW_CALL_SECONDS: float = 10.0  # Slower calls (first chunk, for streams) count against the upstream
+    LLM_BREAKER_SLOW_CALL_RATE: float = 0.5  # Share of failed or slow calls in the window that opens it
+    LLM_BREAKER_WINDOW: int = 20
+    LLM_BREAKER_RESET_SECONDS: float = 30.0  # Open time before a probe call is let through
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 95.0  # Hedge calls still running after this latency percentile
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_MAX_RATIO: float = 0.1  # Hedged share of calls, at most
+    
     # Email settings (for future use)
     SMTP_HOST: Optional[str] = None
     SMTP_PORT: Optional[int] = None
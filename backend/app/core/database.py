@@ -2,53 +2,118 @@
 Database configuration and dependencies
 """
 
-from typing import Generator
-from sqlalchemy import create_engine
+import time
+from typing import AsyncGenerator
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
 
 from app.core.config import settings
+from app.core.metrics import DB_CHECKOUT_DURATION
+
+
+def get_async_database_url(url: str) -> str:
+    """Map a plain database URL onto its asyncio driver (aiosqlite / asyncpg)"""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
 
 
 # Database URL - will be set when you choose your database
-DATABASE_URL = settings.DATABASE_URL or "sqlite:///./wellpal.db"
+DATABASE_URL = get_async_database_url(settings.DATABASE_URL or "sqlite:///./wellpal.db")
+
+
+def timed_pool_class(url: str) -> type:
+    """
+    The dialect's default pool class, with checkout time recorded
+    Covers waiting for a free pooled connection (or opening one, for NullPool)
+    """
+    parsed = make_url(url)
+    pool_class = parsed.get_dialect().get_pool_class(parsed)
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return pool_class.connect(self)
+        finally:
+            DB_CHECKOUT_DURATION.observe(time.perf_counter() - started)
+
+    # recreate() (engine.dispose) instantiates self.__class__, so the timing survives it
+    return type(f"Timed{pool_class.__name__}", (pool_class,), {"connect": connect})
+
 
-# SQLAlchemy engine
-engine = create_engine(
+# SQLAlchemy async engine
+engine = create_async_engine(
     DATABASE_URL,
-    # SQLite specific settings (remove when using PostgreSQL)
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+    poolclass=timed_pool_class(DATABASE_URL),
+    # Connection pool sizing only applies to server databases (PostgreSQL)
+    **({} if DATABASE_URL.startswith("sqlite") else {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": True
+    })
 )
 
 # Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False so attributes stay readable after commit without implicit (blocking) refreshes
+AsyncSessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
 # Base class for database models
 Base = declarative_base()
 
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Database dependency for FastAPI endpoints
-    Usage: db: Session = Depends(get_db)
+    Usage: db: AsyncSession = Depends(get_db)
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 async def init_db() -> None:
     """Initialize database - create tables"""
     # Import all models here to ensure they are registered with SQLAlchemy
-    from app.models import User, ChatMessage  # Import your models
-    
-    Base.metadata.create_all(bind=engine)
+    from app.models import User, ChatMessage, RevokedToken  # Import your models
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
     print("📊 Database initialized")
 
 
+def upgrade_schema(connection: Connection) -> None:
+    """
+    Bring tables created by an earlier release up to the current models
+    create_all() only creates missing tables, so columns and indexes added to
+    existing ones are applied here. Every step checks first, so it is safe to
+    run on each startup.
+    """
+    from app.models import ChatMessage
+
+    inspector = inspect(connection)
+    if "chat_messages" not in inspector.get_table_names():
+        return
+
+    columns = {column["name"]: column for column in inspector.get_columns("chat_messages")}
+    if "companion_avatar" not in columns:
+        connection.execute(text("ALTER TABLE chat_messages ADD COLUMN companion_avatar VARCHAR(100)"))
+
+    # History pages order on (created_at, id), so every row needs a timestamp
+    connection.execute(text("UPDATE chat_messages SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL"))
+    if columns["created_at"]["nullable"] and connection.dialect.name == "postgresql":
+        # SQLite can't change a column's constraints in place; the backfill above covers it
+        connection.execute(text("ALTER TABLE chat_messages ALTER COLUMN created_at SET NOT NULL"))
+
+    for index in ChatMessage.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+
 async def close_db() -> None:
     """Close database connections"""
-    engine.dispose()
+    await engine.dispose()
     print("📊 Database connections closed")
@@ -0,0 +1,170 @@
+"""
+LLM client registry and dependencies
+"""
+
+from typing import Any, Optional
+from starlette.requests import HTTPConnection
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.core.cache import ResponseCache
+from app.core.config import settings
+from app.core.llm_dispatcher import LLMDispatcher
+from app.core.llm_guard import CircuitBreaker, LLMGuard
+from app.core.llm_providers import FakeLLMProvider, LLMProvider
+from app.core.metrics import metrics
+from app.core.singleflight import SingleFlight
+
+
+# Bump whenever SYSTEM_PROMPT changes so cached responses are not reused
+PROMPT_VERSION = "1"
+
+
+# System prompt for wellness companion
+SYSTEM_PROMPT = """You are a gentle and empathetic wellness companion for university students — more like a caring friend than a robot.  
+
+        Your role is to:  
+        1. Listen with warmth, patience, and genuine empathy to whatever the student shares.  
+        2. Respond with comforting words that provide emotional support and reassurance.  
+        3. Offer thoughtful, practical suggestions that can help with stress, sleep, study-life balance, and emotional wellbeing.  
+        4. Recognize when the situation might require professional support, and gently encourage seeking help.  
+        5. Always keep the conversation natural, encouraging, and relatable — never cold or mechanical.  
+        6. Respect each student’s background and individuality, being culturally sensitive and inclusive.  
+
+        Guidelines:  
+        - Keep responses warm, concise, and meaningful (2–4 sentences usually).  
+        - Prioritize emotional connection over formality — speak like a trusted confidant.  
+        - Never give medical advice or diagnoses.  
+        - When offering tips, make them specific, gentle, and actionable.  
+        - Remember: You are here to bring comfort, encouragement, and perspective — not to replace professional care.  
+        """
+
+
+class LLMRegistry:
+    """
+    Long-lived LLM clients shared by every request in a worker.
+    Created once in the application lifespan so the Gemini client, its
+    connection pool and the prompt chain are not rebuilt per request.
+    """
+
+    def __init__(self):
+        self.llm: Optional[Any] = None
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", SYSTEM_PROMPT),
+            ("human", "{user_message}")
+        ])
+        self.chain: Optional[LLMProvider] = None
+        self.dispatcher = LLMDispatcher(
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            max_queued=settings.LLM_MAX_QUEUED,
+            max_queued_per_user=settings.LLM_MAX_QUEUED_PER_USER,
+            queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS
+        )
+        self.single_flight = SingleFlight()
+        self.guard = LLMGuard(
+            CircuitBreaker(
+                failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+                slow_call_seconds=settings.LLM_BREAKER_SLOW_CALL_SECONDS,
+                slow_call_rate=settings.LLM_BREAKER_SLOW_CALL_RATE,
+                window=settings.LLM_BREAKER_WINDOW,
+                reset_timeout=settings.LLM_BREAKER_RESET_SECONDS
+            ),
+            deadline_seconds=settings.LLM_DEADLINE_SECONDS,
+            hedge=settings.LLM_HEDGE_ENABLED,
+            hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+            hedge_min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+            hedge_max_ratio=settings.LLM_HEDGE_MAX_RATIO
+        )
+        self.response_cache: Optional[ResponseCache] = None
+        if settings.LLM_CACHE_ENABLED:
+            self.response_cache = ResponseCache(
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                variants_per_key=settings.LLM_CACHE_VARIANTS,
+                max_message_chars=settings.LLM_CACHE_MAX_MESSAGE_CHARS
+            )
+
+    @property
+    def is_configured(self) -> bool:
+        return self.chain is not None
+
+    def build(self) -> None:
+        """Create the configured provider: the Gemini prompt chain, or the local fake"""
+        if settings.LLM_PROVIDER == "fake":
+            self.chain = FakeLLMProvider(
+                first_token_ms=settings.FAKE_LLM_FIRST_TOKEN_MS,
+                token_ms=settings.FAKE_LLM_TOKEN_MS,
+                error_rate=settings.FAKE_LLM_ERROR_RATE,
+                seed=settings.FAKE_LLM_SEED
+            )
+            return
+        if settings.LLM_PROVIDER != "gemini":
+            raise ValueError(f"Unknown LLM_PROVIDER: {settings.LLM_PROVIDER}")
+        if not settings.GOOGLE_API_KEY:
+            return
+
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        self.llm = ChatGoogleGenerativeAI(
+            model=settings.LLM_MODEL,
+            google_api_key=settings.GOOGLE_API_KEY,
+            temperature=0.7,
+            max_tokens=1000,
+            transport=settings.LLM_TRANSPORT
+        )
+        self.chain = self.prompt | self.llm
+
+    async def warm_up(self) -> None:
+        """Open the upstream connection before the first user request arrives"""
+        if not self.is_configured:
+            return
+        try:
+            await self.chain.ainvoke({"user_message": "Hi"})
+        except Exception as e:
+            print(f"⚠️ LLM warm-up failed: {str(e)}")
+
+    async def close(self) -> None:
+        """Release the client and its connections"""
+        self.chain = None
+        self.llm = None
+        if self.response_cache is not None:
+            self.response_cache.clear()
+
+
+# Worker-wide registry, populated by init_llm() during startup
+llm_registry = LLMRegistry()
+
+metrics.gauge_function("wellpal_llm_circuit_state", "LLM circuit breaker state: 0 closed, 1 half-open, 2 open",
+                       lambda: llm_registry.guard.breaker.state_code)
+metrics.gauge_function("wellpal_llm_queue_depth", "LLM calls waiting for a dispatcher slot",
+                       lambda: llm_registry.dispatcher.queued)
+metrics.gauge_function("wellpal_llm_fallback_ratio",
+                       "Share of LLM calls that got no reply (failed, timed out or short-circuited)",
+                       lambda: llm_registry.guard.fallback_rate)
+
+
+async def init_llm() -> LLMRegistry:
+    """Initialize LLM clients"""
+    llm_registry.build()
+    if isinstance(llm_registry.chain, FakeLLMProvider):
+        print("🤖 Fake LLM provider initialized (offline, no Gemini calls)")
+    elif llm_registry.is_configured:
+        if settings.LLM_WARMUP_ON_STARTUP:
+            await llm_registry.warm_up()
+        print("🤖 LLM client initialized")
+    else:
+        print("⚠️ GOOGLE_API_KEY not set - AI chat disabled")
+    return llm_registry
+
+
+async def close_llm() -> None:
+    """Close LLM clients"""
+    await llm_registry.close()
+    print("🤖 LLM client closed")
+
+
+def get_llm(connection: HTTPConnection) -> LLMRegistry:
+    """
+    LLM registry dependency for FastAPI HTTP and WebSocket endpoints
+    Usage: llm: LLMRegistry = Depends(get_llm)
+    """
+    return getattr(connection.app.state, "llm", llm_registry)
@@ -0,0 +1,174 @@
+"""
+Bounded, per-user fair admission for upstream LLM calls
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Hashable, Optional
+
+from app.core.metrics import LLM_QUEUE_REJECTIONS, LLM_QUEUE_WAIT
+
+
+class LLMQueueFull(Exception):
+    """Raised when an LLM call can't be admitted; carries a Retry-After hint in seconds"""
+
+    def __init__(self, retry_after: int, reason: str = "LLM queue is full"):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class LLMDispatcher:
+    """
+    Global concurrency limit for LLM calls with a bounded, round-robin wait queue
+    Up to `max_concurrency` calls run at once. Further callers wait in a
+    per-user FIFO and freed slots are handed out one user at a time, so a
+    single chatty user can't starve the others. Callers are rejected
+    immediately with LLMQueueFull when the queue (or their share of it) is
+    full, and after waiting `queue_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_queued: int = 64,
+        max_queued_per_user: int = 4,
+        queue_timeout: float = 30.0,
+        wait_samples: int = 1024
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+        self.max_queued_per_user = max_queued_per_user
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._queued = 0
+        self._waiting: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+
+        # Counters
+        self.admitted = 0
+        self.queued_total = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._wait_ms: Deque[float] = deque(maxlen=wait_samples)
+        self._total_wait_ms = 0.0
+        self._hold_seconds = 1.0  # Moving average of how long a call holds its slot
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @asynccontextmanager
+    async def slot(self, user_key: Optional[Hashable]) -> AsyncIterator[float]:
+        """Hold one LLM slot for the duration of the block; yields the queue wait in ms"""
+        wait_ms = await self._acquire("anonymous" if user_key is None else user_key)
+        LLM_QUEUE_WAIT.observe(wait_ms / 1000)
+        started = time.monotonic()
+        try:
+            yield wait_ms
+        finally:
+            self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * (time.monotonic() - started)
+            self._release()
+
+    def check_capacity(self, user_key: Optional[Hashable]) -> None:
+        """Raise LLMQueueFull if a call for this user would be rejected right now"""
+        if self._active < self.max_concurrency and not self._queued:
+            return
+        user_queue = self._waiting.get("anonymous" if user_key is None else user_key, ())
+        if self._queued >= self.max_queued or len(user_queue) >= self.max_queued_per_user:
+            self.rejected += 1
+            LLM_QUEUE_REJECTIONS.labels("full").inc()
+            raise LLMQueueFull(self.retry_after())
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained"""
+        return max(1, math.ceil(self._hold_seconds * (self._queued + 1) / self.max_concurrency))
+
+    async def _acquire(self, user_key: Hashable) -> float:
+        if self._active < self.max_concurrency and not self._queued:
+            self._active += 1
+            self._record_wait(0.0)
+            return 0.0
+
+        self.check_capacity(user_key)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(user_key, deque()).append(future)
+        self._queued += 1
+        self.queued_total += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait({future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if future.done():
+                # Cancelled right after a slot was handed over - pass it on
+                self._release()
+            else:
+                self._discard(user_key, future)
+            raise
+
+        if not future.done():
+            self._discard(user_key, future)
+            self.timeouts += 1
+            LLM_QUEUE_REJECTIONS.labels("timeout").inc()
+            raise LLMQueueFull(self.retry_after(), "Timed out waiting for an LLM slot")
+        wait_ms = (time.monotonic() - started) * 1000
+        self._record_wait(wait_ms)
+        return wait_ms
+
+    def _discard(self, user_key: Hashable, future: asyncio.Future) -> None:
+        future.cancel()
+        user_queue = self._waiting.get(user_key)
+        if user_queue is not None and future in user_queue:
+            user_queue.remove(future)
+            self._queued -= 1
+            if not user_queue:
+                del self._waiting[user_key]
+
+    def _release(self) -> None:
+        self._active -= 1
+        # Hand freed slots out round-robin: the user at the head gets one, then goes to the back
+        while self._active < self.max_concurrency and self._waiting:
+            user_key, user_queue = next(iter(self._waiting.items()))
+            future = user_queue.popleft()
+            self._queued -= 1
+            if user_queue:
+                self._waiting.move_to_end(user_key)
+            else:
+                del self._waiting[user_key]
+            if not future.done():
+                self._active += 1
+                future.set_result(None)
+
+    def _record_wait(self, wait_ms: float) -> None:
+        self.admitted += 1
+        self._total_wait_ms += wait_ms
+        self._wait_ms.append(wait_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self._wait_ms)
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))], 2) if samples else 0.0
+
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queued": self._queued,
+            "max_queued": self.max_queued,
+            "users_waiting": len(self._waiting),
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "queue_wait_ms": {
+                "avg": round(self._total_wait_ms / self.admitted, 2) if self.admitted else 0.0,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(samples[-1], 2) if samples else 0.0
+            }
+        }
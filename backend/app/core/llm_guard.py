@@ -0,0 +1,383 @@
+"""
+Deadlines, circuit breaking and hedged requests for upstream LLM calls
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from app.core.llm_providers import LLMProvider
+from app.core.metrics import LLM_CIRCUIT_TRANSITIONS, LLM_HEDGES
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling the LLM while the circuit is open; carries a Retry-After hint in seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("LLM circuit is open")
+        self.retry_after = retry_after
+
+
+class LLMDeadlineExceeded(Exception):
+    """The LLM call ran past its deadline"""
+
+
+class BreakerPermit(NamedTuple):
+    """Handed out by CircuitBreaker.acquire() for one admitted call"""
+    generation: int  # Bumped whenever the circuit opens or closes
+    probe: bool  # The single call let through while half-open
+
+
+class CircuitBreaker:
+    """
+    Stops calling an upstream that is failing or slow
+    Closed: calls go through. It opens after `failure_threshold` consecutive
+    failures, or when `slow_call_rate` of the last `window` calls failed or
+    took longer than `slow_call_seconds`. Open: calls are rejected at once.
+    After `reset_timeout` seconds it is half-open and lets a single probe
+    through; the probe's outcome closes or re-opens it. Outcomes of calls
+    admitted before the circuit last opened or closed are ignored.
+    Not thread-safe: intended for use from a single event loop
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold: int = 5, slow_call_seconds: float = 10.0, slow_call_rate: float = 0.5,
+                 window: int = 20, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._generation = 0
+        self._consecutive_failures = 0
+        self._outcomes: Deque[bool] = deque(maxlen=window)  # True = failed or slow
+
+        # Counters
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() >= self._opened_at + self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    @property
+    def state_code(self) -> int:
+        """0 closed, 1 half-open, 2 open"""
+        return self.STATE_CODES[self.state]
+
+    def check(self) -> None:
+        """Raise CircuitOpen if a call would be rejected right now (reserves nothing)"""
+        state = self.state
+        if state == self.OPEN or (state == self.HALF_OPEN and self._probing):
+            self.rejected += 1
+            raise CircuitOpen(self._retry_after())
+
+    def acquire(self) -> BreakerPermit:
+        """
+        Admit one call, or raise CircuitOpen
+        Pass the permit to record() or, if the call ends without an outcome, release()
+        """
+        self.check()
+        probe = self.state == self.HALF_OPEN
+        if probe:
+            self._probing = True
+            self._transition(self.HALF_OPEN)
+        return BreakerPermit(self._generation, probe)
+
+    def release(self, permit: BreakerPermit) -> None:
+        """An admitted call ended without an outcome (cancelled); a cancelled probe lets the next one through"""
+        if permit.probe:
+            self._probing = False
+
+    def record(self, permit: BreakerPermit, ok: bool, elapsed: Optional[float] = None) -> None:
+        bad = not ok or (elapsed is not None and elapsed > self.slow_call_seconds)
+        if permit.probe:
+            self._probing = False
+            if bad:
+                self._open("probe failed")
+            else:
+                self._close()
+            return
+        if permit.generation != self._generation or self._state != self.CLOSED:
+            return  # Admitted before the circuit last opened or closed
+
+        self._consecutive_failures = 0 if ok else self._consecutive_failures + 1
+        self._outcomes.append(bad)
+        if self._consecutive_failures >= self.failure_threshold:
+            self._open(f"{self._consecutive_failures} consecutive failures")
+        elif len(self._outcomes) == self._outcomes.maxlen and sum(self._outcomes) >= self.slow_call_rate * len(self._outcomes):
+            self._open(f"{sum(self._outcomes)} of the last {len(self._outcomes)} calls failed or were slow")
+
+    def _open(self, reason: str) -> None:
+        self._opened_at = time.monotonic()
+        self._generation += 1
+        self.opened += 1
+        self._transition(self.OPEN)
+        print(f"⚠️ LLM circuit opened ({reason}); retrying in {self.reset_timeout:g}s")
+
+    def _close(self) -> None:
+        self._generation += 1
+        self._consecutive_failures = 0
+        self._outcomes.clear()
+        self._transition(self.CLOSED)
+        print("✅ LLM circuit closed")
+
+    def _transition(self, state: str) -> None:
+        if state != self._state:
+            self._state = state
+            LLM_CIRCUIT_TRANSITIONS.labels(state).inc()
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._opened_at + self.reset_timeout - time.monotonic()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "recent_bad_calls": sum(self._outcomes),
+            "recent_calls": len(self._outcomes),
+            "opened": self.opened,
+            "rejected": self.rejected
+        }
+
+
+class LatencyTracker:
+    """Latencies of the last `size` successful calls, for percentile lookups"""
+
+    def __init__(self, size: int = 256):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._sorted: Optional[List[float]] = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._sorted = None
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        return self._sorted[min(len(self._sorted) - 1, max(0, math.ceil(p / 100 * len(self._sorted)) - 1))]
+
+
+# Cancelled hedges and stream closes still winding down; the event loop only holds
+# weak references to tasks, so these keep them alive until they finish
+_background: Set[asyncio.Task] = set()
+
+
+def _detach(task: asyncio.Task, discard: Optional[Callable[[Any], None]] = None) -> None:
+    """Let a task finish in the background, retrieving its exception and discarding a late result"""
+    def done(task: asyncio.Task) -> None:
+        _background.discard(task)
+        # Losers' exceptions are expected; retrieving them keeps asyncio from logging them
+        if not task.cancelled() and task.exception() is None and discard is not None:
+            discard(task.result())
+
+    _background.add(task)
+    task.add_done_callback(done)
+
+
+async def _first_chunk(stream: AsyncIterator[Any]) -> Tuple[AsyncIterator[Any], Optional[Any]]:
+    iterator = stream.__aiter__()
+    try:
+        return iterator, await iterator.__anext__()
+    except StopAsyncIteration:
+        return iterator, None
+
+
+def _close_stream(result: Tuple[AsyncIterator[Any], Optional[Any]]) -> None:
+    aclose = getattr(result[0], "aclose", None)
+    if aclose is not None:
+        _detach(asyncio.ensure_future(aclose()))
+
+
+class LLMGuard:
+    """
+    Wraps each upstream LLM call in a deadline, a circuit breaker and optional hedging
+    With hedging on, a second identical request is sent when the first has
+    been running longer than the `hedge_percentile` latency of recent calls,
+    and whichever answers first is used (the other is cancelled). At most
+    `hedge_max_ratio` of calls are hedged, and never while the circuit isn't
+    closed. The deadline covers a whole stream. Streams are hedged, and timed
+    for the breaker, on their first chunk, but the breaker only hears their
+    outcome when they end: one that fails or runs past the deadline after the
+    first chunk counts as a failure.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, deadline_seconds: float = 20.0, hedge: bool = False,
+                 hedge_percentile: float = 95.0, hedge_min_samples: int = 20, hedge_max_ratio: float = 0.1):
+        self.breaker = breaker
+        self.deadline = deadline_seconds
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_max_ratio = hedge_max_ratio
+        self.latency = {"message": LatencyTracker(), "stream": LatencyTracker()}
+
+        # Counters
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def check(self) -> None:
+        """Fail fast with CircuitOpen before queueing for a dispatcher slot"""
+        self.breaker.check()
+
+    async def invoke(self, chain: LLMProvider, inputs: Dict[str, Any]) -> Any:
+        """chain.ainvoke(inputs) within the deadline; raises CircuitOpen or LLMDeadlineExceeded"""
+        result, _, _ = await self._call("message", lambda: chain.ainvoke(inputs))
+        return result
+
+    async def stream(self, chain: LLMProvider, inputs: Dict[str, Any]) -> AsyncIterator[Any]:
+        """chain.astream(inputs) within the deadline, which covers the whole stream"""
+        started = time.perf_counter()
+        (iterator, chunk), permit, first_chunk = await self._call(
+            "stream", lambda: _first_chunk(chain.astream(inputs)), _close_stream, settle=False
+        )
+        settled = False
+        try:
+            while chunk is not None:
+                yield chunk
+                remaining = started + self.deadline - time.perf_counter()
+                try:
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError
+                    chunk = await asyncio.wait_for(iterator.__anext__(), remaining)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    settled = True
+                    self.breaker.record(permit, False)
+                    raise LLMDeadlineExceeded(f"LLM stream exceeded its {self.deadline:g}s deadline")
+                except Exception:
+                    # Otherwise an upstream that keeps dying mid-stream would never open the circuit
+                    self.failures += 1
+                    settled = True
+                    self.breaker.record(permit, False)
+                    raise
+            settled = True
+            self.breaker.record(permit, True, first_chunk)
+        finally:
+            if not settled:
+                self.breaker.release(permit)  # The consumer stopped reading: no outcome either way
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    async def _call(self, mode: str, start: Callable[[], Awaitable[Any]],
+                    discard: Optional[Callable[[Any], None]] = None,
+                    settle: bool = True) -> Tuple[Any, BreakerPermit, float]:
+        """
+        The first result, its breaker permit and its latency
+        With settle=False a success is not recorded: the caller records the
+        call's outcome with the permit (or releases it) once it knows it.
+        """
+        permit = self.breaker.acquire()
+        self.calls += 1
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self._race(mode, start, discard), self.deadline)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.breaker.record(permit, False)
+            raise LLMDeadlineExceeded(f"LLM call exceeded its {self.deadline:g}s deadline")
+        except asyncio.CancelledError:
+            self.breaker.release(permit)
+            raise
+        except Exception:
+            self.failures += 1
+            self.breaker.record(permit, False)
+            raise
+        elapsed = time.perf_counter() - started
+        self.latency[mode].add(elapsed)
+        if settle:
+            self.breaker.record(permit, True, elapsed)
+        return result, permit, elapsed
+
+    def _hedge_delay(self, mode: str) -> Optional[float]:
+        tracker = self.latency[mode]
+        if not self.hedge or len(tracker) < self.hedge_min_samples:
+            return None
+        return tracker.percentile(self.hedge_percentile)
+
+    def _may_hedge(self) -> bool:
+        return self.breaker.state == CircuitBreaker.CLOSED and self.hedges < self.hedge_max_ratio * self.calls
+
+    async def _race(self, mode: str, start: Callable[[], Awaitable[Any]],
+                    discard: Optional[Callable[[Any], None]]) -> Any:
+        tasks = [asyncio.ensure_future(start())]
+        winner = None
+        try:
+            delay = self._hedge_delay(mode)
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._may_hedge():
+                    self.hedges += 1
+                    LLM_HEDGES.labels("sent").inc()
+                    tasks.append(asyncio.ensure_future(start()))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and winner is None:
+                        winner = task
+                    elif task.exception() is not None:
+                        error = task.exception()
+                if winner is not None:
+                    if winner is not tasks[0]:
+                        self.hedge_wins += 1
+                        LLM_HEDGES.labels("won").inc()
+                    return winner.result()
+            raise error
+        finally:
+            for task in tasks:
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                    _detach(task, discard)  # May still finish with a result it can't take back
+                elif not task.cancelled() and task.exception() is None and discard is not None:
+                    discard(task.result())
+
+    @property
+    def fallback_rate(self) -> float:
+        """Share of calls that got no reply: failed, timed out or short-circuited by the breaker"""
+        attempts = self.calls + self.breaker.rejected
+        unanswered = self.failures + self.timeouts + self.breaker.rejected
+        return unanswered / attempts if attempts else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        message_p95 = self.latency["message"].percentile(95)
+        stream_p95 = self.latency["stream"].percentile(95)
+        return {
+            "circuit": self.breaker.stats(),
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "short_circuited": self.breaker.rejected,
+            "fallback_rate": round(self.fallback_rate, 4),
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p95_ms": {
+                "message": round(message_p95 * 1000, 2) if message_p95 is not None else None,
+                "stream_first_chunk": round(stream_p95 * 1000, 2) if stream_p95 is not None else None
+            }
+        }
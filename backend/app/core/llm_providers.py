@@ -0,0 +1,89 @@
+"""
+LLM providers: the interface AIChatService calls and a local stand-in
+"""
+
+import asyncio
+import hashlib
+import random
+from typing import Any, AsyncIterator, Dict, List, Protocol, runtime_checkable
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+
+@runtime_checkable
+class LLMProvider(Protocol):
+    """
+    What AIChatService needs from a model
+    `prompt | ChatGoogleGenerativeAI(...)` satisfies it as is; inputs carry
+    the formatted "user_message".
+    """
+
+    async def ainvoke(self, inputs: Dict[str, Any]) -> AIMessage:
+        ...
+
+    def astream(self, inputs: Dict[str, Any]) -> AsyncIterator[AIMessageChunk]:
+        ...
+
+
+class FakeLLMError(RuntimeError):
+    """Simulated upstream failure"""
+
+
+FAKE_REPLIES = [
+    "It sounds like a lot is landing on you at once, and that is genuinely hard. "
+    "Would it help to pick just one thing to focus on for the next hour?",
+    "Thank you for telling me how you feel. Exams can make everything seem urgent; "
+    "a short walk or a few slow breaths can make the next step feel more manageable.",
+    "Feeling lonely at university is more common than it looks from the outside. "
+    "Is there a club, a study group or a flatmate you could reach out to this week?",
+    "Rest matters as much as revision. A consistent bedtime and a screen-free half hour "
+    "before sleep can make a real difference to how the next day feels.",
+    "That sounds frustrating. It is okay to feel this way, and you do not have to solve it all today. "
+    "If it keeps weighing on you, the campus counseling service is there to help."
+]
+
+
+class FakeLLMProvider:
+    """
+    Deterministic local stand-in for Gemini (LLM_PROVIDER=fake)
+    The reply is picked by a hash of the message and streamed word by word:
+    `first_token_ms` before the first word, then `token_ms` per word.
+    `error_rate` of calls fail before the first word; failures come from a
+    seeded generator, so a run with the same seed fails the same calls.
+    """
+
+    def __init__(self, first_token_ms: float = 300.0, token_ms: float = 20.0, error_rate: float = 0.0,
+                 seed: int = 0):
+        self.first_token = first_token_ms / 1000
+        self.token = token_ms / 1000
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+
+    def reply_words(self, message: str) -> List[str]:
+        digest = hashlib.blake2b(message.encode("utf-8"), digest_size=4).digest()
+        return FAKE_REPLIES[int.from_bytes(digest, "big") % len(FAKE_REPLIES)].split(" ")
+
+    async def astream(self, inputs: Dict[str, Any]) -> AsyncIterator[AIMessageChunk]:
+        message = str(inputs.get("user_message", ""))
+        self.calls += 1
+        fail = self._rng.random() < self.error_rate
+        await asyncio.sleep(self.first_token)
+        if fail:
+            self.failures += 1
+            raise FakeLLMError("Simulated LLM failure")
+        words = self.reply_words(message)
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(self.token)
+            yield AIMessageChunk(content=word if i == len(words) - 1 else word + " ")
+        # Usage goes on a final empty chunk, as Gemini reports it at the end of a stream
+        yield AIMessageChunk(content="", response_metadata={"usage_metadata": {
+            "prompt_token_count": len(message) // 4 + 1,
+            "candidates_token_count": len(words)
+        }})
+
+    async def ainvoke(self, inputs: Dict[str, Any]) -> AIMessage:
+        chunks = [chunk async for chunk in self.astream(inputs)]
+        return AIMessage(content="".join(chunk.content for chunk in chunks),
+                         response_metadata=chunks[-1].response_metadata)
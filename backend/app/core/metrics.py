@@ -0,0 +1,297 @@
+"""
+Prometheus metrics: counters, histograms and the per-route HTTP middleware
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+# Seconds; covers everything from cached lookups to slow LLM replies
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CHECKOUT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+
+
+class _Shards:
+    """
+    Per-thread value slots, summed on scrape
+    Each thread only ever writes its own list, so updates need no lock; the
+    lock is taken once per thread, when its slots are created.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._all: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def mine(self) -> List[float]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = [0.0] * self.size
+            with self._lock:
+                self._all.append(values)
+            self._local.values = values
+            return values
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            shards = list(self._all)
+        return [sum(column) for column in zip(*shards)] if shards else [0.0] * self.size
+
+
+class _CounterChild:
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._shards.mine()[0] += amount
+
+    def value(self) -> float:
+        return self._shards.totals()[0]
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "_shards")
+
+    def __init__(self, buckets: Sequence[float]):
+        self._buckets = buckets
+        # One slot per bucket plus +Inf, then sum and count
+        self._shards = _Shards(len(buckets) + 3)
+
+    def observe(self, value: float) -> None:
+        values = self._shards.mine()
+        values[bisect_left(self._buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        """Cumulative bucket counts (last one is +Inf), sum and count"""
+        totals = self._shards.totals()
+        cumulative, running = [], 0.0
+        for count in totals[:-2]:
+            running += count
+            cumulative.append(running)
+        return cumulative, totals[-2], totals[-1]
+
+
+class _Family:
+    """A metric and its children, one per label value combination"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            # setdefault is atomic, so two threads racing here share one child
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _label_text(self, values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values)) + ([extra] if extra else [])
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.copy().items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: Tuple[str, ...], child) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabelled counter"""
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        yield f"{self.name}{self._label_text(values)} {_number(child.value())}"
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Observe on the unlabelled histogram"""
+        self.labels().observe(value)
+
+    def _render_child(self, values, child):
+        cumulative, total, count = child.snapshot()
+        for bound, running in zip(list(self.buckets) + [math.inf], cumulative):
+            yield f"{self.name}_bucket{self._label_text(values, ('le', _number(bound)))} {_number(running)}"
+        yield f"{self.name}_sum{self._label_text(values)} {_number(total)}"
+        yield f"{self.name}_count{self._label_text(values)} {_number(count)}"
+
+
+class GaugeFunction(_Family):
+    """A gauge computed from `function` at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.function = function
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge",
+                f"{self.name} {_number(self.function())}"]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """Metric families, rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._families: Dict[str, _Family] = {}
+
+    def _register(self, family: _Family) -> _Family:
+        if family.name in self._families:
+            raise ValueError(f"Metric {family.name} already registered")
+        self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_function(self, name: str, documentation: str, function: Callable[[], float]) -> GaugeFunction:
+        return self._register(GaugeFunction(name, documentation, function))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in list(self._families.values()):
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry and the application's metrics
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter(
+    "wellpal_http_requests_total", "HTTP requests by method, route template and status code",
+    ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = metrics.histogram(
+    "wellpal_http_request_duration_seconds", "Time from request start to the last response byte",
+    ("method", "route")
+)
+LLM_REQUEST_DURATION = metrics.histogram(
+    "wellpal_llm_request_duration_seconds", "Upstream LLM call latency (cache hits excluded)", ("mode",)
+)
+LLM_QUEUE_WAIT = metrics.histogram(
+    "wellpal_llm_queue_wait_seconds", "Time admitted LLM calls waited for a dispatcher slot"
+)
+LLM_QUEUE_REJECTIONS = metrics.counter(
+    "wellpal_llm_queue_rejections_total", "LLM calls turned away with 429, by reason (full or timeout)", ("reason",)
+)
+LLM_TOKENS = metrics.counter(
+    "wellpal_llm_tokens_total", "LLM tokens as reported by the model, else estimated at 4 characters per token",
+    ("kind",)
+)
+LLM_CACHE_REQUESTS = metrics.counter(
+    "wellpal_llm_cache_requests_total", "Response cache lookups by result (hit or miss)", ("result",)
+)
+CHAT_FALLBACKS = metrics.counter(
+    "wellpal_chat_fallbacks_total",
+    "Chat replies served from the fallback text, by reason (error, deadline, circuit_open)", ("mode", "reason")
+)
+LLM_CIRCUIT_TRANSITIONS = metrics.counter(
+    "wellpal_llm_circuit_transitions_total", "LLM circuit breaker state changes, by the state entered", ("state",)
+)
+LLM_HEDGES = metrics.counter(
+    "wellpal_llm_hedges_total", "Hedged LLM requests sent, and how many answered first", ("result",)
+)
+DB_CHECKOUT_DURATION = metrics.histogram(
+    "wellpal_db_checkout_duration_seconds", "Time to check a connection out of the database pool",
+    buckets=CHECKOUT_BUCKETS
+)
+
+
+def _cache_hit_ratio() -> float:
+    hits = LLM_CACHE_REQUESTS.labels("hit").value()
+    lookups = hits + LLM_CACHE_REQUESTS.labels("miss").value()
+    return hits / lookups if lookups else 0.0
+
+
+metrics.gauge_function("wellpal_llm_cache_hit_ratio", "Share of response cache lookups that were hits", _cache_hit_ratio)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording count, status and latency per route
+    Routes are labelled by their path template (`/api/v1/chat/enrichment/{message_id}`),
+    never the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # FastAPI sets scope["route"] once the router has matched
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - started)
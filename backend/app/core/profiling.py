@@ -0,0 +1,271 @@
+"""
+On-demand request profiling (sampled wall-clock stacks, collapsed format)
+"""
+
+import asyncio
+import gc
+import hashlib
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from types import FrameType
+from typing import Dict, List, Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+PROFILE_HEADER = b"x-profile"
+_UNSAFE = re.compile(r"[^A-Za-z0-9]+")
+
+# Set while a profiled request runs; tasks it spawns inherit it
+_current_profile: ContextVar[Optional["Profile"]] = ContextVar("current_profile", default=None)
+
+
+def sign_profile_request(secret: str, ttl_seconds: int = 300, now: Optional[float] = None) -> str:
+    """
+    Value for the X-Profile header: "<expiry>.<hmac>"
+    Anyone holding the admin key can mint one; it stops working at the expiry
+    """
+    expires = int((now or time.time()) + ttl_seconds)
+    signature = hmac.new(secret.encode("utf-8"), str(expires).encode("ascii"), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_request(secret: Optional[str], value: str, now: Optional[float] = None) -> bool:
+    if not secret:
+        return False
+    expires, _, signature = value.partition(".")
+    if not expires.isdigit() or int(expires) < (now or time.time()):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), expires.encode("ascii"), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+def _label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _running_stack(frame: Optional[FrameType], root: FrameType) -> Optional[List[str]]:
+    """Labels from `root` down to `frame`, or None if `root` isn't on this stack"""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame))
+        if frame is root:
+            labels.reverse()
+            return labels
+        frame = frame.f_back
+    return None
+
+
+def _frame_of(awaitable) -> Optional[FrameType]:
+    return getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None) or getattr(awaitable, "ag_frame", None)
+
+
+def _awaiting_stack(task: asyncio.Task, root: FrameType, max_depth: int = 256) -> List[str]:
+    """Labels from `root` down to the coroutine the suspended task is waiting in"""
+    labels: List[str] = []
+    coro = task.get_coro()
+    for _ in range(max_depth):
+        if coro is None:
+            break
+        frame = _frame_of(coro)
+        if frame is None:
+            # `async for` awaits an async_generator_asend, which only exposes its generator to the GC
+            coro = next((inner for inner in gc.get_referents(coro) if _frame_of(inner) is not None), None)
+            continue
+        if frame is root:
+            labels = []  # Drop the server frames above the middleware
+        labels.append(_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return labels + ["(waiting)"]
+
+
+def _task_stack(task: asyncio.Task, root: Optional[FrameType], running: Optional[FrameType]) -> Optional[List[str]]:
+    if root is None:
+        root = getattr(task.get_coro(), "cr_frame", None)
+        if root is None:
+            return None  # Finished
+    stack = _running_stack(running, root)
+    return stack if stack is not None else _awaiting_stack(task, root)
+
+
+class Profile:
+    """Stack samples for one request and the tasks it spawned"""
+
+    def __init__(self, root: FrameType, task: asyncio.Task, thread_id: int):
+        self.root = root
+        self.task = task
+        self.children: List[asyncio.Task] = []
+        self.thread_id = thread_id
+        self.samples: Counter = Counter()
+
+    def sample(self, running: Optional[FrameType]) -> None:
+        """Record one stack per live task: the running one's frames, or where the others are waiting"""
+        stacks = [_task_stack(self.task, self.root, running)]
+        stacks.extend(_task_stack(task, None, running) for task in list(self.children) if not task.done())
+        for stack in stacks:
+            if stack:
+                self.samples[";".join(stack)] += 1
+
+    def collapsed(self) -> str:
+        """One "frame;frame;frame count" line per distinct stack (flamegraph.pl / speedscope input)"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class RequestProfiler:
+    """
+    Samples the stacks of profiled requests from a background thread
+    Each sample is the request's running stack when its task holds the event
+    loop, or the chain of awaits it is suspended in otherwise, so time spent
+    waiting on the LLM or the database shows up as well as CPU time. The
+    thread only runs while at least one request is being profiled.
+    """
+
+    def __init__(self, directory: str = ".profiles", interval_ms: float = 5.0, max_files: int = 200,
+                 max_age_seconds: int = 86400, max_concurrent: int = 4):
+        self.directory = directory
+        self.interval = interval_ms / 1000
+        self.max_files = max_files
+        self.max_age_seconds = max_age_seconds
+        self.max_concurrent = max_concurrent
+        self._active: Dict[int, Profile] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, root: FrameType) -> Optional[Profile]:
+        """
+        Start sampling the current task from `root` down; None when max_concurrent profiles are running
+        Call from the event loop, then set _current_profile so spawned tasks are sampled too
+        """
+        profile = Profile(root, asyncio.current_task(), threading.get_ident())
+        with self._lock:
+            if len(self._active) >= self.max_concurrent:
+                return None
+            if not self._active:
+                self._install_task_factory(asyncio.get_running_loop())
+            self._active[id(profile)] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+                self._thread.start()
+        return profile
+
+    def end(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.pop(id(profile), None)
+            if not self._active:
+                self._uninstall_task_factory(asyncio.get_running_loop())
+
+    def _install_task_factory(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Only while something is profiled, so task creation is untouched otherwise
+        previous = loop.get_task_factory()
+
+        def task_factory(loop, coro, **kwargs):
+            task = previous(loop, coro, **kwargs) if previous else asyncio.Task(coro, loop=loop, **kwargs)
+            context = kwargs.get("context")
+            profile = context.get(_current_profile) if context is not None else _current_profile.get()
+            if profile is not None:
+                profile.children.append(task)
+            return task
+
+        task_factory.previous = previous
+        loop.set_task_factory(task_factory)
+
+    def _uninstall_task_factory(self, loop: asyncio.AbstractEventLoop) -> None:
+        factory = loop.get_task_factory()
+        if factory is not None and hasattr(factory, "previous"):
+            loop.set_task_factory(factory.previous)
+
+    def _sample_loop(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                profiles = list(self._active.values())
+                if not profiles:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for profile in profiles:
+                try:
+                    profile.sample(frames.get(profile.thread_id))
+                except (AttributeError, RuntimeError, ValueError):
+                    continue  # The request moved on while we were walking it
+
+    def write(self, profile: Profile, filename: str) -> None:
+        """Save the collapsed stacks under `filename` and apply retention"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, filename), "w", encoding="utf-8") as f:
+            f.write(profile.collapsed())
+        self._apply_retention()
+
+    def _apply_retention(self) -> None:
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".collapsed"):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except OSError:
+                    continue
+        entries.sort(reverse=True)
+        cutoff = time.time() - self.max_age_seconds
+        for position, (modified, path) in enumerate(entries):
+            if position >= self.max_files or modified < cutoff:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests carrying a valid X-Profile header (see sign_profile_request)
+    plus a random `sample_rate` share of all requests. Profiled responses carry
+    an X-Profile-Id header naming the file written under the profile directory.
+    Requests that aren't profiled cost a header scan and, with sampling on, one random().
+    """
+
+    def __init__(self, app: ASGIApp, profiler: RequestProfiler, secret: Optional[str] = None,
+                 sample_rate: float = 0.0):
+        self.app = app
+        self.profiler = profiler
+        self.secret = secret
+        self.sample_rate = sample_rate
+
+    def _requested(self, scope: Scope) -> bool:
+        if self.secret:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER and verify_profile_request(self.secret, value.decode("latin-1")):
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = self.profiler.begin(sys._getframe())
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+        path = _UNSAFE.sub("_", scope["path"])[:80]
+        filename = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}{path}-{uuid.uuid4().hex[:8]}.collapsed"
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", filename.encode("latin-1"))]
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            self.profiler.end(profile)
+            await asyncio.to_thread(self.profiler.write, profile, filename)
@@ -0,0 +1,27 @@
+"""
+JSON response classes
+"""
+
+from typing import Any
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize like FastJSONResponse
+    datetimes, UUIDs, dataclasses and numpy values are encoded natively;
+    UTC datetimes end in "Z" as Pydantic writes them
+    """
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    The app's default response class (orjson instead of json.dumps)
+    Endpoints returning trusted rows can return one directly to skip
+    response_model validation and jsonable_encoder altogether.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,248 @@
+"""
+Access token revocation (logout)
+"""
+
+import asyncio
+import hashlib
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.requests import HTTPConnection
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.revoked_token import RevokedToken
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes even for timezone-aware columns
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings
+    Answers "definitely not present" or "maybe present"; sized for `capacity`
+    items at `error_rate` false positives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenRevocationList:
+    """
+    Revoked token ids, checked on every authenticated request
+    The Bloom filter answers the common case (token not revoked) in memory;
+    only "maybe revoked" ids are confirmed against the revoked_tokens table.
+    A background task pulls in revocations made by other workers and
+    periodically prunes rows past their token's `exp`, rebuilding the filter
+    from what is left (Bloom filters can't delete).
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        capacity: int = 100_000,
+        error_rate: float = 0.001,
+        sync_interval: float = 5.0,
+        prune_interval: float = 3600
+    ):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.prune_interval = prune_interval
+        self.bloom = BloomFilter(capacity, error_rate)
+        self._confirmed = TTLCache(max_entries=10_000, ttl_seconds=prune_interval)  # Known-revoked ids
+        self._watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.checks = 0
+        self.store_lookups = 0
+        self.false_positives = 0
+        self.revoked_hits = 0
+
+    async def is_revoked(self, jti: str, db: Optional[AsyncSession] = None) -> bool:
+        self.checks += 1
+        if jti not in self.bloom:
+            return False
+        if self._confirmed.get(jti):
+            self.revoked_hits += 1
+            return True
+
+        self.store_lookups += 1
+        if db is not None:
+            revoked = await db.get(RevokedToken, jti) is not None
+        else:
+            async with self.session_factory() as session:
+                revoked = await session.get(RevokedToken, jti) is not None
+        if revoked:
+            self.revoked_hits += 1
+            self._confirmed.set(jti, True)
+        else:
+            self.false_positives += 1
+        return revoked
+
+    async def revoke(self, jti: str, expires_at: datetime, db: AsyncSession) -> None:
+        """Persist a revocation and make it visible to this worker immediately"""
+        values = {"jti": jti, "expires_at": expires_at, "revoked_at": datetime.now(timezone.utc)}
+        connection = await db.connection()
+        statement = self._insert_statement(connection.dialect.name)
+        if statement is not None:
+            await connection.execute(statement, values)
+        elif await db.get(RevokedToken, jti) is None:
+            db.add(RevokedToken(**values))
+        await db.commit()
+        self._add(jti)
+        self._confirmed.set(jti, True)
+
+    @staticmethod
+    def _insert_statement(dialect: str):
+        # Logging out twice with the same token is not an error
+        if dialect == "postgresql":
+            return postgresql.insert(RevokedToken).on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        if dialect == "sqlite":
+            return sqlite.insert(RevokedToken).on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        return None
+
+    def _add(self, jti: str) -> None:
+        self.bloom.add(jti)
+        if self.bloom.count > self.bloom.capacity:
+            # Over capacity the false-positive rate climbs; the next sync rebuilds a bigger filter
+            self.capacity = self.bloom.count * 2
+
+    async def load(self) -> None:
+        """Rebuild the filter from every live revocation"""
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                select(RevokedToken.jti, RevokedToken.revoked_at).where(RevokedToken.expires_at > now)
+            )).all()
+        self.capacity = max(self.capacity, len(rows) * 2)
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        for row in rows:
+            bloom.add(row.jti)
+        self.bloom = bloom
+        self._watermark = max((_utc(row.revoked_at) for row in rows), default=now)
+
+    async def sync(self) -> None:
+        """Add revocations recorded by other workers since the last sync"""
+        if self.bloom.capacity < self.capacity:
+            await self.load()
+            return
+        # Overlap one interval so rows committed late (or by a worker with a lagging clock) aren't missed
+        since = self._watermark - timedelta(seconds=self.sync_interval)
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                select(RevokedToken.jti, RevokedToken.revoked_at).where(RevokedToken.revoked_at >= since)
+            )).all()
+        for row in rows:
+            if row.jti not in self.bloom:
+                self._add(row.jti)
+            self._watermark = max(self._watermark, _utc(row.revoked_at))
+
+    async def prune(self) -> int:
+        """Delete revocations whose tokens have expired anyway, then rebuild the filter"""
+        async with self.session_factory() as db:
+            result = await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.now(timezone.utc)))
+            await db.commit()
+        await self.load()
+        self._confirmed.clear()
+        return result.rowcount or 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="token-revocation")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        since_prune = 0.0
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            since_prune += self.sync_interval
+            try:
+                if since_prune >= self.prune_interval:
+                    since_prune = 0.0
+                    pruned = await self.prune()
+                    if pruned:
+                        print(f"🔑 Pruned {pruned} expired token revocations")
+                else:
+                    await self.sync()
+            except Exception as e:
+                print(f"⚠️ Token revocation sync failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "revoked_tokens": self.bloom.count,
+            "bloom_capacity": self.bloom.capacity,
+            "bloom_bits": self.bloom.size,
+            "checks": self.checks,
+            "store_lookups": self.store_lookups,
+            "false_positives": self.false_positives,
+            "revoked_hits": self.revoked_hits
+        }
+
+
+# Worker-wide revocation list, loaded and started by init_revocation() during startup
+revocation_list = TokenRevocationList(
+    capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_FALSE_POSITIVE_RATE,
+    sync_interval=settings.TOKEN_REVOCATION_SYNC_SECONDS,
+    prune_interval=settings.TOKEN_REVOCATION_PRUNE_SECONDS
+)
+
+
+async def init_revocation() -> TokenRevocationList:
+    """Load revoked tokens and start the sync / prune task"""
+    await revocation_list.prune()
+    revocation_list.start()
+    print(f"🔑 Token revocation list loaded ({revocation_list.bloom.count} revoked)")
+    return revocation_list
+
+
+async def close_revocation() -> None:
+    """Stop the sync / prune task"""
+    await revocation_list.stop()
+
+
+def get_revocation_list(connection: HTTPConnection) -> TokenRevocationList:
+    """
+    Revocation list dependency for FastAPI endpoints
+    Usage: revocations: TokenRevocationList = Depends(get_revocation_list)
+    """
+    return getattr(connection.app.state, "revocation", revocation_list)
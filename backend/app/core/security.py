@@ -2,17 +2,30 @@
 Security and authentication utilities
 """
 
+import asyncio
+import hmac
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar, Union
 from jose import jwt, JWTError
 from passlib.context import CryptContext
-from fastapi import HTTPException, status
+from fastapi import Header, HTTPException, status
+from starlette.requests import HTTPConnection
 
 from app.core.config import settings
 
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+T = TypeVar("T")
+
+
+# Password hashing context; hashes below BCRYPT_ROUNDS are flagged for re-hashing
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -25,6 +38,120 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasherBusy(Exception):
+    """Raised when too many password operations are already queued"""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Async bcrypt facade backed by a bounded thread pool
+    bcrypt takes ~100-300 ms of CPU per call; running it in worker threads
+    (bcrypt releases the GIL) keeps the event loop serving other requests.
+    At most `max_pending` operations may be queued or running - further
+    callers get PasswordHasherBusy straight away instead of piling up.
+    """
+
+    def __init__(self, context: CryptContext = pwd_context, workers: int = 4, max_pending: int = 64):
+        self.context = context
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._dummy_hash: Optional[str] = None
+
+        # Counters
+        self.completed = 0
+        self.failed = 0  # Raised inside bcrypt (e.g. a malformed stored hash)
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify, and return a new hash when the stored one uses an outdated cost factor"""
+        return await self._run(self.context.verify_and_update, plain_password, hashed_password)
+
+    async def verify_dummy(self, plain_password: str) -> bool:
+        """Spend the same time as a real check, for logins with an unknown email"""
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash("wellpal-dummy-password")
+        await self.verify(plain_password, self._dummy_hash)
+        return False
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        self.start()
+        self._pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._pending -= 1
+        self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
+
+
+# Worker-wide hasher, started by init_password_hasher() during startup
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+
+
+async def init_password_hasher() -> PasswordHasher:
+    """Start the password hashing pool"""
+    password_hasher.start()
+    print(f"🔐 Password hashing pool started ({password_hasher.workers} workers)")
+    return password_hasher
+
+
+async def close_password_hasher() -> None:
+    """Wait for in-flight password operations and stop the pool"""
+    password_hasher.shutdown()
+
+
+def get_password_hasher(connection: HTTPConnection) -> PasswordHasher:
+    """
+    Password hasher dependency for FastAPI endpoints
+    Usage: hasher: PasswordHasher = Depends(get_password_hasher)
+    """
+    return getattr(connection.app.state, "password_hasher", password_hasher)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -35,6 +162,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)  # Lets the token be revoked individually
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     
     return encoded_jwt
@@ -49,6 +177,17 @@ def verify_token(token: str) -> Union[dict, None]:
         return None
 
 
+def require_admin(x_admin_key: Optional[str] = Header(None)) -> None:
+    """
+    Guard for admin-only endpoints
+    Usage: dependencies=[Depends(require_admin)]
+    """
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin API is disabled")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin key")
+
+
 # Exception for authentication errors
 credentials_exception = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -4,5 +4,6 @@ Database Models Package
 
 from .user import User
 from .chat import ChatMessage
+from .revoked_token import RevokedToken
 
-__all__ = ["User", "ChatMessage"]
+__all__ = ["User", "ChatMessage", "RevokedToken"]
@@ -2,7 +2,8 @@
 Chat Message Model
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -13,6 +14,10 @@ class ChatMessage(Base):
     """Chat message model for AI conversations"""
     
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Serves per-user history pages in (created_at, id) order via keyset pagination
+        Index("ix_chat_messages_user_created_id", "user_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -21,7 +26,14 @@ class ChatMessage(Base):
     context = Column(Text, nullable=True)
     mood_analysis = Column(String(100), nullable=True)
     suggestions = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    companion_avatar = Column(String(100), nullable=True)
+    # Set client-side so every row carries the same sub-second precision used in pagination cursors
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False
+    )
     
     # Relationship with User
     user = relationship("User", backref="chat_messages")
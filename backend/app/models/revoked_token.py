@@ -0,0 +1,23 @@
+"""
+Revoked Token Model
+"""
+
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, DateTime
+
+from app.core.database import Base
+
+
+class RevokedToken(Base):
+    """Access tokens revoked before their expiry (e.g. by logout)"""
+    
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)  # Prunable after this
+    revoked_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True
+    )
@@ -11,6 +11,7 @@ class ChatMessageRequest(BaseModel):
     """Chat message request schema"""
     message: str
     context: Optional[str] = None
+    bypass_cache: bool = False  # Always generate a fresh response
 
 
 class ChatMessageResponse(BaseModel):
@@ -18,7 +19,32 @@ class ChatMessageResponse(BaseModel):
     response: str
     suggestions: List[str] = []
     mood_insights: Optional[Dict[str, Any]] = None
+    resources: List[Dict[str, Any]] = []  # Relevant support resources: title, url, type, score
     companion_avatar: str  # Random AI companion image
+    message_id: Optional[str] = None  # Key for GET /chat/enrichment/{message_id}
+    pending_enrichments: List[str] = []  # Stages still running; fetch them via the follow-up endpoint
+
+
+class ChatStreamTrailer(BaseModel):
+    """Final frame of a streamed chat response"""
+    suggestions: List[str] = []
+    mood_insights: Optional[Dict[str, Any]] = None
+    resources: List[Dict[str, Any]] = []
+    companion_avatar: str
+    ttfb_ms: float  # Time from request to first token
+    duration_ms: float
+    message_id: Optional[str] = None
+    pending_enrichments: List[str] = []
+
+
+class EnrichmentResponse(BaseModel):
+    """Enrichment results for one chat message"""
+    message_id: str
+    status: str  # "pending" or "complete"
+    results: Dict[str, Any] = {}
+    pending: List[str] = []
+    errors: Dict[str, str] = {}
+    timings_ms: Dict[str, float] = {}  # Per stage, plus "llm"
 
 
 class ChatHistoryMessage(BaseModel):
@@ -34,6 +60,7 @@ class ChatHistoryResponse(BaseModel):
     """Chat history response schema"""
     messages: List[ChatHistoryMessage]
     total: int
+    next_cursor: Optional[str] = None  # Pass back as `cursor` to fetch older messages
 
 
 class WellnessInsight(BaseModel):
@@ -2,211 +2,534 @@
 AI Chat Service using LangChain and Google Gemini
 """
 
+import base64
+import json
 import random
-from typing import List, Dict, Any, Optional
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from langchain_core.prompts import ChatPromptTemplate
-from sqlalchemy.orm import Session
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.schemas.chat import ChatMessageResponse, WellnessInsight
+from app.core.llm import LLMRegistry, PROMPT_VERSION
+from app.core.llm_providers import LLMProvider
+from app.core.llm_dispatcher import LLMQueueFull
+from app.core.llm_guard import CircuitOpen, LLMDeadlineExceeded
+from app.core.metrics import CHAT_FALLBACKS, LLM_CACHE_REQUESTS, LLM_REQUEST_DURATION, LLM_TOKENS
+from app.models.chat import ChatMessage
+from app.schemas.chat import ChatMessageResponse, ChatStreamTrailer, WellnessInsight
+from app.services.chat_context import (
+    ConversationContext, ConversationContextBuilder, Turn, conversation_context, estimate_tokens, timestamp_us
+)
+from app.services.chat_writer import ChatWriteQueue
+from app.services.conversation_cache import ConversationCache, conversation_cache
+from app.services.enrichment import EnrichmentInput, EnrichmentPipeline, EnrichmentRun, EnrichmentStage, enrichment_pipeline
+from app.services.mood_lexicon import analyze_mood, route_suggestion_topic
+from app.services.resource_index import ResourceRecommender, resource_recommender
+
+
+# Available AI companion avatars
+COMPANION_AVATARS = [
+    "ai-companion-1.png",
+    "ai-companion-2.png", 
+    "ai-companion-3.png"
+]
+
+# Served when the LLM call fails
+FALLBACK_RESPONSE = "I'm here to listen and support you. Could you tell me a bit more about what you're going through?"
+FALLBACK_SUGGESTIONS = [
+    "Take a few deep breaths",
+    "Try a short walk outside",
+    "Consider talking to a counselor"
+]
+
+# Context-aware suggestions, keyed by suggestion topic (see mood_lexicon.SUGGESTION_LEXICON)
+SUGGESTIONS = {
+    "stress": [
+        "Try the 4-7-8 breathing technique",
+        "Take a 10-minute break from studying",
+        "Listen to calming music",
+        "Practice progressive muscle relaxation"
+    ],
+    "study": [
+        "Break study sessions into 25-minute chunks",
+        "Create a study schedule",
+        "Find a study group",
+        "Visit the academic support center"
+    ],
+    "sleep": [
+        "Establish a consistent bedtime routine",
+        "Limit screen time before bed",
+        "Try meditation before sleep",
+        "Keep your room cool and dark"
+    ],
+    "lonely": [
+        "Join a campus club or organization",
+        "Reach out to a friend or family member",
+        "Attend campus social events",
+        "Consider peer support groups"
+    ]
+}
+
+# General wellness suggestions
+GENERAL_SUGGESTIONS = [
+    "Take a few deep breaths",
+    "Go for a short walk outside",
+    "Practice mindfulness for 5 minutes",
+    "Write in a journal"
+]
+
+
+def get_random_companion_avatar() -> str:
+    """Get a random companion avatar"""
+    return random.choice(COMPANION_AVATARS)
+
+
+def reported_token_usage(message: Any) -> Optional[Tuple[int, int]]:
+    """(prompt, completion) tokens the model reported on a message or chunk, if any"""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return int(usage.get("input_tokens", 0)), int(usage.get("output_tokens", 0))
+    usage = (getattr(message, "response_metadata", None) or {}).get("usage_metadata")
+    if usage:
+        return int(usage.get("prompt_token_count", 0)), int(usage.get("candidates_token_count", 0))
+    return None
+
+
+def record_token_usage(prompt: str, completion: str, usage: Optional[Tuple[int, int]]) -> None:
+    """Count tokens, estimating ~4 characters per token when the model didn't report usage"""
+    prompt_tokens, completion_tokens = usage or (estimate_tokens(prompt), estimate_tokens(completion))
+    LLM_TOKENS.labels("prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels("completion").inc(completion_tokens)
+
+
+def fallback_reason(error: Exception) -> str:
+    """Label for CHAT_FALLBACKS"""
+    if isinstance(error, CircuitOpen):
+        return "circuit_open"
+    if isinstance(error, LLMDeadlineExceeded):
+        return "deadline"
+    return "error"
+
+
+def encode_history_cursor(created_at: datetime, message_id: int) -> str:
+    """Opaque keyset cursor pointing just past (created_at, id)"""
+    raw = f"{created_at.isoformat()}|{message_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Parse a cursor produced by encode_history_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, message_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid history cursor")
 
 
 class AIChatService:
     """AI Chat Service for mental wellness support"""
     
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: AsyncSession,
+        llm: LLMRegistry,
+        writer: Optional[ChatWriteQueue] = None,
+        enrichment: Optional[EnrichmentPipeline] = None,
+        resources: Optional[ResourceRecommender] = None,
+        context_builder: Optional[ConversationContextBuilder] = None,
+        conversations: Optional[ConversationCache] = None
+    ):
         self.db = db
+        self.writer = writer
+        self.enrichment = enrichment or enrichment_pipeline
+        self.resources = resources or resource_recommender
+        self.context_builder = context_builder or conversation_context
+        self.conversations = conversations if conversations is not None else conversation_cache
         
-        # Initialize Gemini model
-        if not settings.GOOGLE_API_KEY:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
-            
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash-lite",
-            google_api_key=settings.GOOGLE_API_KEY,
-            temperature=0.7,
-            max_tokens=1000
-        )
+        # The provider (Gemini prompt chain or the local fake) is built once by the app-scoped registry
+        self.llm = llm
+        self.chain: Optional[LLMProvider] = llm.chain
+        self.response_cache = llm.response_cache
+        self.dispatcher = llm.dispatcher
+        self.single_flight = llm.single_flight
+        self.guard = llm.guard
         
         # Available AI companion avatars
-        self.companion_avatars = [
-            "ai-companion-1.png",
-            "ai-companion-2.png", 
-            "ai-companion-3.png"
-        ]
+        self.companion_avatars = COMPANION_AVATARS
         
-        # System prompt for wellness companion
-        self.system_prompt = """You are a gentle and empathetic wellness companion for university students — more like a caring friend than a robot.  
-
-        Your role is to:  
-        1. Listen with warmth, patience, and genuine empathy to whatever the student shares.  
-        2. Respond with comforting words that provide emotional support and reassurance.  
-        3. Offer thoughtful, practical suggestions that can help with stress, sleep, study-life balance, and emotional wellbeing.  
-        4. Recognize when the situation might require professional support, and gently encourage seeking help.  
-        5. Always keep the conversation natural, encouraging, and relatable — never cold or mechanical.  
-        6. Respect each student’s background and individuality, being culturally sensitive and inclusive.  
-
-        Guidelines:  
-        - Keep responses warm, concise, and meaningful (2–4 sentences usually).  
-        - Prioritize emotional connection over formality — speak like a trusted confidant.  
-        - Never give medical advice or diagnoses.  
-        - When offering tips, make them specific, gentle, and actionable.  
-        - Remember: You are here to bring comfort, encouragement, and perspective — not to replace professional care.  
-        """
+        # Enrichment stages; none of them needs the LLM reply yet, so they all
+        # run while the model is generating
+        self.enrichment_stages = [
+            EnrichmentStage("mood_insights", lambda data: self._analyze_mood(data.message)),
+            EnrichmentStage("suggestions", lambda data: self._generate_suggestions(data.message, data.response)),
+            EnrichmentStage("resources", lambda data: self._recommend_resources(data.message, data.context))
+        ]
+
+    def require_llm(self) -> None:
+        """Raise if no LLM client is configured (history endpoints work without one)"""
+        if not self.llm.is_configured:
+            raise ValueError("GOOGLE_API_KEY not found in environment variables (or set LLM_PROVIDER=fake)")
 
-    async def send_message(self, message: str, context: Optional[str] = None) -> ChatMessageResponse:
-        """Send message to AI and get response"""
+    async def send_message(
+        self,
+        message: str,
+        context: Optional[str] = None,
+        bypass_cache: bool = False,
+        user_id: Optional[int] = None
+    ) -> ChatMessageResponse:
+        """
+        Send message to AI and get response, storing the turn when user_id is given
+        Identical requests from the same user that arrive while one is already
+        being answered (retries, double taps) share that answer and its turn.
+        bypass_cache is part of that identity, so a request asking for a fresh
+        reply never receives one that came from the cache
+        """
         
+        self.require_llm()
+        return await self.single_flight.do(
+            (user_id, message, context, bypass_cache),
+            lambda: self._send_message(message, context, bypass_cache, user_id)
+        )
+
+    async def _send_message(
+        self,
+        message: str,
+        context: Optional[str],
+        bypass_cache: bool,
+        user_id: Optional[int]
+    ) -> ChatMessageResponse:
+        # Mood analysis and suggestions start now, concurrently with the LLM call
+        run = self.enrichment.begin(uuid.uuid4().hex, EnrichmentInput(message, context), self.enrichment_stages,
+                                   user_id)
+        history: Optional[ConversationContext] = None
         try:
-            # Create the prompt
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", self.system_prompt),
-                ("human", "{user_message}")
-            ])
+            history = await self._build_context(run, user_id, message, context)
+            # Serve a cached variant for repeated prompts, otherwise generate
+            llm_started = time.perf_counter()
+            cache_key = self._cache_key(message, context, bypass_cache, history)
+            response_text = self.response_cache.get(cache_key) if cache_key else None
+            if cache_key:
+                LLM_CACHE_REQUESTS.labels("miss" if response_text is None else "hit").inc()
+            if response_text is None:
+                # With the circuit open, fall back now instead of queueing for a slot
+                self.guard.check()
+                prompt = self._format_message(message, context, history)
+                async with self.dispatcher.slot(user_id):
+                    upstream_started = time.perf_counter()
+                    response = await self.guard.invoke(self.chain, {"user_message": prompt})
+                    LLM_REQUEST_DURATION.labels("message").observe(time.perf_counter() - upstream_started)
+                response_text = response.content
+                record_token_usage(prompt, response_text, reported_token_usage(response))
+                if cache_key:
+                    self.response_cache.add(cache_key, response_text)
+            run.record_timing("llm", (time.perf_counter() - llm_started) * 1000)
             
-            # Add context if provided
-            if context:
-                formatted_message = f"Context: {context}\n\nUser message: {message}"
-            else:
-                formatted_message = message
-            
-            # Generate response
-            chain = prompt | self.llm
-            response = await chain.ainvoke({"user_message": formatted_message})
-            
-            # Extract mood insights and suggestions
-            mood_insights = await self._analyze_mood(message)
-            suggestions = await self._generate_suggestions(message, response.content)
+            # Stages that overrun the inline budget finish in the background
+            run.set_response(response_text)
+            enrichments = await run.collect()
             
             # Select random companion avatar
             companion_avatar = random.choice(self.companion_avatars)
             
-            return ChatMessageResponse(
-                response=response.content,
-                suggestions=suggestions,
-                mood_insights=mood_insights,
-                companion_avatar=companion_avatar
+            chat_response = ChatMessageResponse(
+                response=response_text,
+                suggestions=enrichments.get("suggestions") or [],
+                mood_insights=enrichments.get("mood_insights"),
+                resources=enrichments.get("resources") or [],
+                companion_avatar=companion_avatar,
+                message_id=run.message_id,
+                pending_enrichments=list(run.record.pending)
             )
             
+        except LLMQueueFull:
+            # Overloaded - let the caller answer 429 rather than serve the fallback
+            await run.collect(budget=0)
+            raise
         except Exception as e:
-            # Fallback response if AI fails
-            return ChatMessageResponse(
-                response="I'm here to listen and support you. Could you tell me a bit more about what you're going through?",
-                suggestions=[
-                    "Take a few deep breaths",
-                    "Try a short walk outside",
-                    "Consider talking to a counselor"
-                ],
-                companion_avatar=random.choice(self.companion_avatars)
+            # Fallback response if AI fails, times out or the circuit is open
+            CHAT_FALLBACKS.labels("message", fallback_reason(e)).inc()
+            await run.collect(budget=0)
+            chat_response = ChatMessageResponse(
+                response=FALLBACK_RESPONSE,
+                suggestions=list(FALLBACK_SUGGESTIONS),
+                companion_avatar=random.choice(self.companion_avatars),
+                message_id=run.message_id
             )
-
-    async def _analyze_mood(self, message: str) -> Dict[str, Any]:
-        """Analyze mood from user message"""
         
-        # Simple keyword-based mood analysis (can be enhanced with more sophisticated NLP)
-        mood_keywords = {
-            "anxious": ["anxious", "worried", "nervous", "panic", "fear"],
-            "stressed": ["stressed", "overwhelmed", "pressure", "exam", "deadline"],
-            "sad": ["sad", "depressed", "down", "lonely", "empty"],
-            "angry": ["angry", "frustrated", "annoyed", "mad", "upset"],
-            "happy": ["happy", "good", "great", "excited", "joy"],
-            "tired": ["tired", "exhausted", "sleepy", "fatigue", "worn out"],
-            "confused": ["confused", "lost", "uncertain", "unclear", "don't know"]
-        }
+        if user_id is not None:
+            await self._save_turn(user_id, message, context, chat_response, history)
+        return chat_response
+
+    async def stream_message(
+        self,
+        message: str,
+        context: Optional[str] = None,
+        bypass_cache: bool = False,
+        user_id: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream AI response tokens as they are generated
+        Yields {"type": "token", "content": ...} events followed by a single
+        {"type": "done", ...} trailer with mood insights and suggestions
+        Call require_llm() before starting to stream
+        If no LLM slot is available, yields a single {"type": "error", ...}
+        event with `retry_after` instead
+        """
         
-        message_lower = message.lower()
-        detected_emotions = []
+        started = time.perf_counter()
+        ttfb_ms: Optional[float] = None
+        chunks: List[str] = []
+        run = self.enrichment.begin(uuid.uuid4().hex, EnrichmentInput(message, context), self.enrichment_stages,
+                                   user_id)
+        history: Optional[ConversationContext] = None
         
-        for emotion, keywords in mood_keywords.items():
-            if any(keyword in message_lower for keyword in keywords):
-                detected_emotions.append(emotion)
+        try:
+            history = await self._build_context(run, user_id, message, context)
+            cache_key = self._cache_key(message, context, bypass_cache, history)
+            cached_text = self.response_cache.get(cache_key) if cache_key else None
+            if cache_key:
+                LLM_CACHE_REQUESTS.labels("miss" if cached_text is None else "hit").inc()
+            if cached_text is not None:
+                ttfb_ms = (time.perf_counter() - started) * 1000
+                chunks.append(cached_text)
+                yield {"type": "token", "content": cached_text}
+            else:
+                self.guard.check()
+                prompt = self._format_message(message, context, history)
+                usage: Optional[Tuple[int, int]] = None
+                async with self.dispatcher.slot(user_id):
+                    upstream_started = time.perf_counter()
+                    async for chunk in self.guard.stream(self.chain, {"user_message": prompt}):
+                        chunk_usage = reported_token_usage(chunk)
+                        if chunk_usage:
+                            # Chunk usage adds up, as when LangChain merges chunks
+                            usage = (usage[0] + chunk_usage[0], usage[1] + chunk_usage[1]) if usage else chunk_usage
+                        if not chunk.content:
+                            continue
+                        if ttfb_ms is None:
+                            ttfb_ms = (time.perf_counter() - started) * 1000
+                        chunks.append(chunk.content)
+                        yield {"type": "token", "content": chunk.content}
+                    LLM_REQUEST_DURATION.labels("stream").observe(time.perf_counter() - upstream_started)
+                record_token_usage(prompt, "".join(chunks), usage)
+                if cache_key and chunks:
+                    self.response_cache.add(cache_key, "".join(chunks))
+            run.record_timing("llm", (time.perf_counter() - started) * 1000)
+            
+            run.set_response("".join(chunks))
+            enrichments = await run.collect()
+            mood_insights = enrichments.get("mood_insights")
+            suggestions = enrichments.get("suggestions") or []
+            resources = enrichments.get("resources") or []
+            
+        except LLMQueueFull as e:
+            await run.collect(budget=0)
+            yield {"type": "error", "detail": f"AI service busy: {str(e)}", "retry_after": e.retry_after}
+            return
+        except Exception as e:
+            CHAT_FALLBACKS.labels("stream", fallback_reason(e)).inc()
+            # Nothing has reached the client yet - serve the fallback instead
+            if ttfb_ms is None:
+                ttfb_ms = (time.perf_counter() - started) * 1000
+                chunks.append(FALLBACK_RESPONSE)
+                yield {"type": "token", "content": FALLBACK_RESPONSE}
+            await run.collect(budget=0)
+            mood_insights = None
+            suggestions = list(FALLBACK_SUGGESTIONS)
+            resources = []
         
-        primary_emotion = detected_emotions[0] if detected_emotions else "neutral"
-        confidence = 0.8 if detected_emotions else 0.5
+        trailer = ChatStreamTrailer(
+            suggestions=suggestions,
+            mood_insights=mood_insights,
+            resources=resources,
+            companion_avatar=random.choice(self.companion_avatars),
+            ttfb_ms=round(ttfb_ms or 0.0, 2),
+            duration_ms=round((time.perf_counter() - started) * 1000, 2),
+            message_id=run.message_id,
+            pending_enrichments=list(run.record.pending)
+        )
+        if user_id is not None:
+            await self._save_turn(user_id, message, context, ChatMessageResponse(
+                response="".join(chunks),
+                suggestions=trailer.suggestions,
+                mood_insights=trailer.mood_insights,
+                companion_avatar=trailer.companion_avatar
+            ), history)
+        yield {"type": "done", **trailer.model_dump()}
+
+    async def _build_context(self, run: EnrichmentRun, user_id: Optional[int], message: str,
+                             context: Optional[str]) -> Optional[ConversationContext]:
+        """Recent turns and rolling summary for the prompt; None for anonymous calls or when disabled"""
+        if user_id is None or not settings.CHAT_CONTEXT_ENABLED:
+            return None
+        started = time.perf_counter()
+        history = await self.context_builder.build(self.db, user_id, message, context, self.conversations)
+        run.record_timing("context", (time.perf_counter() - started) * 1000)
+        return history
+
+    def _cache_key(self, message: str, context: Optional[str], bypass_cache: bool,
+                   history: Optional[ConversationContext] = None) -> Optional[str]:
+        """
+        Response cache key, or None when caching is disabled or bypassed
+        Replies written with a conversation in the prompt are keyed on that
+        conversation too, so they are only reused for the same message at the
+        same point of an identical conversation; openers share one key
+        """
+        if bypass_cache or self.response_cache is None:
+            return None
+        conversation = history.render() if history is not None and not history.is_empty else None
+        return self.response_cache.make_key(PROMPT_VERSION, message, context, conversation)
+
+    def _format_message(self, message: str, context: Optional[str] = None,
+                        history: Optional[ConversationContext] = None) -> str:
+        """Add the conversation so far and any client context to the user message"""
+        sections = []
+        if history is not None and not history.is_empty:
+            sections.append(history.render())
+        if context:
+            sections.append(f"Context: {context}")
+        if sections:
+            return "\n\n".join(sections) + f"\n\nUser message: {message}"
+        return message
+
+    async def _analyze_mood(self, message: str) -> Dict[str, Any]:
+        """Analyze mood from user message"""
         
-        return {
-            "detected_emotion": primary_emotion,
-            "confidence": confidence,
-            "all_emotions": detected_emotions
-        }
+        # Keyword-based mood analysis using the lexicon compiled at import
+        return analyze_mood(message)
 
-    async def _generate_suggestions(self, user_message: str, ai_response: str) -> List[str]:
+    async def _generate_suggestions(self, user_message: str, ai_response: Optional[str] = None) -> List[str]:
         """Generate contextual suggestions based on conversation"""
         
-        message_lower = user_message.lower()
-        suggestions = []
-        
-        # Context-aware suggestions
-        if any(word in message_lower for word in ["stress", "stressed", "overwhelmed"]):
-            suggestions = [
-                "Try the 4-7-8 breathing technique",
-                "Take a 10-minute break from studying",
-                "Listen to calming music",
-                "Practice progressive muscle relaxation"
-            ]
-        elif any(word in message_lower for word in ["exam", "test", "study"]):
-            suggestions = [
-                "Break study sessions into 25-minute chunks",
-                "Create a study schedule",
-                "Find a study group",
-                "Visit the academic support center"
-            ]
-        elif any(word in message_lower for word in ["sleep", "tired", "exhausted"]):
-            suggestions = [
-                "Establish a consistent bedtime routine",
-                "Limit screen time before bed",
-                "Try meditation before sleep",
-                "Keep your room cool and dark"
-            ]
-        elif any(word in message_lower for word in ["lonely", "alone", "isolated"]):
-            suggestions = [
-                "Join a campus club or organization",
-                "Reach out to a friend or family member",
-                "Attend campus social events",
-                "Consider peer support groups"
-            ]
-        else:
-            # General wellness suggestions
-            suggestions = [
-                "Take a few deep breaths",
-                "Go for a short walk outside",
-                "Practice mindfulness for 5 minutes",
-                "Write in a journal"
-            ]
+        topic = route_suggestion_topic(user_message)
+        suggestions = SUGGESTIONS.get(topic, GENERAL_SUGGESTIONS)
         
         # Return random 3-4 suggestions
         return random.sample(suggestions, min(3, len(suggestions)))
 
-    async def get_chat_history(self, user_id: int, limit: int = 20) -> List[Dict]:
-        """Get user's chat history (placeholder for now)"""
+    async def _recommend_resources(self, user_message: str, context: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Support resources most similar to the message (local vector index, no network)"""
+        return self.resources.recommend(f"{context} {user_message}" if context else user_message)
+
+    async def get_chat_history(
+        self,
+        user_id: int,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Get one page of the user's chat history, oldest message first
+        Uses keyset pagination on (created_at, id) so every page is an index
+        range scan regardless of how deep into the history it is.
+        Returns the messages and a cursor for the next (older) page.
+        """
+        
+        limit = max(1, min(limit, settings.CHAT_HISTORY_MAX_PAGE_SIZE))
+        query = (
+            select(
+                ChatMessage.id,
+                ChatMessage.message,
+                ChatMessage.response,
+                ChatMessage.companion_avatar,
+                ChatMessage.created_at
+            )
+            .where(ChatMessage.user_id == user_id)
+            .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+            .limit(limit + 1)
+        )
+        if cursor:
+            created_at, message_id = decode_history_cursor(cursor)
+            query = query.where(tuple_(ChatMessage.created_at, ChatMessage.id) < (created_at, message_id))
+        
+        rows = (await self.db.execute(query)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_history_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
         
-        # TODO: Implement database storage for chat history
-        # For now, return mock data
-        return [
-            {
-                "id": 1,
-                "content": "I'm feeling stressed about my upcoming exams",
+        # Each stored turn becomes a user message followed by the assistant reply
+        messages = []
+        for row in reversed(rows):
+            messages.append({
+                "id": row.id * 2 - 1,
+                "content": row.message,
                 "sender": "user",
-                "timestamp": "2024-01-01T10:00:00Z",
+                "timestamp": row.created_at,
                 "companion_avatar": None
-            },
-            {
-                "id": 2,
-                "content": "I understand that exam stress can be overwhelming. It's completely normal to feel this way. Have you tried breaking your study sessions into smaller, manageable chunks?",
+            })
+            messages.append({
+                "id": row.id * 2,
+                "content": row.response,
                 "sender": "assistant",
-                "timestamp": "2024-01-01T10:00:05Z",
-                "companion_avatar": "ai-companion-1.png"
-            }
-        ]
+                "timestamp": row.created_at,
+                "companion_avatar": row.companion_avatar
+            })
+        return messages, next_cursor
 
     async def clear_chat_history(self, user_id: int) -> bool:
-        """Clear user's chat history"""
+        """
+        Clear user's chat history
+        Deletes in bounded chunks, committing between them, so purging a long
+        history never holds one large lock on chat_messages. Turns still in
+        the write-behind queue are written first, so they are purged too
+        instead of reappearing after the next flush
+        """
         
-        # TODO: Implement database deletion
+        if self.writer is not None:
+            await self.writer.flush_user(user_id)
+        chunk_size = settings.CHAT_HISTORY_DELETE_CHUNK_SIZE
+        while True:
+            ids = (await self.db.execute(
+                select(ChatMessage.id)
+                .where(ChatMessage.user_id == user_id)
+                .order_by(ChatMessage.id)
+                .limit(chunk_size)
+            )).scalars().all()
+            if not ids:
+                break
+            await self.db.execute(delete(ChatMessage).where(ChatMessage.id.in_(ids)))
+            await self.db.commit()
+        self.conversations.invalidate(user_id)
         return True
 
-    def get_random_companion_avatar(self) -> str:
-        """Get a random companion avatar"""
-        return random.choice(self.companion_avatars)
\ No newline at end of file
+    async def _save_turn(
+        self,
+        user_id: int,
+        message: str,
+        context: Optional[str],
+        chat_response: ChatMessageResponse,
+        history: Optional[ConversationContext] = None
+    ) -> None:
+        """
+        Persist one user message and the assistant reply
+        With a conversation context, the context column holds its rolling
+        summary (and the client context) for the next message to build on,
+        and the turn is written through to the conversation cache.
+        Goes through the write-behind queue when available so the request
+        doesn't wait on a commit
+        """
+        mood_insights = chat_response.mood_insights or {}
+        row = {
+            "user_id": user_id,
+            "message": message,
+            "response": chat_response.response,
+            "context": history.summary.dump(context) if history is not None else context,
+            "mood_analysis": mood_insights.get("detected_emotion"),
+            "suggestions": json.dumps(chat_response.suggestions),
+            "companion_avatar": chat_response.companion_avatar,
+            # Set here so the cached turn and the stored row agree on it
+            "created_at": datetime.now(timezone.utc)
+        }
+        if self.writer is not None:
+            await self.writer.enqueue(row)
+        else:
+            await self.db.execute(insert(ChatMessage), [row])
+            await self.db.commit()
+        if history is not None:
+            self.conversations.append(user_id, Turn(timestamp_us(row["created_at"]), message, row["response"], row["context"]))
+        else:
+            # Saved without building a context, so the cached window would miss this turn
+            self.conversations.invalidate(user_id)
@@ -2,71 +2,75 @@
 Authentication service
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from datetime import timedelta
+from typing import Optional
 
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.config import settings
+from app.core.security import PasswordHasher, create_access_token, password_hasher
 from app.schemas.auth import LoginRequest, RegisterRequest, TokenResponse
+from app.schemas.user import UserCreate
+from app.services.user_service import UserService
 
 
 class AuthService:
     """Authentication service class"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession, hasher: Optional[PasswordHasher] = None):
         self.db = db
+        self.hasher = hasher or password_hasher
+        self.users = UserService(db, self.hasher)
     
     async def login(self, login_data: LoginRequest) -> TokenResponse:
         """
         Authenticate user and return access token
+        Password checks run on the hashing pool, never on the event loop
         """
-        # TODO: Implement user authentication
-        # 1. Find user by email
-        # 2. Verify password
-        # 3. Create access token
-        # 4. Return token response
+        user = await self.users.get_user_record_by_email(login_data.email)
+        if user is None:
+            # Same bcrypt cost as a real check so response time doesn't reveal unknown emails
+            await self.hasher.verify_dummy(login_data.password)
+            raise self._invalid_credentials()
         
-        # Placeholder implementation
-        if login_data.email == "test@example.com" and login_data.password == "password":
-            access_token = create_access_token(
-                data={"sub": login_data.email, "user_id": 1}
-            )
-            return TokenResponse(
-                access_token=access_token,
-                token_type="bearer",
-                expires_in=1800  # 30 minutes
-            )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect email or password"
-            )
+        valid, new_hash = await self.hasher.verify_and_update(login_data.password, user.hashed_password)
+        if not valid or not user.is_active:
+            raise self._invalid_credentials()
+        if new_hash:
+            # Stored hash predates the current BCRYPT_ROUNDS
+            await self.users.update_password_hash(user.id, new_hash)
+        
+        return self._token_for(user.email, user.id)
     
     async def register(self, register_data: RegisterRequest) -> TokenResponse:
         """
         Register new user and return access token
         """
-        # TODO: Implement user registration
-        # 1. Check if user already exists
-        # 2. Hash password
-        # 3. Create user record
-        # 4. Create access token
-        # 5. Return token response
-        
-        # Placeholder implementation
         if register_data.password != register_data.confirm_password:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Passwords do not match"
             )
         
-        # Create access token
+        user = await self.users.create_user(UserCreate(
+            email=register_data.email,
+            name=register_data.name,
+            password=register_data.password
+        ))
+        return self._token_for(user.email, user.id)
+    
+    def _token_for(self, email: str, user_id: int) -> TokenResponse:
         access_token = create_access_token(
-            data={"sub": register_data.email, "user_id": 1}
+            data={"sub": email, "user_id": user_id}
         )
-        
         return TokenResponse(
             access_token=access_token,
             token_type="bearer",
-            expires_in=1800  # 30 minutes
+            expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        )
+    
+    @staticmethod
+    def _invalid_credentials() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password"
         )
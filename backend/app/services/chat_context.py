@@ -0,0 +1,208 @@
+"""
+Conversation context for chat prompts: recent turns under a token budget plus a rolling summary
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Sequence
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.chat import ChatMessage
+from app.services.mood_lexicon import analyze_mood
+
+if TYPE_CHECKING:
+    from app.services.conversation_cache import ConversationCache
+
+
+SUMMARY_VERSION = 2
+_WHITESPACE = re.compile(r"\s+")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = datetime.resolution
+
+
+class Turn(NamedTuple):
+    """One stored chat turn, as the builder and the conversation cache hold it"""
+    created_us: int  # created_at in microseconds since the epoch; identifies the turn within a user's history
+    message: str
+    response: str
+    context: Optional[str]
+
+
+def timestamp_us(created_at: datetime) -> int:
+    """Exact microseconds since the epoch (naive datetimes, as SQLite returns them, are UTC)"""
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return (created_at - _EPOCH) // _MICROSECOND
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token count, about 4 characters per token"""
+    return len(text) // 4 + 1 if text else 0
+
+
+def _note(message: str, max_chars: int) -> str:
+    text = _WHITESPACE.sub(" ", message).strip()
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "…"
+
+
+@dataclass
+class ConversationSummary:
+    """
+    Rolling summary of the turns that no longer fit in the prompt
+    Stored as JSON in ChatMessage.context on every saved turn, so the next
+    message only has to fold in the turns that dropped out since. Contexts
+    saved before summaries existed (free text) read as an empty summary.
+    """
+    through: int = 0  # created_us of the newest turn folded in
+    turns: int = 0
+    emotions: Dict[str, int] = field(default_factory=dict)
+    notes: List[str] = field(default_factory=list)  # What the student said, oldest first, most recent kept
+
+    @classmethod
+    def load(cls, stored: Optional[str]) -> "ConversationSummary":
+        if not stored or not stored.startswith("{"):
+            return cls()
+        try:
+            data = json.loads(stored)
+        except ValueError:
+            return cls()
+        if not isinstance(data, dict) or data.get("v") != SUMMARY_VERSION:
+            return cls()
+        return cls(
+            through=int(data.get("through", 0)),
+            turns=int(data.get("turns", 0)),
+            emotions={str(k): int(v) for k, v in (data.get("emotions") or {}).items()},
+            notes=[str(note) for note in data.get("notes") or []]
+        )
+
+    def dump(self, request_context: Optional[str] = None) -> str:
+        """JSON for ChatMessage.context; keeps the client-supplied context of the turn alongside"""
+        return json.dumps({
+            "v": SUMMARY_VERSION,
+            "through": self.through,
+            "turns": self.turns,
+            "emotions": self.emotions,
+            "notes": self.notes,
+            "request_context": request_context
+        })
+
+    def fold(self, turn: Turn, max_notes: int, note_chars: int) -> None:
+        """Add one turn that dropped out of the prompt"""
+        emotion = analyze_mood(turn.message)["detected_emotion"]
+        if emotion != "neutral":
+            self.emotions[emotion] = self.emotions.get(emotion, 0) + 1
+        self.notes.append(_note(turn.message, note_chars))
+        del self.notes[:-max_notes]
+        self.turns += 1
+        self.through = max(self.through, turn.created_us)
+
+    def render(self) -> str:
+        if not self.turns:
+            return ""
+        parts = [f"{self.turns} earlier messages"]
+        if self.emotions:
+            ranked = sorted(self.emotions.items(), key=lambda item: (-item[1], item[0]))[:4]
+            parts.append("feelings mentioned: " + ", ".join(f"{emotion} ({count})" for emotion, count in ranked))
+        if self.notes:
+            parts.append("most recently the student said: " + "; ".join(f'"{note}"' for note in self.notes))
+        return "; ".join(parts) + "."
+
+
+@dataclass
+class ConversationContext:
+    """What goes into the prompt ahead of the new message"""
+    summary: ConversationSummary = field(default_factory=ConversationSummary)
+    turns: List[Turn] = field(default_factory=list)  # Oldest first
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.turns and not self.summary.turns
+
+    def render(self) -> str:
+        lines = []
+        summary = self.summary.render()
+        if summary:
+            lines.append(f"Summary of the earlier conversation: {summary}")
+        if self.turns:
+            lines.append("Recent conversation:")
+            for turn in self.turns:
+                lines.append(f"Student: {turn.message}")
+                lines.append(f"WellPal: {turn.response}")
+        return "\n".join(lines)
+
+
+class ConversationContextBuilder:
+    """
+    Assembles the prompt context for a user's next message
+    The newest turns are included verbatim while they fit in `token_budget`
+    (after the new message and room for the summary); older ones are folded
+    into the rolling summary. Only the last `max_turns` rows are ever read,
+    so prompt size and query cost stay flat however long the conversation runs.
+    """
+
+    def __init__(self, token_budget: int = 1500, max_turns: int = 12, summary_notes: int = 6,
+                 note_chars: int = 160):
+        self.token_budget = token_budget
+        self.max_turns = max(2, max_turns)
+        self.summary_notes = summary_notes
+        self.note_chars = note_chars
+        # Upper bound on the rendered summary, set aside before placing turns
+        self.summary_reserve = summary_notes * (estimate_tokens("x" * note_chars) + 2) + 32
+
+    async def build(self, db: AsyncSession, user_id: int, message: str, request_context: Optional[str] = None,
+                    cache: Optional["ConversationCache"] = None) -> ConversationContext:
+        """Context for `message`, reading recent turns from `cache` when it holds the user's window"""
+        turns = cache.get(user_id) if cache is not None else None
+        if turns is None:
+            invalidations = cache.invalidations if cache is not None else 0
+            turns = await self.load_turns(db, user_id)
+            if cache is not None:
+                cache.fill(user_id, turns, invalidations)
+        summary = ConversationSummary.load(turns[0].context) if turns else ConversationSummary()
+        return self.assemble(summary, [turn for turn in turns if turn.created_us > summary.through],
+                             message, request_context)
+
+    async def load_turns(self, db: AsyncSession, user_id: int) -> List[Turn]:
+        """The user's last max_turns turns, newest first"""
+        rows = (await db.execute(
+            select(ChatMessage.created_at, ChatMessage.message, ChatMessage.response, ChatMessage.context)
+            .where(ChatMessage.user_id == user_id)
+            .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+            .limit(self.max_turns)
+        )).all()
+        return [Turn(timestamp_us(row.created_at), row.message, row.response, row.context) for row in rows]
+
+    def assemble(self, summary: ConversationSummary, rows: Sequence[Turn], message: str,
+                 request_context: Optional[str] = None) -> ConversationContext:
+        """
+        Split unsummarized turns (newest first) into verbatim turns and ones to fold
+        At most max_turns - 1 turns stay verbatim, so with the new turn saved no
+        more than max_turns are ever unsummarized and `build` always sees them all
+        """
+        available = (self.token_budget - self.summary_reserve
+                     - estimate_tokens(message) - estimate_tokens(request_context))
+        kept = 0
+        for row in rows[:self.max_turns - 1]:
+            cost = estimate_tokens(row.message) + estimate_tokens(row.response) + 4
+            if cost > available:
+                break
+            available -= cost
+            kept += 1
+        for row in reversed(rows[kept:]):
+            summary.fold(row, self.summary_notes, self.note_chars)
+        return ConversationContext(summary=summary, turns=list(reversed(rows[:kept])))
+
+
+# Worker-wide builder; it holds no state between requests
+conversation_context = ConversationContextBuilder(
+    token_budget=settings.CHAT_CONTEXT_TOKEN_BUDGET,
+    max_turns=settings.CHAT_CONTEXT_MAX_TURNS,
+    summary_notes=settings.CHAT_SUMMARY_MAX_NOTES,
+    note_chars=settings.CHAT_SUMMARY_NOTE_CHARS
+)
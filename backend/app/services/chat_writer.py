@@ -0,0 +1,208 @@
+"""
+Write-behind persistence for chat turns
+"""
+
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.chat import ChatMessage
+
+
+class ChatWriteQueue:
+    """
+    Collects chat turns in memory and bulk-inserts them in the background
+    A batch is flushed when it reaches `batch_size` rows or when its oldest
+    row has waited `flush_interval` seconds. The queue is bounded: when it is
+    full, producers wait up to `put_timeout` and then write their row inline,
+    so bursts slow the request down instead of growing memory or losing data.
+    Rows still pending are tracked per user: flush_user() lets a purge wait
+    for them, so they can't be written after the DELETE and bring the
+    history back (or reference a deleted user).
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        max_size: int = 10_000,
+        batch_size: int = 200,
+        flush_interval: float = 0.25,
+        put_timeout: float = 0.5
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_size)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._pending: Counter = Counter()  # user_id -> rows queued or being written
+        self._written = asyncio.Condition()
+
+        # Counters
+        self.batches = 0
+        self.rows_written = 0
+        self.inline_writes = 0
+        self.failed_rows = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="chat-write-queue")
+
+    async def stop(self) -> None:
+        """Stop the background loop after flushing everything still queued"""
+        self._stopping = True
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def enqueue(self, row: Dict[str, Any]) -> None:
+        """Queue one chat_messages row; applies backpressure when the queue is full"""
+        row.setdefault("created_at", datetime.now(timezone.utc))
+        self._pending[row.get("user_id")] += 1
+        if self._task is None or self._stopping:
+            await self._flush([row])
+            return
+        try:
+            await asyncio.wait_for(self._queue.put(row), timeout=self.put_timeout)
+        except asyncio.TimeoutError:
+            self.inline_writes += 1
+            await self._flush([row])
+
+    async def flush_user(self, user_id: int) -> None:
+        """Wait until every row queued for `user_id` has been written (or dropped)"""
+        async with self._written:
+            await self._written.wait_for(lambda: not self._pending[user_id])
+
+    async def _run(self) -> None:
+        while not (self._stopping and self._queue.empty()):
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 and not self._stopping:
+                    break
+                try:
+                    batch.append(self._queue.get_nowait() if self._stopping
+                                 else await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, rows: List[Dict[str, Any]], attempts: int = 3) -> None:
+        try:
+            await self._write(rows, attempts)
+        finally:
+            for row in rows:
+                user_id = row.get("user_id")
+                self._pending[user_id] -= 1
+                if self._pending[user_id] <= 0:
+                    del self._pending[user_id]
+            async with self._written:
+                self._written.notify_all()
+
+    async def _write(self, rows: List[Dict[str, Any]], attempts: int) -> None:
+        started = time.perf_counter()
+        written = len(rows)
+        for attempt in range(attempts):
+            try:
+                await self._insert(rows)
+                break
+            except Exception as e:
+                if attempt == attempts - 1:
+                    # One bad row (e.g. its user was just deleted) fails the whole batch;
+                    # write the rows one by one so only the ones that still fail are lost
+                    print(f"⚠️ Chat message batch failed after {attempts} attempts, writing row by row: {str(e)}")
+                    written = await self._insert_each(rows)
+                    break
+                await asyncio.sleep(0.1 * 2 ** attempt)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.batches += 1
+        self.rows_written += written
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        async with self.session_factory() as db:
+            await db.execute(insert(ChatMessage), rows)
+            await db.commit()
+
+    async def _insert_each(self, rows: List[Dict[str, Any]]) -> int:
+        """Insert rows individually, dropping (and counting) the ones that fail; returns the number written"""
+        written = 0
+        for row in rows:
+            try:
+                await self._insert([row])
+                written += 1
+            except Exception as e:
+                self.failed_rows += 1
+                print(f"⚠️ Dropped chat message for user {row.get('user_id')}: {str(e)}")
+        return written
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "max_size": self._queue.maxsize,
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "inline_writes": self.inline_writes,
+            "failed_rows": self.failed_rows,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.batches, 2) if self.batches else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2)
+        }
+
+
+# Worker-wide queue, started by init_chat_writer() during startup
+chat_writer: Optional[ChatWriteQueue] = None
+
+
+async def init_chat_writer() -> ChatWriteQueue:
+    """Start the chat write-behind queue"""
+    global chat_writer
+    chat_writer = ChatWriteQueue(
+        max_size=settings.CHAT_WRITE_QUEUE_MAX_SIZE,
+        batch_size=settings.CHAT_WRITE_BATCH_SIZE,
+        flush_interval=settings.CHAT_WRITE_FLUSH_INTERVAL_SECONDS,
+        put_timeout=settings.CHAT_WRITE_PUT_TIMEOUT_SECONDS
+    )
+    chat_writer.start()
+    print("📝 Chat write queue started")
+    return chat_writer
+
+
+async def close_chat_writer() -> None:
+    """Flush pending chat messages and stop the queue"""
+    if chat_writer is not None:
+        await chat_writer.stop()
+        print(f"📝 Chat write queue flushed ({chat_writer.rows_written} messages written)")
+
+
+def get_chat_writer(connection: HTTPConnection) -> Optional[ChatWriteQueue]:
+    """
+    Chat write queue dependency for FastAPI endpoints
+    Usage: writer: ChatWriteQueue = Depends(get_chat_writer)
+    """
+    return getattr(connection.app.state, "chat_writer", None)
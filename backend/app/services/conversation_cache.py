@@ -0,0 +1,183 @@
+"""
+Per-worker cache of recent conversation windows for prompt context
+"""
+
+import sys
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+from app.services.chat_context import Turn
+
+
+def _turn_bytes(turn: Turn) -> int:
+    return (sys.getsizeof(turn) + sys.getsizeof(turn.created_us) + sys.getsizeof(turn.message)
+            + sys.getsizeof(turn.response) + sys.getsizeof(turn.context))
+
+
+class _Window:
+    """
+    A user's last `capacity` turns, oldest first, in a fixed-size ring
+    `complete` windows were filled from the database and can answer reads;
+    incomplete ones only hold turns saved since the user was last loaded
+    """
+    __slots__ = ("turns", "nbytes", "complete", "filled_at")
+
+    def __init__(self, capacity: int):
+        self.turns: Deque[Turn] = deque(maxlen=capacity)
+        self.nbytes = sys.getsizeof(self.turns)
+        self.complete = False
+        self.filled_at = 0.0
+
+    def append(self, turn: Turn) -> None:
+        if len(self.turns) == self.turns.maxlen:
+            self.nbytes -= _turn_bytes(self.turns[0])
+        self.turns.append(turn)
+        self.nbytes += _turn_bytes(turn)
+
+    def replace(self, turns: Iterable[Turn]) -> None:
+        self.turns.clear()
+        self.nbytes = sys.getsizeof(self.turns)
+        for turn in turns:
+            self.append(turn)
+
+
+class ConversationCache:
+    """
+    Recent turns per user, so context assembly for an active conversation skips the database
+    Windows are filled from the database on a miss and appended to
+    write-through as turns are saved. The least recently used windows are
+    evicted once all of them together exceed `max_bytes`. A filled window is
+    re-read after `ttl_seconds`, which bounds how stale it gets when another
+    worker served some of the user's turns.
+    Not thread-safe: intended for use from a single event loop
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, window: int = 12, ttl_seconds: float = 120.0):
+        self.max_bytes = max_bytes
+        self.window = window
+        self.ttl_seconds = ttl_seconds
+        self._windows: "OrderedDict[int, _Window]" = OrderedDict()
+        self.nbytes = 0
+        # Bumped by every invalidation; fills that started before one are dropped
+        self.invalidations = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_fills = 0
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def get(self, user_id: int) -> Optional[List[Turn]]:
+        """The user's cached turns, newest first, or None when they have to be loaded"""
+        window = self._windows.get(user_id)
+        if window is None or not window.complete or window.filled_at + self.ttl_seconds <= time.monotonic():
+            self.misses += 1
+            return None
+        self._windows.move_to_end(user_id)
+        self.hits += 1
+        return list(reversed(window.turns))
+
+    def fill(self, user_id: int, turns: List[Turn], invalidations: int) -> None:
+        """
+        Store turns just loaded from the database (newest first)
+        `invalidations` is the counter read before the query; if history was
+        cleared since, the rows may already be gone and aren't cached.
+        Turns appended while the query ran are kept.
+        """
+        if self.max_bytes <= 0:
+            return
+        if invalidations != self.invalidations:
+            self.stale_fills += 1
+            return
+        window = self._window(user_id)
+        merged = {turn.created_us: turn for turn in turns}
+        merged.update((turn.created_us, turn) for turn in window.turns)
+        self._resize(window, lambda: window.replace(merged[key] for key in sorted(merged)[-self.window:]))
+        window.complete = True
+        window.filled_at = time.monotonic()
+        self._evict()
+
+    def append(self, user_id: int, turn: Turn) -> None:
+        """Write-through for a turn being saved"""
+        if self.max_bytes <= 0:
+            return
+        window = self._window(user_id)
+        self._resize(window, lambda: window.append(turn))
+        self._evict()
+
+    def invalidate(self, user_id: int) -> None:
+        """Forget the user's window (history cleared, account deleted)"""
+        self.invalidations += 1
+        window = self._windows.pop(user_id, None)
+        if window is not None:
+            self.nbytes -= window.nbytes
+
+    def clear(self) -> None:
+        self.invalidations += 1
+        self._windows.clear()
+        self.nbytes = 0
+
+    def _window(self, user_id: int) -> _Window:
+        window = self._windows.get(user_id)
+        if window is None:
+            window = self._windows[user_id] = _Window(self.window)
+            self.nbytes += window.nbytes
+        self._windows.move_to_end(user_id)
+        return window
+
+    def _resize(self, window: _Window, change) -> None:
+        before = window.nbytes
+        change()
+        self.nbytes += window.nbytes - before
+
+    def _evict(self) -> None:
+        while self.nbytes > self.max_bytes and self._windows:
+            _, window = self._windows.popitem(last=False)
+            self.nbytes -= window.nbytes
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "users": len(self._windows),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "window": self.window,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale_fills": self.stale_fills,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# Worker-wide cache, exposed on app.state by init_conversation_cache()
+conversation_cache = ConversationCache(
+    max_bytes=settings.CONVERSATION_CACHE_MAX_MB * 1024 * 1024,
+    window=settings.CHAT_CONTEXT_MAX_TURNS,
+    ttl_seconds=settings.CONVERSATION_CACHE_TTL_SECONDS
+)
+
+
+async def init_conversation_cache() -> ConversationCache:
+    """Return the conversation cache for app.state"""
+    return conversation_cache
+
+
+def invalidate_conversation(user_id: int) -> None:
+    """Drop a user's cached window after their history is deleted (per worker; others re-read within the TTL)"""
+    conversation_cache.invalidate(user_id)
+
+
+def get_conversation_cache(connection: HTTPConnection) -> ConversationCache:
+    """
+    Conversation cache dependency for FastAPI endpoints
+    Usage: conversations: ConversationCache = Depends(get_conversation_cache)
+    """
+    return getattr(connection.app.state, "conversation_cache", conversation_cache)
@@ -0,0 +1,316 @@
+"""
+Counseling service lookup by location name and by coordinates
+"""
+
+import asyncio
+import heapq
+import json
+import math
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from starlette.requests import HTTPConnection
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.services.support_catalog import StaticPayload
+
+
+DEFAULT_COUNSELING_SERVICES_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "counseling_services.json")
+
+# Top-level dataset fields passed through to every response (e.g. a sample-data warning)
+DATASET_NOTES = ("sample_data", "notice")
+
+# Fields a location query is matched against
+LOCATION_FIELDS = ("campus", "city", "region", "name")
+
+EARTH_RADIUS_KM = 6371.0
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and punctuation (e.g. "Montréal, QC" -> "montreal qc")"""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def _unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def _chord_squared(distance_km: float) -> float:
+    """Squared straight-line distance between unit-sphere points `distance_km` apart"""
+    return (2 * math.sin(min(math.pi, distance_km / EARTH_RADIUS_KM) / 2)) ** 2
+
+
+def _chord_to_km(chord_squared: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_squared) / 2))
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class CounselingServiceIndex:
+    """
+    In-memory indexes over the counseling services dataset
+    - Names: a sorted list of normalized location labels (and every word-start
+      suffix, so "mich" finds "University of Michigan"); a prefix query is a
+      bisect into that list.
+    - Coordinates: a k-d tree over points on the unit sphere. Straight-line
+      (chord) distance orders points exactly like great-circle distance, with
+      no special cases at the poles or the date line.
+    Location + coordinates queries rank the (clustered, sparse) name matches
+    in one vectorized pass instead of filtering a tree walk.
+    """
+
+    def __init__(self, services: List[Dict[str, Any]], leaf_size: int = 8):
+        self.services = services
+        self.leaf_size = leaf_size
+
+        labels: List[Tuple[str, int]] = []
+        for position, service in enumerate(services):
+            keys = set()
+            for field in LOCATION_FIELDS:
+                words = normalize(str(service.get(field) or "")).split()
+                keys.update(" ".join(words[start:]) for start in range(len(words)))
+            labels.extend((key, position) for key in keys)
+        labels.sort()
+        self._keys = [key for key, _ in labels]
+        self._positions = [position for _, position in labels]
+        self._position_array = np.array(self._positions, dtype=np.intp)
+
+        self._points: Dict[int, Tuple[float, float, float]] = {
+            position: _unit_vector(service["latitude"], service["longitude"])
+            for position, service in enumerate(services)
+            if service.get("latitude") is not None and service.get("longitude") is not None
+        }
+        self._xyz = np.full((len(services), 3), np.nan)
+        for position, point in self._points.items():
+            self._xyz[position] = point
+        # Flat node arrays: a leaf has a bucket of positions, an inner node an axis and split value
+        self._axis: List[int] = []
+        self._split: List[float] = []
+        self._children: List[Tuple[int, int]] = []
+        self._buckets: List[Optional[List[int]]] = []
+        self._root = self._build(np.fromiter(self._points, dtype=np.intp)) if self._points else -1
+
+    def __len__(self) -> int:
+        return len(self.services)
+
+    def _build(self, positions: np.ndarray) -> int:
+        node = len(self._buckets)
+        self._axis.append(0)
+        self._split.append(0.0)
+        self._children.append((-1, -1))
+        if len(positions) <= self.leaf_size:
+            self._buckets.append(positions.tolist())
+            return node
+
+        self._buckets.append(None)
+        coordinates = self._xyz[positions]
+        axis = int(np.ptp(coordinates, axis=0).argmax())  # Split the widest dimension
+        positions = positions[np.argsort(coordinates[:, axis], kind="stable")]
+        middle = len(positions) // 2
+        self._axis[node] = axis
+        self._split[node] = float(self._xyz[positions[middle], axis])
+        left = self._build(positions[:middle])
+        right = self._build(positions[middle:])
+        self._children[node] = (left, right)
+        return node
+
+    def match_location(self, location: str, limit: Optional[int] = None) -> List[int]:
+        """Positions of services whose campus, city, region or name starts with `location`"""
+        query = normalize(location)
+        if not query:
+            return []
+        start, end = self._key_range(query)
+        if limit is None:
+            return list(dict.fromkeys(self._positions[start:end]))
+        positions: List[int] = []
+        seen = set()
+        # Keys are sorted, so exact matches come before longer completions
+        for i in range(start, end):
+            position = self._positions[i]
+            if position not in seen:
+                seen.add(position)
+                positions.append(position)
+                if limit is not None and len(positions) >= limit:
+                    break
+        return positions
+
+    def _key_range(self, query: str) -> Tuple[int, int]:
+        start = bisect_left(self._keys, query)
+        return start, bisect_left(self._keys, query + "\x7f", lo=start)
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        limit: int = 10,
+        radius_km: Optional[float] = None,
+        allowed: Optional[Callable[[int], bool]] = None
+    ) -> List[Tuple[float, int]]:
+        """(distance_km, position) of the closest services, nearest first"""
+        if limit <= 0 or self._root < 0:
+            return []
+        query = _unit_vector(lat, lon)
+        max_d2 = _chord_squared(radius_km) if radius_km is not None else math.inf
+        best: List[Tuple[float, int]] = []  # (-chord², position): a max-heap of the closest so far
+        # Best-first: visit nodes by a lower bound on their distance, stop once none can improve `best`
+        frontier: List[Tuple[float, int]] = [(0.0, self._root)]
+        points = self._points
+        while frontier:
+            bound, node = heapq.heappop(frontier)
+            if bound > max_d2 or (len(best) >= limit and bound >= -best[0][0]):
+                break
+            bucket = self._buckets[node]
+            if bucket is None:
+                diff = query[self._axis[node]] - self._split[node]
+                left, right = self._children[node]
+                near, far = (left, right) if diff < 0 else (right, left)
+                heapq.heappush(frontier, (bound, near))
+                heapq.heappush(frontier, (max(bound, diff * diff), far))
+                continue
+
+            for position in bucket:
+                if allowed is not None and not allowed(position):
+                    continue
+                x, y, z = points[position]
+                d2 = (x - query[0]) ** 2 + (y - query[1]) ** 2 + (z - query[2]) ** 2
+                if d2 > max_d2:
+                    continue
+                if len(best) < limit:
+                    heapq.heappush(best, (-d2, position))
+                elif d2 < -best[0][0]:
+                    heapq.heapreplace(best, (-d2, position))
+
+        return sorted((_chord_to_km(-d2), position) for d2, position in best)
+
+    def search(
+        self,
+        location: Optional[str] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+        limit: int = 10,
+        radius_km: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Services matching `location`, nearest to (lat, lon) first when coordinates are given"""
+        if lat is None or lon is None:
+            return [self.services[position] for position in self.match_location(location or "", limit)]
+
+        allowed = None
+        if location:
+            start, end = self._key_range(normalize(location))
+            matches = np.unique(self._position_array[start:end])
+            if len(matches) * 4 < len(self.services):
+                # Matches are scattered clusters (a city or campus each), which a filtered
+                # tree walk handles badly; score them all at once instead
+                return self._rank(matches, lat, lon, limit, radius_km)
+            allowed = set(matches.tolist()).__contains__
+
+        return [
+            self._with_distance(distance, position)
+            for distance, position in self.nearest(lat, lon, limit, radius_km, allowed)
+        ]
+
+    def _rank(
+        self,
+        candidates: np.ndarray,
+        lat: float,
+        lon: float,
+        limit: int,
+        radius_km: Optional[float]
+    ) -> List[Dict[str, Any]]:
+        d2 = ((self._xyz[candidates] - np.array(_unit_vector(lat, lon))) ** 2).sum(axis=1)
+        keep = np.isfinite(d2)  # Services without coordinates are NaN rows
+        if radius_km is not None:
+            keep &= d2 <= _chord_squared(radius_km)
+        candidates, d2 = candidates[keep], d2[keep]
+        if len(d2) > limit:
+            top = np.argpartition(d2, limit)[:limit]
+            candidates, d2 = candidates[top], d2[top]
+        order = np.argsort(d2, kind="stable")
+        return [self._with_distance(_chord_to_km(float(d2[i])), int(candidates[i])) for i in order]
+
+    def _with_distance(self, distance: float, position: int) -> Dict[str, Any]:
+        return {**self.services[position], "distance_km": round(distance, 2)}
+
+    @classmethod
+    def from_data(cls, data: Any) -> "CounselingServiceIndex":
+        return cls(data["services"] if isinstance(data, dict) else data)
+
+    @classmethod
+    def from_file(cls, path: str) -> "CounselingServiceIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_data(json.load(f))
+
+
+class CounselingDirectory:
+    """
+    Holds the current index and the full list, pre-serialized with its ETag
+    reload() builds new ones and swaps them in
+    """
+
+    def __init__(self, path: str = DEFAULT_COUNSELING_SERVICES_FILE, max_age: int = 300):
+        self.path = path
+        self.max_age = max_age
+        self.index = CounselingServiceIndex([])
+        self.notes: Dict[str, Any] = {}
+        self.payload: Optional[StaticPayload] = None
+
+    def load(self) -> CounselingServiceIndex:
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = CounselingServiceIndex.from_data(data)
+        notes = {name: data[name] for name in DATASET_NOTES if name in data} if isinstance(data, dict) else {}
+        payload = StaticPayload.from_data({**notes, "services": index.services})
+        self.index, self.notes, self.payload = index, notes, payload
+        return index
+
+    def response(self, connection: HTTPConnection) -> Response:
+        """Every service: 200 with the cached body, or 304 when the client already has it"""
+        return self.payload.response(connection, self.max_age)
+
+    def search_results(self, services: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Body for a filtered lookup, carrying the same dataset notes as the full list"""
+        return {**self.notes, "services": services}
+
+    async def reload(self) -> CounselingServiceIndex:
+        """Re-read the dataset and rebuild the index without blocking the event loop"""
+        return await asyncio.to_thread(self.load)
+
+
+# Worker-wide directory, loaded by init_counseling_directory() during startup
+counseling_directory = CounselingDirectory(
+    path=settings.COUNSELING_SERVICES_FILE or DEFAULT_COUNSELING_SERVICES_FILE,
+    max_age=settings.SUPPORT_CACHE_MAX_AGE_SECONDS
+)
+
+
+async def init_counseling_directory() -> CounselingDirectory:
+    """Load the counseling services dataset and build its indexes"""
+    await counseling_directory.reload()
+    print(f"🗺️ Counseling services indexed ({len(counseling_directory.index)} services)")
+    if counseling_directory.notes.get("sample_data"):
+        print(f"⚠️ {counseling_directory.path} is sample data; set COUNSELING_SERVICES_FILE to verified services")
+    return counseling_directory
+
+
+def get_counseling_directory(connection: HTTPConnection) -> CounselingDirectory:
+    """
+    Counseling directory dependency for FastAPI endpoints
+    Usage: directory: CounselingDirectory = Depends(get_counseling_directory)
+    """
+    directory = getattr(connection.app.state, "counseling_directory", counseling_directory)
+    if directory.payload is None:
+        directory.load()  # App started without the lifespan (e.g. some test clients)
+    return directory
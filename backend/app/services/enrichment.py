@@ -0,0 +1,174 @@
+"""
+Chat enrichment pipeline (mood insights, suggestions, ...)
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from starlette.requests import HTTPConnection
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+@dataclass
+class EnrichmentInput:
+    """What a stage gets to look at"""
+    message: str
+    context: Optional[str] = None
+    response: Optional[str] = None  # Only set for stages with needs_response=True
+
+
+@dataclass
+class EnrichmentStage:
+    """
+    One enrichment step
+    Stages that don't need the LLM reply start as soon as the message arrives
+    and run concurrently with the LLM call.
+    """
+    name: str
+    run: Callable[[EnrichmentInput], Awaitable[Any]]
+    needs_response: bool = False
+
+
+@dataclass
+class EnrichmentRecord:
+    """Results for one chat message, as returned by the follow-up endpoint"""
+    message_id: str
+    user_id: Optional[int] = None  # Owner; only they can read the record back
+    results: Dict[str, Any] = field(default_factory=dict)
+    pending: List[str] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "message_id": self.message_id,
+            "status": "pending" if self.pending else "complete",
+            "results": self.results,
+            "pending": list(self.pending),
+            "errors": self.errors,
+            "timings_ms": self.timings_ms
+        }
+
+
+class EnrichmentRun:
+    """Enrichment of a single chat message"""
+
+    def __init__(self, pipeline: "EnrichmentPipeline", message_id: str, data: EnrichmentInput,
+                 stages: List[EnrichmentStage], user_id: Optional[int] = None):
+        self.pipeline = pipeline
+        self.data = data
+        self.record = EnrichmentRecord(message_id=message_id, user_id=user_id)
+        self._stages = stages
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._launch(needs_response=False)
+
+    @property
+    def message_id(self) -> str:
+        return self.record.message_id
+
+    def record_timing(self, name: str, elapsed_ms: float) -> None:
+        self.record.timings_ms[name] = round(elapsed_ms, 2)
+
+    def set_response(self, response: str) -> None:
+        """Provide the LLM reply and start the stages that depend on it"""
+        self.data.response = response
+        self._launch(needs_response=True)
+
+    async def collect(self, budget: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Wait up to `budget` seconds for outstanding stages and return finished results
+        Stages still running afterwards keep going in the background; their
+        results land in the pipeline store under this run's message_id.
+        """
+        budget = self.pipeline.inline_budget if budget is None else budget
+        running = [task for task in self._tasks.values() if not task.done()]
+        if running:
+            await asyncio.wait(running, timeout=budget)
+
+        self.record.pending = [name for name, task in self._tasks.items() if not task.done()]
+        self.pipeline.store.set(self.message_id, self.record)
+        for name in self.record.pending:
+            self.pipeline.track(self._tasks[name])
+        return dict(self.record.results)
+
+    def _launch(self, needs_response: bool) -> None:
+        for stage in self._stages:
+            if stage.needs_response == needs_response and stage.name not in self._tasks:
+                self._tasks[stage.name] = asyncio.create_task(self._run_stage(stage))
+
+    async def _run_stage(self, stage: EnrichmentStage) -> None:
+        started = time.perf_counter()
+        try:
+            self.record.results[stage.name] = await stage.run(self.data)
+        except Exception as e:
+            self.record.errors[stage.name] = str(e)
+        finally:
+            self.record_timing(stage.name, (time.perf_counter() - started) * 1000)
+            if stage.name in self.record.pending:
+                self.record.pending.remove(stage.name)
+
+
+class EnrichmentPipeline:
+    """
+    App-scoped owner of enrichment runs
+    Keeps finished/pending results in a bounded TTL store for the follow-up
+    endpoint and holds references to background stages until they finish.
+    """
+
+    def __init__(self, inline_budget: float, max_results: int, result_ttl_seconds: float):
+        self.inline_budget = inline_budget
+        self.store = TTLCache(max_entries=max_results, ttl_seconds=result_ttl_seconds)
+        self._background: Set[asyncio.Task] = set()
+
+    def begin(self, message_id: str, data: EnrichmentInput, stages: List[EnrichmentStage],
+              user_id: Optional[int] = None) -> EnrichmentRun:
+        """Start enrichment for a message sent by `user_id`; response-independent stages begin immediately"""
+        return EnrichmentRun(self, message_id, data, stages, user_id)
+
+    def track(self, task: asyncio.Task) -> None:
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def get(self, message_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+        """The record for `message_id`, or None if it expired or belongs to someone else"""
+        record: Optional[EnrichmentRecord] = self.store.peek(message_id)
+        if record is None or record.user_id != user_id:
+            return None
+        return record.to_dict()
+
+    async def close(self) -> None:
+        """Cancel stages still running in the background"""
+        for task in list(self._background):
+            task.cancel()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        self.store.clear()
+
+
+# Worker-wide pipeline, exposed on app.state by init_enrichment()
+enrichment_pipeline = EnrichmentPipeline(
+    inline_budget=settings.ENRICHMENT_INLINE_BUDGET_MS / 1000,
+    max_results=settings.ENRICHMENT_MAX_RESULTS,
+    result_ttl_seconds=settings.ENRICHMENT_RESULT_TTL_SECONDS
+)
+
+
+async def init_enrichment() -> EnrichmentPipeline:
+    """Return the enrichment pipeline for app.state"""
+    return enrichment_pipeline
+
+
+async def close_enrichment() -> None:
+    """Stop background enrichment stages"""
+    await enrichment_pipeline.close()
+
+
+def get_enrichment_pipeline(connection: HTTPConnection) -> EnrichmentPipeline:
+    """
+    Enrichment pipeline dependency for FastAPI endpoints
+    Usage: pipeline: EnrichmentPipeline = Depends(get_enrichment_pipeline)
+    """
+    return getattr(connection.app.state, "enrichment", enrichment_pipeline)
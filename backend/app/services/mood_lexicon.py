@@ -0,0 +1,193 @@
+"""
+Compiled keyword lexicons for mood analysis and suggestion routing
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+# Emotions in priority order: when two emotions score the same, the earlier one wins,
+# so distress signals outrank neutral or positive ones
+# Keywords match whole words plus -s/-es/-ed/-ing; other inflections are listed explicitly
+MOOD_LEXICON: Dict[str, List[str]] = {
+    "anxious": ["anxious", "anxiousness", "anxiety", "worried", "worry", "nervous", "nervousness",
+                "panic", "panicking", "panicked", "panicky", "fear", "fearful", "scared", "afraid"],
+    "sad": ["sad", "sadness", "sadly", "unhappy", "depress", "depressed", "depression", "down", "feel down",
+            "feels down", "feeling down", "felt down", "so down", "lonely", "loneliness", "empty", "emptiness",
+            "hopeless", "hopelessness", "miserable", "crying"],
+    "stressed": ["stressed", "stressful", "overwhelmed", "overwhelming", "pressure", "pressured", "exam", "deadline",
+                 "burnt out", "burned out"],
+    "angry": ["angry", "frustrated", "annoyed", "mad", "upset", "furious", "irritated"],
+    "tired": ["tired", "exhausted", "sleepy", "fatigue", "fatigued", "worn out", "drained"],
+    "confused": ["confused", "lost", "uncertain", "unclear", "don't know", "dont know", "unsure"],
+    "happy": ["happy", "good", "great", "excited", "joy", "joyful", "glad", "relaxed"]
+}
+
+# Suggestion topics in routing order
+SUGGESTION_LEXICON: Dict[str, List[str]] = {
+    "stress": ["stress", "stressed", "stressful", "overwhelmed"],
+    "study": ["exam", "test", "study", "studies", "revision", "assignment"],
+    "sleep": ["sleep", "insomnia", "tired", "exhausted"],
+    "lonely": ["lonely", "alone", "isolated", "no friends"]
+}
+
+# Words that cancel a keyword appearing shortly after them ("not stressed", "never lonely")
+NEGATIONS = {
+    "not", "no", "never", "nothing", "hardly", "without",
+    "don't", "dont", "doesn't", "didn't", "isn't", "wasn't", "aren't", "ain't", "won't", "can't", "cannot"
+}
+NEGATION_WINDOW = 3  # Words looked back from a keyword
+# Cheap substring probes: messages containing none of these skip negation checks entirely
+_NEGATION_PROBES = ("no", "n't", "dont", "never", "hardly", "without")
+
+_SUFFIXES = r"(?:s|es|ed|ing)?"
+# Clause boundaries stop a negation from reaching across ("not great, but happy")
+_CLAUSE_PUNCTUATION = ".!?;,:"
+_MESSAGE_SEPARATOR = "\n\n"
+
+
+def _normalize(text: str) -> str:
+    return text.replace("’", "'").lower()
+
+
+def _may_contain_negation(text: str) -> bool:
+    return any(probe in text for probe in _NEGATION_PROBES)
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """
+    Regex alternation factored by common prefixes ("wor(?:ried|ry|n out)")
+    The regex engine then rejects a position after one character test per
+    branch instead of trying every keyword in turn.
+    """
+    root: Dict[str, dict] = {}
+    for term in terms:
+        node = root
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(root)
+
+
+class Lexicon:
+    """
+    Keyword lexicon compiled to a single prefix-factored regex
+    Matches whole words (with simple inflections) and multi-word phrases in one
+    left-to-right scan, optionally skipping keywords that follow a negation.
+    Cost grows with message length, not with the number of labels or keywords.
+    """
+
+    def __init__(self, entries: Dict[str, Sequence[str]], negation: bool = True):
+        self.labels = list(entries)
+        self.negation = negation
+        self._priority = {label: i for i, label in enumerate(self.labels)}
+        self._term_labels: Dict[str, List[str]] = {}
+        for label, terms in entries.items():
+            for term in terms:
+                self._term_labels.setdefault(_normalize(term), []).append(label)
+
+        # Greedy optional branches make phrases ("worn out") win over their prefixes
+        self._pattern = re.compile(rf"(?<![a-z'])({_trie_pattern(self._term_labels)}){_SUFFIXES}(?![a-z'])")
+
+    def score(self, text: str) -> Dict[str, int]:
+        """Count non-negated keyword hits per label"""
+        text = _normalize(text)
+        check_negation = self.negation and _may_contain_negation(text)
+        scores: Dict[str, int] = {}
+        for match in self._pattern.finditer(text):
+            if check_negation and self._is_negated(text, match.start(), 0):
+                continue
+            for label in self._term_labels[match.group(1)]:
+                scores[label] = scores.get(label, 0) + 1
+        return scores
+
+    def score_many(self, texts: Iterable[str]) -> List[Dict[str, int]]:
+        """Score many messages with one regex pass over the joined batch"""
+        texts = [_normalize(text) for text in texts]
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + len(_MESSAGE_SEPARATOR)
+        corpus = _MESSAGE_SEPARATOR.join(texts)
+        check_negation = self.negation and _may_contain_negation(corpus)
+
+        results: List[Dict[str, int]] = [{} for _ in texts]
+        for match in self._pattern.finditer(corpus):
+            index = bisect_right(starts, match.start()) - 1
+            if check_negation and self._is_negated(corpus, match.start(), starts[index]):
+                continue
+            scores = results[index]
+            for label in self._term_labels[match.group(1)]:
+                scores[label] = scores.get(label, 0) + 1
+        return results
+
+    def rank(self, scores: Dict[str, int]) -> List[str]:
+        """Labels ordered by score, then by lexicon priority"""
+        return sorted(scores, key=lambda label: (-scores[label], self._priority[label]))
+
+    def top(self, text: str) -> Optional[str]:
+        ranked = self.rank(self.score(text))
+        return ranked[0] if ranked else None
+
+    @staticmethod
+    def _is_negated(text: str, position: int, floor: int) -> bool:
+        """Whether one of the few words before `position`, within the same clause, is a negation"""
+        words = text[max(floor, position - 40):position].split()[-NEGATION_WINDOW:]
+        for word in reversed(words):
+            if word[-1] in _CLAUSE_PUNCTUATION:
+                return False
+            word = word.strip("'\"")
+            if word in NEGATIONS:
+                return True
+            if word == "but":
+                return False
+        return False
+
+
+# Compiled once at import
+mood_lexicon = Lexicon(MOOD_LEXICON)
+# Topics ignore negation: "can't sleep" is still about sleep
+suggestion_lexicon = Lexicon(SUGGESTION_LEXICON, negation=False)
+
+
+def mood_from_scores(scores: Dict[str, int]) -> Dict[str, object]:
+    """Shape lexicon scores into the mood_insights payload"""
+    if not scores:
+        return {"detected_emotion": "neutral", "confidence": 0.5, "all_emotions": [], "scores": {}}
+
+    ranked = mood_lexicon.rank(scores) if len(scores) > 1 else list(scores)
+
+    primary = ranked[0]
+    # More supporting keywords -> more confidence, capped below certainty
+    confidence = min(0.95, 0.6 + 0.1 * scores[primary])
+    return {
+        "detected_emotion": primary,
+        "confidence": round(confidence, 2),
+        "all_emotions": ranked,
+        "scores": {label: scores[label] for label in ranked}
+    }
+
+
+def analyze_mood(message: str) -> Dict[str, object]:
+    """Detect emotions in a single message"""
+    return mood_from_scores(mood_lexicon.score(message))
+
+
+def analyze_mood_many(messages: Iterable[str]) -> List[Dict[str, object]]:
+    """Detect emotions in many messages in one pass"""
+    return [mood_from_scores(scores) for scores in mood_lexicon.score_many(messages)]
+
+
+def route_suggestion_topic(message: str) -> Optional[str]:
+    """Pick the suggestion topic for a message, or None for general wellness"""
+    return suggestion_lexicon.top(message)
@@ -0,0 +1,266 @@
+"""
+Support resource retrieval for chat replies (hashed TF-IDF vectors)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import zlib
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+import numpy as np
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+
+
+# Bump when tokenization or weighting changes so stored indexes are rebuilt
+INDEX_VERSION = "2"
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Name of an index directory written by build_resource_index (see fingerprint())
+_INDEX_DIR_NAME = re.compile(r"^[0-9a-f]{16}$")
+
+STOPWORDS = frozenset("""
+    a about after again all am an and any are as at be because been before being but by can could
+    did do does doing don down for from get got had has have having he her here him his how i if in
+    into is it its just me more most my myself no not now of off on once only or other our out over
+    own really same she should so some such than that the their them then there these they this
+    those through to too under until up very was we were what when where which while who why will
+    with would you your
+""".split())
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping so "stressed", "exams" and "studying" meet their catalogue forms"""
+    if len(word) <= 4:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    for suffix in ("ingly", "ing", "edly", "ed", "ness", "ly", "sses"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + ("ss" if suffix == "sses" else "")
+    if word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+
+def terms(text: str) -> List[str]:
+    """Stemmed words, stopwords removed"""
+    return [_stem(word) for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def features(text: str) -> List[str]:
+    """Stemmed unigrams and bigrams, stopwords removed"""
+    words = terms(text)
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def _buckets(text: str, dims: int) -> np.ndarray:
+    # crc32 rather than hash(): bucket ids must match across processes and restarts
+    return np.fromiter((zlib.crc32(feature.encode("utf-8")) % dims for feature in features(text)), dtype=np.intp)
+
+
+def _term_frequencies(text: str, dims: int) -> np.ndarray:
+    counts = np.bincount(_buckets(text, dims), minlength=dims).astype(np.float32)
+    nonzero = counts > 0
+    counts[nonzero] = 1 + np.log(counts[nonzero])  # Sublinear tf
+    return counts
+
+
+def resource_text(resource: Dict[str, Any]) -> str:
+    """Indexed text; title and tags are repeated to weigh them above the description"""
+    title = resource.get("title", "")
+    tags = " ".join(resource.get("tags", []))
+    return " ".join([title, title, tags, tags, resource.get("description", ""), resource.get("type", "")])
+
+
+def fingerprint(resources: List[Dict[str, Any]], dims: int) -> str:
+    raw = json.dumps({"version": INDEX_VERSION, "dims": dims, "resources": resources}, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def build_resource_index(resources: List[Dict[str, Any]], directory: str, dims: int = 2048) -> str:
+    """
+    Vectorize the catalogue and write it under directory/<fingerprint>/
+    Files: matrix.npy, idf.npy and meta.json. Returns the index path.
+    The matrix is stored term-major (dims x resources, float32): a message
+    only hits a few dozen buckets, so scoring reads just those rows.
+    """
+    key = fingerprint(resources, dims)
+    path = os.path.join(directory, key)
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return path
+
+    tf = np.zeros((len(resources), dims), dtype=np.float32)
+    for row, resource in enumerate(resources):
+        tf[row] = _term_frequencies(resource_text(resource), dims)
+    document_frequency = (tf > 0).sum(axis=0)
+    idf = (np.log((1 + len(resources)) / (1 + document_frequency)) + 1).astype(np.float32)
+    matrix = tf * idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+    # Write into a scratch directory and rename it into place, so a reader never sees half an index
+    os.makedirs(directory, exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix=f".{key}-", dir=directory)
+    np.save(os.path.join(scratch, "matrix.npy"), np.ascontiguousarray(matrix.T))
+    np.save(os.path.join(scratch, "idf.npy"), idf)
+    with open(os.path.join(scratch, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "dims": dims, "fingerprint": key, "resources": resources}, f)
+    try:
+        os.rename(scratch, path)
+    except OSError:
+        shutil.rmtree(scratch, ignore_errors=True)  # Another worker built the same index first
+    return path
+
+
+class ResourceIndex:
+    """A built index; the (dims x resources) matrix is memory-mapped rather than read into the heap"""
+
+    def __init__(self, matrix: np.ndarray, idf: np.ndarray, resources: List[Dict[str, Any]], key: str = ""):
+        self.matrix = matrix
+        self.idf = idf
+        self.resources = resources
+        self.dims = int(idf.shape[0])
+        self.fingerprint = key
+
+    @classmethod
+    def load(cls, path: str) -> "ResourceIndex":
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(
+            matrix=np.load(os.path.join(path, "matrix.npy"), mmap_mode="r"),
+            idf=np.load(os.path.join(path, "idf.npy")),
+            resources=meta["resources"],
+            key=meta["fingerprint"]
+        )
+
+    def __len__(self) -> int:
+        return len(self.resources)
+
+    def vectorize(self, text: str) -> np.ndarray:
+        vector = _term_frequencies(text, self.dims) * self.idf
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def top_k(self, text: str, k: int = 3, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """The k resources most similar to `text` (cosine), best first"""
+        if not len(self.resources) or k <= 0:
+            return []
+        query = self.vectorize(text)
+        buckets = np.flatnonzero(query)
+        if not len(buckets):
+            return []
+        scores = query[buckets] @ self.matrix[buckets]
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            {
+                "title": self.resources[i].get("title"),
+                "url": self.resources[i].get("url"),
+                "type": self.resources[i].get("type"),
+                "score": round(float(scores[i]), 4)
+            }
+            for i in top if scores[i] > min_score
+        ]
+
+
+class ResourceRecommender:
+    """
+    Holds the current resource index and times every query
+    load() reuses a stored index whose fingerprint matches the catalogue and
+    builds one otherwise (see build_resource_index.py for offline builds).
+    """
+
+    def __init__(self, directory: str = ".resource_index", dims: int = 2048, top_k: int = 3,
+                 min_score: float = 0.05, samples: int = 1024):
+        self.directory = directory
+        self.dims = dims
+        self.top_k = top_k
+        self.min_score = min_score
+        self.index = ResourceIndex(np.zeros((dims, 0), dtype=np.float32), np.ones(dims, dtype=np.float32), [])
+        self.queries = 0
+        self._query_us: Deque[float] = deque(maxlen=samples)
+
+    def load(self, resources: List[Dict[str, Any]]) -> ResourceIndex:
+        path = build_resource_index(resources, self.directory, self.dims)
+        self.index = ResourceIndex.load(path)
+        self._prune(keep=os.path.basename(path))
+        return self.index
+
+    async def reload(self, resources: List[Dict[str, Any]]) -> ResourceIndex:
+        """Load or build without blocking the event loop"""
+        return await asyncio.to_thread(self.load, resources)
+
+    def _prune(self, keep: str) -> None:
+        """
+        Remove older index versions; a worker still mapping one keeps its (unlinked) pages
+        Only fingerprint-named directories holding a meta.json are ours: anything
+        else under the directory (e.g. a misconfigured, shared path) is left alone.
+        """
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name != keep and _INDEX_DIR_NAME.match(name) and os.path.isfile(os.path.join(path, "meta.json")):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def recommend(self, text: str, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        results = self.index.top_k(text, self.top_k if k is None else k, self.min_score)
+        self.queries += 1
+        self._query_us.append((time.perf_counter() - started) * 1e6)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self._query_us)
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))], 1) if samples else 0.0
+
+        return {
+            "resources": len(self.index),
+            "dims": self.index.dims,
+            "fingerprint": self.index.fingerprint,
+            "queries": self.queries,
+            "query_us": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(samples[-1], 1) if samples else 0.0
+            }
+        }
+
+
+def catalogue_resources(catalog_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The resource list out of the support resources file"""
+    return list(catalog_data.get("mental_health_resources", {}).get("resources", []))
+
+
+# Worker-wide recommender, loaded by init_resource_recommender() during startup
+resource_recommender = ResourceRecommender(
+    directory=settings.RESOURCE_INDEX_DIR,
+    dims=settings.RESOURCE_INDEX_DIMS,
+    top_k=settings.CHAT_RESOURCES_TOP_K,
+    min_score=settings.CHAT_RESOURCES_MIN_SCORE
+)
+
+
+async def init_resource_recommender(resources: Iterable[Dict[str, Any]]) -> ResourceRecommender:
+    """Map (building first if needed) the vector index for the resource catalogue"""
+    index = await resource_recommender.reload(list(resources))
+    print(f"🧭 Resource index ready ({len(index)} resources, {index.dims} dims)")
+    return resource_recommender
+
+
+def get_resource_recommender(connection: HTTPConnection) -> ResourceRecommender:
+    """
+    Resource recommender dependency for FastAPI endpoints
+    Usage: recommender: ResourceRecommender = Depends(get_resource_recommender)
+    """
+    return getattr(connection.app.state, "resource_recommender", resource_recommender)
@@ -0,0 +1,192 @@
+"""
+Filtered search over the mental health resources (inverted index)
+"""
+
+import base64
+import hashlib
+import json
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from starlette.requests import HTTPConnection
+
+from app.services.resource_index import terms
+
+
+def encode_search_cursor(doc_id: int) -> str:
+    """Opaque cursor pointing just past `doc_id`"""
+    return base64.urlsafe_b64encode(f"r:{doc_id}".encode("ascii")).decode("ascii")
+
+
+def decode_search_cursor(cursor: str) -> int:
+    """Parse a cursor produced by encode_search_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii")
+        prefix, doc_id = raw.split(":", 1)
+        if prefix != "r":
+            raise ValueError(prefix)
+        return int(doc_id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
+def _digest(resource: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(resource, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _resource_key(resource: Dict[str, Any]) -> str:
+    return str(resource.get("id") or resource.get("url") or resource.get("title") or "")
+
+
+def _normalize(value: str) -> str:
+    return value.strip().lower()
+
+
+def _postings_keys(resource: Dict[str, Any]) -> set:
+    keys = {f"tag:{_normalize(tag)}" for tag in resource.get("tags", [])}
+    if resource.get("type"):
+        keys.add(f"type:{_normalize(resource['type'])}")
+    text = " ".join([resource.get("title", ""), resource.get("description", ""), " ".join(resource.get("tags", []))])
+    keys.update(f"term:{term}" for term in terms(text))
+    return keys
+
+
+def _intersect(postings: List[List[int]], after: int, limit: int) -> List[int]:
+    """
+    Up to `limit` ids greater than `after` present in every posting list
+    Walks the shortest list and binary-searches the others from a moving
+    lower bound, so the cost follows the rarest filter rather than the catalogue size
+    """
+    postings = sorted(postings, key=len)
+    shortest, others = postings[0], postings[1:]
+    bounds = [0] * len(others)
+    hits: List[int] = []
+    for doc_id in shortest[bisect_right(shortest, after):]:
+        for i, other in enumerate(others):
+            position = bisect_left(other, doc_id, bounds[i])
+            bounds[i] = position
+            if position == len(other):
+                return hits  # This list is exhausted; nothing further can match
+            if other[position] != doc_id:
+                break
+        else:
+            hits.append(doc_id)
+            if len(hits) == limit:
+                break
+    return hits
+
+
+class ResourceSearchIndex:
+    """
+    Tag, type and word posting lists over the resource catalogue
+    Every indexed version of a resource gets a fresh, increasing id, so
+    posting lists stay sorted by appending and cursors (the last id served)
+    stay valid across updates.
+    """
+
+    def __init__(self):
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        self._keys: Dict[str, Tuple[int, str]] = {}  # resource key -> (doc id, content digest)
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._all: List[int] = []
+        self._next_id = 1
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _add(self, resource: Dict[str, Any]) -> int:
+        doc_id = self._next_id
+        self._next_id += 1
+        self._docs[doc_id] = resource
+        self._all.append(doc_id)
+        for key in _postings_keys(resource):
+            self._postings[key].append(doc_id)
+        return doc_id
+
+    def _remove(self, doc_id: int) -> None:
+        resource = self._docs.pop(doc_id)
+        self._discard(self._all, doc_id)
+        for key in _postings_keys(resource):
+            postings = self._postings[key]
+            self._discard(postings, doc_id)
+            if not postings:
+                del self._postings[key]
+
+    @staticmethod
+    def _discard(postings: List[int], doc_id: int) -> None:
+        position = bisect_left(postings, doc_id)
+        if position < len(postings) and postings[position] == doc_id:
+            del postings[position]
+
+    def update(self, resources: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Bring the index in line with `resources`
+        Only added, changed and removed resources touch the posting lists
+        """
+        seen: Dict[str, Tuple[Dict[str, Any], str]] = {}
+        for resource in resources:
+            key = _resource_key(resource)
+            duplicate = 1
+            while key in seen:
+                duplicate += 1
+                key = f"{_resource_key(resource)}#{duplicate}"
+            seen[key] = (resource, _digest(resource))
+
+        changes = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        for key in [key for key in self._keys if key not in seen]:
+            self._remove(self._keys.pop(key)[0])
+            changes["removed"] += 1
+        for key, (resource, digest) in seen.items():
+            current = self._keys.get(key)
+            if current is not None and current[1] == digest:
+                changes["unchanged"] += 1
+                continue
+            if current is not None:
+                self._remove(current[0])
+                changes["updated"] += 1
+            else:
+                changes["added"] += 1
+            self._keys[key] = (self._add(resource), digest)
+        return changes
+
+    def search(self, q: Optional[str] = None, tags: Iterable[str] = (), type: Optional[str] = None,
+               limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Resources matching every tag, the type and every word of `q`
+        Returns (page, next_cursor); next_cursor is None on the last page
+        """
+        after = decode_search_cursor(cursor) if cursor else 0
+        required = {f"tag:{_normalize(tag)}" for tag in tags if tag.strip()}
+        if type:
+            required.add(f"type:{_normalize(type)}")
+        if q:
+            required.update(f"term:{term}" for term in terms(q))
+
+        if any(key not in self._postings for key in required):
+            return [], None
+        postings = [self._postings[key] for key in required] or [self._all]
+        hits = _intersect(postings, after, limit + 1)
+        next_cursor = encode_search_cursor(hits[limit - 1]) if len(hits) > limit else None
+        return [self._docs[doc_id] for doc_id in hits[:limit]], next_cursor
+
+    def stats(self) -> Dict[str, Any]:
+        return {"resources": len(self._docs), "posting_lists": len(self._postings)}
+
+
+# Worker-wide search index, filled by init_resource_search() during startup
+resource_search_index = ResourceSearchIndex()
+
+
+async def init_resource_search(resources: Iterable[Dict[str, Any]]) -> ResourceSearchIndex:
+    """Index the resource catalogue for filtered search"""
+    resource_search_index.update(resources)
+    print(f"🔎 Resource search ready ({len(resource_search_index)} resources)")
+    return resource_search_index
+
+
+def get_resource_search_index(connection: HTTPConnection) -> ResourceSearchIndex:
+    """
+    Resource search index dependency for FastAPI endpoints
+    Usage: index: ResourceSearchIndex = Depends(get_resource_search_index)
+    """
+    return getattr(connection.app.state, "resource_search_index", resource_search_index)
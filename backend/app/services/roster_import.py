@@ -0,0 +1,357 @@
+"""
+Bulk student roster import
+"""
+
+import asyncio
+import csv
+import json
+import os
+import re
+import secrets
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Tuple
+from passlib.context import CryptContext
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.user import User
+
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+ROSTER_FORMATS = ("csv", "ndjson")
+
+# One bcrypt context per cost factor, built lazily inside each worker process
+_contexts: Dict[int, CryptContext] = {}
+
+
+def _hash_secrets(plain: List[str], rounds: int) -> List[str]:
+    """Hash a chunk of passwords / invite tokens (runs in a worker process)"""
+    context = _contexts.get(rounds)
+    if context is None:
+        context = _contexts[rounds] = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    return [context.hash(secret) for secret in plain]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream (e.g. a request body) into text lines without buffering it whole"""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+
+async def iter_file_lines(path: str) -> AsyncIterator[str]:
+    """Lines of a roster file on disk"""
+    with open(path, encoding="utf-8-sig", newline="") as roster:
+        for line in roster:
+            yield line.rstrip("\r\n")
+
+
+async def parse_roster(lines: AsyncIterator[str], roster_format: str) -> AsyncIterator[Dict[str, str]]:
+    """
+    Roster rows from CSV (header row with email, name and optional password)
+    or NDJSON (one JSON object per line). Malformed lines yield an empty row,
+    which the importer counts as invalid.
+    """
+    if roster_format not in ROSTER_FORMATS:
+        raise ValueError(f"Unsupported roster format: {roster_format}")
+
+    if roster_format == "ndjson":
+        async for line in lines:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row if isinstance(row, dict) else {}
+        return
+
+    # One reader over the whole stream, handed lines a record at a time, so
+    # quoted fields spanning several lines stay intact
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    header: Optional[List[str]] = None
+    quoted = False
+    async for line in lines:
+        if not quoted and not line.strip():
+            continue
+        feed.lines.append(line + "\n")
+        quoted = _ends_quoted(line, quoted)
+        if quoted:
+            continue
+        record = next(reader)
+        if header is None:
+            header = [field.strip().lower() for field in record]
+        else:
+            yield dict(zip(header, record))
+    if quoted and header is not None:
+        yield {}  # A quote left open at the end of the roster
+
+
+class _LineFeed:
+    """Lines queued for a csv.reader; only ever read up to the end of a complete record"""
+
+    def __init__(self):
+        self.lines: Deque[str] = deque()
+
+    def __iter__(self) -> "_LineFeed":
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+def _ends_quoted(line: str, quoted: bool) -> bool:
+    """Whether a CSV record is still inside a quoted field at the end of `line`"""
+    field_start = not quoted
+    closed = False  # Just closed a quote: a second one is an escaped quote ("")
+    for char in line:
+        if quoted:
+            if char == '"':
+                quoted, closed = False, True
+        elif char == '"' and (field_start or closed):
+            quoted, closed = True, False
+        else:
+            field_start, closed = char == ",", False
+    return quoted
+
+
+@dataclass
+class ImportReport:
+    """Outcome of a roster import"""
+    rows_read: int = 0
+    created: int = 0
+    existing: int = 0  # Already registered
+    duplicates: int = 0  # Repeated within the roster
+    invalid: int = 0
+    invites: int = 0  # Rows without a password that got an invite token
+    resumed_from: int = 0  # Rows skipped thanks to a checkpoint
+    restarted: bool = False  # The checkpoint was of a finished import, so this run started over
+    elapsed_seconds: float = 0.0
+
+    @property
+    def users_per_second(self) -> float:
+        return self.created / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            **asdict(self),
+            "elapsed_seconds": round(self.elapsed_seconds, 2),
+            "users_per_second": round(self.users_per_second, 1)
+        }
+
+
+class RosterImporter:
+    """
+    Imports a roster in batches
+    For each batch: normalise and validate rows, drop emails already in the
+    roster or in `users` (one IN query on the unique email index), bcrypt the
+    passwords / invite tokens across a process pool, then bulk-insert with
+    ON CONFLICT DO NOTHING on the email index and commit. Progress is written
+    to `checkpoint_path` after every commit so an interrupted import can be
+    re-run with the same roster and picks up after the last committed batch.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        workers: Optional[int] = None,
+        batch_size: int = 1000,
+        rounds: int = settings.BCRYPT_ROUNDS,
+        checkpoint_path: Optional[str] = None
+    ):
+        self.session_factory = session_factory
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.rounds = rounds
+        self.checkpoint_path = checkpoint_path
+        self._seen: Set[str] = set()
+
+    async def run(
+        self,
+        rows: AsyncIterator[Dict[str, str]],
+        on_invites: Optional[Callable[[List[Tuple[str, str]]], None]] = None,
+        on_progress: Optional[Callable[[ImportReport], None]] = None
+    ) -> ImportReport:
+        """
+        Import every row; invite tokens for password-less rows are passed to `on_invites`
+        Tokens are handed over before their batch is committed, so an
+        interruption can't leave accounts whose token was never seen. A batch
+        that is retried after a failed commit issues new tokens for its rows:
+        the last token given for an email is the valid one. `on_invites` runs in
+        a worker thread, so it can write and fsync a file without stalling the
+        event loop.
+        """
+        checkpoint = self._load_checkpoint()
+        if checkpoint.get("complete"):
+            # Resuming a finished import would skip every row; go through the roster again
+            # (rows imported last time are counted as existing)
+            report = ImportReport(restarted=True)
+        else:
+            report = ImportReport(**checkpoint.get("report", {}))
+            report.resumed_from = checkpoint.get("rows_done", 0)
+        started = time.perf_counter() - report.elapsed_seconds
+
+        position = 0
+        batch: List[Dict[str, str]] = []
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            async for row in rows:
+                position += 1
+                if position <= report.resumed_from:
+                    continue
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    await self._import_batch(pool, batch, report, on_invites)
+                    report.elapsed_seconds = time.perf_counter() - started
+                    self._save_checkpoint(position, report)
+                    if on_progress:
+                        on_progress(report)
+                    batch = []
+            if batch:
+                await self._import_batch(pool, batch, report, on_invites)
+
+        report.elapsed_seconds = time.perf_counter() - started
+        self._save_checkpoint(max(position, report.resumed_from), report, complete=True)
+        return report
+
+    async def _import_batch(
+        self,
+        pool: ProcessPoolExecutor,
+        batch: List[Dict[str, str]],
+        report: ImportReport,
+        on_invites: Optional[Callable[[List[Tuple[str, str]]], None]]
+    ) -> None:
+        report.rows_read += len(batch)
+        candidates: Dict[str, Dict[str, Optional[str]]] = {}
+        for row in batch:
+            email = str(row.get("email") or "").strip().lower()
+            if not EMAIL_PATTERN.match(email) or len(email) > 255:
+                report.invalid += 1
+                continue
+            if email in self._seen:
+                report.duplicates += 1
+                continue
+            self._seen.add(email)
+            candidates[email] = {
+                "name": str(row.get("name") or "").strip()[:255] or email.split("@")[0],
+                "password": str(row.get("password") or "") or None
+            }
+        if not candidates:
+            return
+
+        async with self.session_factory() as db:
+            existing = (await db.execute(select(User.email).where(User.email.in_(list(candidates))))).scalars().all()
+        for email in existing:
+            del candidates[email]
+        report.existing += len(existing)
+        if not candidates:
+            return
+
+        # Students without a password get a random invite token as their initial password.
+        # Nothing forces a change after first use; it stays valid until they change it
+        invites = [(email, secrets.token_urlsafe(24)) for email, row in candidates.items() if not row["password"]]
+        invite_tokens = dict(invites)
+        emails = list(candidates)
+        plain = [candidates[email]["password"] or invite_tokens[email] for email in emails]
+        # Hashed with no session open, so the batch doesn't hold a pooled connection for seconds
+        hashed = await self._hash_all(pool, plain)
+
+        values = [
+            {"email": email, "name": candidates[email]["name"], "hashed_password": password_hash, "is_active": True}
+            for email, password_hash in zip(emails, hashed)
+        ]
+        if invites and on_invites:
+            await asyncio.to_thread(on_invites, invites)
+        async with self.session_factory() as db:
+            # Core execution (not ORM bulk insert) so rowcount reports rows actually inserted
+            connection = await db.connection()
+            result = await connection.execute(self._insert_statement(connection.dialect.name), values)
+            await db.commit()
+
+        inserted = result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(values)
+        report.created += inserted
+        report.existing += len(values) - inserted  # Registered concurrently since the check
+        report.invites += len(invites)
+
+    async def _hash_all(self, pool: ProcessPoolExecutor, plain: List[str]) -> List[str]:
+        """Spread one batch over every worker process"""
+        loop = asyncio.get_running_loop()
+        size = max(1, -(-len(plain) // self.workers))
+        chunks = [plain[i:i + size] for i in range(0, len(plain), size)]
+        hashed = await asyncio.gather(*(
+            loop.run_in_executor(pool, _hash_secrets, chunk, self.rounds) for chunk in chunks
+        ))
+        return [value for chunk in hashed for value in chunk]
+
+    @staticmethod
+    def _insert_statement(dialect: str):
+        if dialect == "postgresql":
+            return postgresql.insert(User).on_conflict_do_nothing(index_elements=[User.email])
+        if dialect == "sqlite":
+            return sqlite.insert(User).on_conflict_do_nothing(index_elements=[User.email])
+        return insert(User)
+
+    def _load_checkpoint(self) -> Dict[str, object]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, encoding="utf-8") as checkpoint:
+            data = json.load(checkpoint)
+        for field in ("resumed_from", "restarted"):
+            data.get("report", {}).pop(field, None)
+        return data
+
+    def _save_checkpoint(self, rows_done: int, report: ImportReport, complete: bool = False) -> None:
+        if not self.checkpoint_path:
+            return
+        state = {"rows_done": rows_done, "complete": complete, "report": asdict(report)}
+        # Write-then-rename so a crash never leaves a truncated checkpoint
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as checkpoint:
+            json.dump(state, checkpoint)
+        os.replace(tmp_path, self.checkpoint_path)
+
+
+def checkpoint_path_for(import_id: str) -> str:
+    """Checkpoint file for an admin-endpoint import"""
+    os.makedirs(settings.ROSTER_IMPORT_CHECKPOINT_DIR, exist_ok=True)
+    return os.path.join(settings.ROSTER_IMPORT_CHECKPOINT_DIR, f"{import_id}.json")
+
+
+def invites_path_for(import_id: str) -> str:
+    """Invite tokens issued so far by an admin-endpoint import (email,invite_token CSV)"""
+    os.makedirs(settings.ROSTER_IMPORT_CHECKPOINT_DIR, exist_ok=True)
+    return os.path.join(settings.ROSTER_IMPORT_CHECKPOINT_DIR, f"{import_id}.invites.csv")
+
+
+def append_invites(path: str, invites: List[Tuple[str, str]]) -> None:
+    """Add a batch of invite tokens to `path`, flushed to disk (blocking: RosterImporter calls it off the event loop)"""
+    with open(path, "a", newline="", encoding="utf-8") as invites_file:
+        csv.writer(invites_file).writerows(invites)
+        invites_file.flush()
+        os.fsync(invites_file.fileno())
+
+
+def read_invites(path: str) -> List[Tuple[str, str]]:
+    """Invite tokens in `path`, one per email (the last one issued wins)"""
+    if not os.path.exists(path):
+        return []
+    tokens: Dict[str, str] = {}
+    with open(path, newline="", encoding="utf-8") as invites_file:
+        for row in csv.reader(invites_file):
+            if len(row) == 2:
+                tokens.pop(row[0], None)
+                tokens[row[0]] = row[1]
+    return list(tokens.items())
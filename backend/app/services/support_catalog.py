@@ -0,0 +1,112 @@
+"""
+Static support resources, pre-serialized for conditional GETs
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from starlette.requests import HTTPConnection
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.responses import dumps
+
+
+DEFAULT_SUPPORT_RESOURCES_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "support_resources.json")
+
+# Sections every support resources file must provide
+PAYLOAD_NAMES = ("emergency_contacts", "mental_health_resources")
+
+
+@dataclass(frozen=True)
+class StaticPayload:
+    """A JSON body serialized once, with its strong ETag"""
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_data(cls, data: Any) -> "StaticPayload":
+        # Same encoding as the app's default response class
+        body = dumps(data)
+        return cls(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Weak comparison, as If-None-Match requires (a W/ prefix is ignored)"""
+        if not if_none_match:
+            return False
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate == "*" or candidate.removeprefix("W/") == self.etag:
+                return True
+        return False
+
+    def response(self, connection: HTTPConnection, max_age: int) -> Response:
+        """200 with the body, or 304 when the client already has it"""
+        headers = {"ETag": self.etag, "Cache-Control": f"public, max-age={max_age}"}
+        if self.matches(connection.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+class SupportCatalog:
+    """
+    Emergency contacts and mental health resources from a JSON data file
+    Each section is serialized to bytes once per load; reload() swaps in a new
+    set atomically and keeps the current one if the file is invalid.
+    """
+
+    def __init__(self, path: str = DEFAULT_SUPPORT_RESOURCES_FILE, max_age: int = 300):
+        self.path = path
+        self.max_age = max_age
+        self.data: Dict[str, Any] = {}
+        self.payloads: Dict[str, StaticPayload] = {}
+
+    def load(self) -> Dict[str, StaticPayload]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        missing = [name for name in PAYLOAD_NAMES if name not in data]
+        if missing:
+            raise ValueError(f"{self.path} is missing {', '.join(missing)}")
+
+        payloads = {name: StaticPayload.from_data(data[name]) for name in PAYLOAD_NAMES}
+        self.data, self.payloads = data, payloads
+        return payloads
+
+    async def reload(self) -> Dict[str, StaticPayload]:
+        """Re-read the data file without blocking the event loop"""
+        return await asyncio.to_thread(self.load)
+
+    def response(self, name: str, connection: HTTPConnection) -> Response:
+        """200 with the cached body, or 304 when the client already has it"""
+        return self.payloads[name].response(connection, self.max_age)
+
+    def etags(self) -> Dict[str, str]:
+        return {name: payload.etag for name, payload in self.payloads.items()}
+
+
+# Worker-wide catalog, loaded by init_support_catalog() during startup
+support_catalog = SupportCatalog(
+    path=settings.SUPPORT_RESOURCES_FILE or DEFAULT_SUPPORT_RESOURCES_FILE,
+    max_age=settings.SUPPORT_CACHE_MAX_AGE_SECONDS
+)
+
+
+async def init_support_catalog() -> SupportCatalog:
+    """Load and pre-serialize the support resources"""
+    await support_catalog.reload()
+    print(f"📚 Support resources loaded from {support_catalog.path}")
+    return support_catalog
+
+
+def get_support_catalog(connection: HTTPConnection) -> SupportCatalog:
+    """
+    Support catalog dependency for FastAPI endpoints
+    Usage: catalog: SupportCatalog = Depends(get_support_catalog)
+    """
+    catalog = getattr(connection.app.state, "support_catalog", support_catalog)
+    if not catalog.payloads:
+        catalog.load()  # App started without the lifespan (e.g. some test clients)
+    return catalog
@@ -2,105 +2,132 @@
 User management service
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from typing import Optional
 
+from app.core.auth import invalidate_user
+from app.core.security import PasswordHasher, password_hasher
+from app.models.chat import ChatMessage
+from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
+from app.services.chat_writer import ChatWriteQueue
+from app.services.conversation_cache import invalidate_conversation
 
 
 class UserService:
     """User management service class"""
     
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: AsyncSession,
+        hasher: Optional[PasswordHasher] = None,
+        writer: Optional[ChatWriteQueue] = None
+    ):
         self.db = db
+        self.hasher = hasher or password_hasher
+        self.writer = writer
     
     async def get_user_by_id(self, user_id: int) -> Optional[UserResponse]:
         """
         Get user by ID
         """
-        # TODO: Implement user lookup
-        # user = self.db.query(User).filter(User.id == user_id).first()
-        # return UserResponse.from_orm(user) if user else None
-        
-        # Placeholder implementation
-        if user_id == 1:
-            return UserResponse(
-                id=1,
-                email="user@example.com",
-                name="Test User",
-                is_active=True,
-                created_at="2024-01-01T00:00:00Z"
-            )
-        return None
+        user = await self.db.get(User, user_id)
+        return UserResponse.model_validate(user) if user else None
     
     async def get_user_by_email(self, email: str) -> Optional[UserResponse]:
         """
         Get user by email
         """
-        # TODO: Implement user lookup by email
-        # user = self.db.query(User).filter(User.email == email).first()
-        # return UserResponse.from_orm(user) if user else None
-        
-        # Placeholder implementation
-        if email == "user@example.com":
-            return UserResponse(
-                id=1,
-                email="user@example.com",
-                name="Test User",
-                is_active=True,
-                created_at="2024-01-01T00:00:00Z"
-            )
-        return None
+        user = await self.get_user_record_by_email(email)
+        return UserResponse.model_validate(user) if user else None
+    
+    async def get_user_record_by_email(self, email: str) -> Optional[User]:
+        """
+        Get the user row (including the password hash) by email
+        """
+        result = await self.db.execute(select(User).where(User.email == email.lower()))
+        return result.scalar_one_or_none()
     
     async def create_user(self, user_data: UserCreate) -> UserResponse:
         """
         Create new user
         """
-        # TODO: Implement user creation
-        # 1. Check if user already exists
-        # 2. Hash password
-        # 3. Create user record
-        # 4. Return user response
+        if await self.get_user_record_by_email(user_data.email):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
         
-        # Placeholder implementation
-        return UserResponse(
-            id=2,
-            email=user_data.email,
+        # Hashed off the event loop
+        user = User(
+            email=user_data.email.lower(),
             name=user_data.name,
-            is_active=True,
-            created_at="2024-01-01T00:00:00Z"
+            hashed_password=await self.hasher.hash(user_data.password),
+            is_active=True
         )
+        self.db.add(user)
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            # Registered concurrently between the check and the insert
+            await self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+        await self.db.refresh(user)
+        return UserResponse.model_validate(user)
+    
+    async def update_password_hash(self, user_id: int, hashed_password: str) -> None:
+        """
+        Replace a stored password hash (e.g. after a cost factor upgrade)
+        """
+        await self.db.execute(update(User).where(User.id == user_id).values(hashed_password=hashed_password))
+        await self.db.commit()
+        invalidate_user(user_id)
     
     async def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[UserResponse]:
         """
         Update user information
         """
-        # TODO: Implement user update
-        # 1. Find user by ID
-        # 2. Update user fields
-        # 3. Save to database
-        # 4. Return updated user
+        user = await self.db.get(User, user_id)
+        if user is None:
+            return None
         
-        # Placeholder implementation
-        if user_id == 1:
-            return UserResponse(
-                id=1,
-                email="user@example.com",
-                name=user_data.name or "Updated User",
-                is_active=True,
-                created_at="2024-01-01T00:00:00Z"
-            )
-        return None
+        if user_data.name is not None:
+            user.name = user_data.name
+        if user_data.email is not None and user_data.email.lower() != user.email:
+            if await self.get_user_record_by_email(user_data.email):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Email already registered"
+                )
+            user.email = user_data.email.lower()
+        
+        await self.db.commit()
+        await self.db.refresh(user)
+        invalidate_user(user_id)
+        return UserResponse.model_validate(user)
     
     async def delete_user(self, user_id: int) -> bool:
         """
         Delete user account
         """
-        # TODO: Implement user deletion
-        # 1. Find user by ID
-        # 2. Soft delete or hard delete user
-        # 3. Return success status
+        # Turns still in the write-behind queue would otherwise be inserted after
+        # the delete, as orphan rows or foreign key failures
+        if self.writer is not None:
+            await self.writer.flush_user(user_id)
+        # Chat history references the user, so it goes first
+        await self.db.execute(delete(ChatMessage).where(ChatMessage.user_id == user_id))
+        result = await self.db.execute(delete(User).where(User.id == user_id))
+        if not result.rowcount:
+            await self.db.rollback()
+            return False
         
-        # Placeholder implementation
+        await self.db.commit()
+        invalidate_user(user_id)
+        invalidate_conversation(user_id)
         return True
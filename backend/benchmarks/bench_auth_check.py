@@ -0,0 +1,112 @@
+"""
+Benchmark: per-request cost of authenticating a bearer token
+Compares a full `verify_token` (jwt.decode with signature check) on every
+request with the cached TokenVerifier used by get_current_user, over a
+pool of active sessions. Then adds the revocation check, with and without
+revoked tokens present, against a plain revocation-table lookup per request.
+
+Usage: python benchmarks/bench_auth_check.py [requests] [sessions] [revoked]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.auth import TokenVerifier
+from app.core.database import Base
+from app.core.revocation import TokenRevocationList
+from app.core.security import create_access_token, verify_token
+from app.models.revoked_token import RevokedToken
+
+
+def report(label: str, elapsed: float, count: int) -> None:
+    print(f"  {label:<40} {elapsed * 1e6 / count:>8.2f} µs/request   {count / elapsed:>10,.0f} req/s")
+
+
+def measure(label: str, fn, tokens: list) -> float:
+    started = time.perf_counter()
+    for token in tokens:
+        assert fn(token) is not None
+    elapsed = time.perf_counter() - started
+    report(label, elapsed, len(tokens))
+    return elapsed
+
+
+async def measure_revocation(label: str, verifier: TokenVerifier, check, tokens: list) -> float:
+    started = time.perf_counter()
+    for token in tokens:
+        claims = verifier.verify(token)
+        await check(claims["jti"])
+    elapsed = time.perf_counter() - started
+    report(label, elapsed, len(tokens))
+    return elapsed
+
+
+async def revocation_store():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    revoked = int(sys.argv[3]) if len(sys.argv) > 3 else 50_000
+    session_tokens = [create_access_token({"sub": f"student{i}@example.com", "user_id": i}) for i in range(sessions)]
+    rng = random.Random(5)
+    traffic = [rng.choice(session_tokens) for _ in range(requests)]
+
+    print(f"⏱️  Auth check, {requests:,} requests over {sessions:,} active sessions")
+    print("=" * 72)
+    full = measure("jwt.decode every request", verify_token, traffic)
+    verifier = TokenVerifier(max_entries=sessions * 2)
+    cached = measure("TokenVerifier (claims cache)", verifier.verify, traffic)
+    print("=" * 72)
+    print(f"  Speed-up: {full / cached:.1f}x, cache hit rate {verifier.claims.stats()['hit_rate']:.1%}")
+
+    # Revocation check on top of the warm claims cache
+    engine, sessions_factory = await revocation_store()
+    revocations = TokenRevocationList(session_factory=sessions_factory)
+    await revocations.load()
+    print()
+    print(f"⏱️  Revocation check, {revoked:,} revoked tokens from logged-out sessions")
+    print("=" * 72)
+    await measure_revocation("no revocations present", verifier, revocations.is_revoked, traffic)
+
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=30)
+    async with sessions_factory() as db:
+        await db.execute(insert(RevokedToken), [
+            {"jti": f"logged-out-{i}", "expires_at": expires_at, "revoked_at": datetime.now(timezone.utc)}
+            for i in range(revoked)
+        ])
+        await db.commit()
+    await revocations.load()
+    bloom = await measure_revocation("Bloom filter, then store", verifier, revocations.is_revoked, traffic)
+    stats = revocations.stats()
+
+    async def table_lookup(jti: str) -> bool:
+        async with sessions_factory() as db:
+            return await db.get(RevokedToken, jti) is not None
+
+    lookup_count = min(requests, 10_000)
+    table = await measure_revocation("revocation table every request", verifier, table_lookup, traffic[:lookup_count])
+    print("=" * 72)
+    print(f"  Store lookups: {stats['store_lookups']:,} of {stats['checks']:,} checks "
+          f"({stats['false_positives']:,} false positives), filter {stats['bloom_bits'] // 8 // 1024:,} KiB")
+    print(f"  Speed-up over a table lookup: {(table / lookup_count) / (bloom / requests):.1f}x")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
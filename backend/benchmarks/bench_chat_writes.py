@@ -0,0 +1,95 @@
+"""
+Benchmark: chat message inserts/sec, per-row commits vs write-behind batches
+Writes the same chat turns into a temporary SQLite database once with one
+commit per turn (what a synchronous write in the request would do) and once
+through ChatWriteQueue, then reports throughput and flush latency.
+
+Usage: python benchmarks/bench_chat_writes.py [rows] [concurrency]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models import ChatMessage
+from app.services.chat_writer import ChatWriteQueue
+
+
+def make_row(i: int) -> dict:
+    return {
+        "user_id": i % 100 + 1,
+        "message": f"I'm feeling stressed about exam number {i}",
+        "response": "That sounds like a lot to carry. Let's break it into smaller steps together.",
+        "mood_analysis": "stressed",
+        "suggestions": '["Take a 10-minute break from studying"]',
+        "companion_avatar": "ai-companion-1.png"
+    }
+
+
+async def run_in_parallel(rows: int, concurrency: int, fn) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await fn(make_row(i))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(rows)))
+    return time.perf_counter() - started
+
+
+async def fresh_database(tmp: str, name: str):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, name)}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    print(f"⏱️  Chat message persistence, {rows} turns @ concurrency {concurrency}")
+    print("=" * 72)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, sessions = await fresh_database(tmp, "per_row.db")
+        # SQLite allows one writer at a time; concurrent commits would fail with
+        # "database is locked", so per-row writers take turns
+        write_lock = asyncio.Lock()
+
+        async def per_row(row: dict):
+            async with write_lock, sessions() as db:
+                await db.execute(insert(ChatMessage), [row])
+                await db.commit()
+
+        elapsed = await run_in_parallel(rows, concurrency, per_row)
+        print(f"  per-row commit      {rows / elapsed:>10,.0f} inserts/s")
+        await engine.dispose()
+
+        engine, sessions = await fresh_database(tmp, "batched.db")
+        queue = ChatWriteQueue(session_factory=sessions, batch_size=500, flush_interval=0.05)
+        queue.start()
+        started = time.perf_counter()
+        await run_in_parallel(rows, concurrency, queue.enqueue)
+        await queue.stop()
+        elapsed = time.perf_counter() - started
+        stats = queue.stats()
+        print(f"  write-behind queue  {rows / elapsed:>10,.0f} inserts/s   "
+              f"{stats['batches']} batches, avg flush {stats['avg_flush_ms']} ms, max {stats['max_flush_ms']} ms")
+        await engine.dispose()
+
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
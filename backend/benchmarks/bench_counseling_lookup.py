@@ -0,0 +1,94 @@
+"""
+Benchmark: counseling-service lookups by location name and by coordinates
+Builds CounselingServiceIndex over a synthetic directory (services clustered
+around campuses) and compares its prefix and nearest-k queries with a
+linear scan over the same list.
+
+Usage: python benchmarks/bench_counseling_lookup.py [services] [queries]
+"""
+
+import heapq
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.counseling_index import CounselingServiceIndex, haversine_km, normalize
+
+SYLLABLES = ["ash", "bel", "cor", "dun", "el", "fair", "glen", "har", "iver", "kel", "lin", "mar",
+             "nor", "oak", "port", "ridge", "sal", "ton", "vale", "wood", "ford", "by", "ton", "field"]
+
+
+def directory(services: int, rng: random.Random):
+    campuses = []
+    for i in range(max(1, services // 25)):
+        city = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title()
+        campuses.append((city, f"{city} University", rng.uniform(-60, 70), rng.uniform(-180, 180)))
+    rows = []
+    for i in range(services):
+        city, campus, lat, lon = rng.choice(campuses)
+        rows.append({
+            "name": f"{city} Counseling Service {i}",
+            "campus": campus if rng.random() < 0.3 else None,
+            "city": city,
+            "latitude": lat + rng.gauss(0, 0.2),
+            "longitude": lon + rng.gauss(0, 0.2)
+        })
+    return rows, campuses
+
+
+def measure(label: str, fn, queries: list) -> float:
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    mean = statistics.fmean(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"  {label:<34} mean {mean:>9.1f} µs   p99 {p99:>9.1f} µs")
+    return mean
+
+
+def main():
+    services = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    rng = random.Random(16)
+    rows, campuses = directory(services, rng)
+
+    started = time.perf_counter()
+    index = CounselingServiceIndex(rows)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    prefixes = [rng.choice(campuses)[0][:rng.randint(3, 8)] for _ in range(queries)]
+    points = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(queries)]
+
+    def scan_location(prefix):
+        query = normalize(prefix)
+        return [row for row in rows if normalize(row["city"]).startswith(query)][:10]
+
+    def scan_nearest(point):
+        lat, lon = point
+        return heapq.nsmallest(10, ((haversine_km(lat, lon, r["latitude"], r["longitude"]), i) for i, r in enumerate(rows)))
+
+    print(f"⏱️  Counseling lookup, {services:,} services around {len(campuses):,} campuses "
+          f"(index built in {build_ms:.0f} ms)")
+    print("=" * 72)
+    scan_count = min(queries, 100)
+    indexed = measure("location prefix, index", lambda q: index.search(location=q, limit=10), prefixes)
+    scanned = measure("location prefix, linear scan", scan_location, prefixes[:scan_count])
+    print(f"  {'':<34} {scanned / indexed:.0f}x faster")
+    indexed = measure("nearest 10, k-d tree", lambda p: index.search(lat=p[0], lon=p[1], limit=10), points)
+    scanned = measure("nearest 10, linear scan", scan_nearest, points[:scan_count])
+    print(f"  {'':<34} {scanned / indexed:.0f}x faster")
+    measure("prefix + nearest 10", lambda q: index.search(location=q[0], lat=q[1][0], lon=q[1][1], limit=10),
+            list(zip(prefixes, points)))
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
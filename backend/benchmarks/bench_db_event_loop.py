@@ -0,0 +1,110 @@
+"""
+Benchmark: event-loop latency under mixed DB + LLM load
+Simulates concurrent chat requests that each run a DB query and then await an
+LLM call, once with a synchronous SQLAlchemy session used inside `async def`
+(the old get_db) and once with the AsyncSession from app.core.database.
+A probe task measures how late the event loop wakes it up.
+
+Runs offline against a temporary SQLite file.
+Usage: python benchmarks/bench_db_event_loop.py [requests] [concurrency]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import get_async_database_url
+
+
+ROWS = 200_000
+LLM_LATENCY = 0.05  # Simulated upstream call
+QUERY = text("SELECT count(*), avg(length(payload)) FROM bench_rows WHERE grp = :grp")
+
+
+def seed(url: str) -> None:
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE bench_rows (id INTEGER PRIMARY KEY, grp INTEGER, payload TEXT)"))
+        conn.execute(
+            text("INSERT INTO bench_rows (grp, payload) VALUES (:grp, :payload)"),
+            [{"grp": i % 50, "payload": "x" * (i % 200)} for i in range(ROWS)]
+        )
+    engine.dispose()
+
+
+async def probe(samples: list, stop: asyncio.Event, interval: float = 0.005) -> None:
+    """Record how far past its deadline the loop resumes a sleeping task"""
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+
+async def run(label: str, handler, requests: int, concurrency: int) -> None:
+    lags: list = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await handler(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+
+    lags.sort()
+    p99 = lags[max(0, int(len(lags) * 0.99) - 1)]
+    print(f"  {label:<14} {requests / elapsed:>8.1f} req/s   loop lag p50 {statistics.median(lags):>7.2f} ms"
+          f"   p99 {p99:>7.2f} ms   max {lags[-1]:>7.2f} ms")
+
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        seed(url)
+
+        sync_engine = create_engine(url)
+        SyncSession = sessionmaker(bind=sync_engine)
+        async_engine = create_async_engine(get_async_database_url(url))
+        AsyncSession = async_sessionmaker(async_engine)
+
+        async def sync_handler(i: int):
+            # What an `async def` endpoint did with the old sync get_db
+            with SyncSession() as db:
+                db.execute(QUERY, {"grp": i % 50}).one()
+            await asyncio.sleep(LLM_LATENCY)
+
+        async def async_handler(i: int):
+            async with AsyncSession() as db:
+                (await db.execute(QUERY, {"grp": i % 50})).one()
+            await asyncio.sleep(LLM_LATENCY)
+
+        print(f"⏱️  Event-loop latency, {requests} requests @ concurrency {concurrency}")
+        print("=" * 86)
+        await run("sync Session", sync_handler, requests, concurrency)
+        await run("AsyncSession", async_handler, requests, concurrency)
+        print("=" * 86)
+
+        sync_engine.dispose()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
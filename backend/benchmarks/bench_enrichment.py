@@ -0,0 +1,82 @@
+"""
+Benchmark: chat latency with enrichment stages run after the LLM vs the pipeline
+Simulates an LLM call plus two model-backed enrichment stages and compares
+the old sequential flow (LLM, then mood, then suggestions) with
+EnrichmentPipeline, where stages run during the LLM call and slow ones
+are deferred to the follow-up endpoint.
+
+Usage: python benchmarks/bench_enrichment.py [requests] [llm_ms] [stage_ms]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.enrichment import EnrichmentInput, EnrichmentPipeline, EnrichmentStage
+
+
+def simulated_stage(delay: float):
+    async def run(data: EnrichmentInput):
+        await asyncio.sleep(delay)
+        return data.message[:10]
+    return run
+
+
+async def sequential(message: str, llm: float, stage: float) -> float:
+    started = time.perf_counter()
+    await asyncio.sleep(llm)
+    await simulated_stage(stage)(EnrichmentInput(message))
+    await simulated_stage(stage)(EnrichmentInput(message))
+    return time.perf_counter() - started
+
+
+async def pipelined(pipeline: EnrichmentPipeline, stages: list, i: int, message: str, llm: float) -> float:
+    started = time.perf_counter()
+    run = pipeline.begin(str(i), EnrichmentInput(message), stages, user_id=1)
+    await asyncio.sleep(llm)
+    run.set_response("reply")
+    await run.collect()
+    return time.perf_counter() - started
+
+
+def report(label: str, samples: list) -> None:
+    samples = sorted(s * 1000 for s in samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"  {label:<38} p50 {statistics.median(samples):>7.1f} ms   p95 {p95:>7.1f} ms")
+
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    llm = (int(sys.argv[2]) if len(sys.argv) > 2 else 400) / 1000
+    stage = (int(sys.argv[3]) if len(sys.argv) > 3 else 150) / 1000
+    message = "I'm stressed about my exams and can't sleep"
+
+    print(f"⏱️  Chat latency, {requests} requests, LLM {llm * 1000:.0f} ms, stages {stage * 1000:.0f} ms each")
+    print("=" * 72)
+    report("sequential (LLM -> mood -> suggestions)",
+           await asyncio.gather(*(sequential(message, llm, stage) for _ in range(requests))))
+
+    pipeline = EnrichmentPipeline(inline_budget=0.05, max_results=requests * 2, result_ttl_seconds=60)
+    stages = [EnrichmentStage("mood_insights", simulated_stage(stage)),
+              EnrichmentStage("suggestions", simulated_stage(stage))]
+    report("pipeline (stages during LLM)",
+           await asyncio.gather(*(pipelined(pipeline, stages, i, message, llm) for i in range(requests))))
+
+    # A stage that needs the reply and overruns the inline budget gets deferred
+    slow = stages + [EnrichmentStage("summary", simulated_stage(stage), needs_response=True)]
+    report("pipeline + deferred post-LLM stage",
+           await asyncio.gather(*(pipelined(pipeline, slow, requests + i, message, llm) for i in range(requests))))
+    await asyncio.sleep(stage)
+    complete = sum(pipeline.get(str(requests + i), user_id=1)["status"] == "complete" for i in range(requests))
+    print("=" * 72)
+    print(f"  Deferred stages completed in background: {complete}/{requests}")
+    await pipeline.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
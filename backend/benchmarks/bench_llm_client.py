@@ -0,0 +1,72 @@
+"""
+Micro-benchmark: per-request AI chat setup cost
+Compares building a Gemini client + prompt chain for every request (old behaviour)
+with reusing the app-scoped LLM registry (current behaviour).
+
+Runs fully offline - no request is sent to Gemini.
+Usage: python benchmarks/bench_llm_client.py [iterations]
+"""
+
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder-key")
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from app.core.config import settings
+from app.core.llm import LLMRegistry, SYSTEM_PROMPT
+from app.services.ai_chat_service import AIChatService
+
+
+def per_request_setup() -> None:
+    """What every endpoint used to do before handling a message"""
+    llm = ChatGoogleGenerativeAI(
+        model=settings.LLM_MODEL,
+        google_api_key=settings.GOOGLE_API_KEY,
+        temperature=0.7,
+        max_tokens=1000
+    )
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", SYSTEM_PROMPT),
+        ("human", "{user_message}")
+    ])
+    prompt | llm
+
+
+def measure(label: str, fn, iterations: int) -> float:
+    """Run fn repeatedly and return mean microseconds per call"""
+    fn()  # warm imports and caches
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    per_call_us = elapsed / iterations * 1_000_000
+    print(f"  {label:<32} {per_call_us:>12.1f} µs/request")
+    return per_call_us
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    print("⏱️  AI chat per-request setup overhead")
+    print("=" * 56)
+
+    registry = LLMRegistry()
+    registry.build()
+
+    before = measure("per-request client (before)", per_request_setup, iterations)
+    after = measure("shared registry (after)", lambda: AIChatService(None, registry), iterations)
+
+    print("=" * 56)
+    print(f"  Speed-up: {before / after:,.0f}x  ({before - after:,.1f} µs saved per request)")
+    print("  Note: the shared registry also keeps the upstream connection open,")
+    print("  so real requests additionally skip TCP/TLS setup to Gemini.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: LLM admission under load, FIFO semaphore vs fair dispatcher
+Simulates upstream calls of fixed latency. The first scenario has one chatty
+user sending a burst ahead of several regular users; the second is an
+exam-week spike far beyond what the queue can hold.
+
+Usage: python benchmarks/bench_llm_dispatch.py [llm_ms] [concurrency]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.llm_dispatcher import LLMDispatcher, LLMQueueFull
+
+
+async def fifo_call(semaphore: asyncio.Semaphore, llm: float) -> float:
+    started = time.perf_counter()
+    async with semaphore:
+        await asyncio.sleep(llm)
+    return time.perf_counter() - started
+
+
+async def fair_call(dispatcher: LLMDispatcher, user: int, llm: float) -> float:
+    started = time.perf_counter()
+    async with dispatcher.slot(user):
+        await asyncio.sleep(llm)
+    return time.perf_counter() - started
+
+
+def report(label: str, samples: list) -> None:
+    samples = [s * 1000 for s in samples]
+    print(f"  {label:<38} p50 {statistics.median(samples):>7.0f} ms   max {max(samples):>7.0f} ms")
+
+
+async def chatty_user(llm: float, concurrency: int) -> None:
+    chatty_burst, regular_users = 40, 10
+    print(f"⏱️  One user bursts {chatty_burst} messages, then {regular_users} users send one each "
+          f"(LLM {llm * 1000:.0f} ms, {concurrency} slots)")
+    print("=" * 72)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    chatty = [asyncio.create_task(fifo_call(semaphore, llm)) for _ in range(chatty_burst)]
+    await asyncio.sleep(0)
+    regular = await asyncio.gather(*(fifo_call(semaphore, llm) for _ in range(regular_users)))
+    await asyncio.gather(*chatty)
+    report("FIFO semaphore, regular users", regular)
+
+    dispatcher = LLMDispatcher(max_concurrency=concurrency, max_queued=100, max_queued_per_user=100)
+    chatty = [asyncio.create_task(fair_call(dispatcher, 0, llm)) for _ in range(chatty_burst)]
+    await asyncio.sleep(0)
+    regular = await asyncio.gather(*(fair_call(dispatcher, user, llm) for user in range(1, regular_users + 1)))
+    await asyncio.gather(*chatty)
+    report("round-robin dispatcher, regular users", regular)
+    print("=" * 72)
+
+
+async def spike(llm: float, concurrency: int) -> None:
+    requests = 1000
+    print(f"⏱️  Spike of {requests} requests from {requests} users")
+    print("=" * 72)
+    dispatcher = LLMDispatcher(max_concurrency=concurrency, max_queued=64)
+    rejected_after = []
+
+    async def one(user: int):
+        started = time.perf_counter()
+        try:
+            await fair_call(dispatcher, user, llm)
+        except LLMQueueFull:
+            rejected_after.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(user) for user in range(requests)))
+    elapsed = time.perf_counter() - started
+    stats = dispatcher.stats()
+    print(f"  admitted {stats['admitted']}, rejected {stats['rejected']} "
+          f"(429 after max {max(rejected_after, default=0) * 1000:.2f} ms)")
+    print(f"  queue wait p50 {stats['queue_wait_ms']['p50']} ms, p95 {stats['queue_wait_ms']['p95']} ms; "
+          f"drained in {elapsed:.1f}s")
+    print("=" * 72)
+
+
+async def main():
+    llm = (int(sys.argv[1]) if len(sys.argv) > 1 else 200) / 1000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    await chatty_user(llm, concurrency)
+    print()
+    await spike(llm, concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,204 @@
+"""
+Benchmark: LLM circuit breaker and hedged requests
+Drives LLMGuard with a simulated upstream (no Gemini calls). During an
+outage, calls should fail fast once the circuit opens, and a single probe
+should close it again after the reset timeout. With a slow tail of
+upstream calls, hedging should cut p99 while hedging no more than
+LLM_HEDGE_MAX_RATIO of calls. Exits 1 if any of these checks fails.
+
+Usage: python benchmarks/bench_llm_guard.py [calls] [slow_share]
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage
+
+from app.core.config import settings
+from app.core.llm_guard import CircuitBreaker, CircuitOpen, LLMGuard
+
+
+FAST_MS = (30, 50)  # Usual upstream latency range
+SLOW_MS = 500       # Latency of the slow tail
+FAILURE_MS = 300    # Time an upstream takes to fail during the outage
+
+
+class UpstreamError(RuntimeError):
+    """Simulated upstream failure"""
+
+
+class SimulatedUpstream:
+    """Stand-in for `prompt | llm`: a seeded latency distribution and an outage switch"""
+
+    def __init__(self, slow_share: float = 0.0, seed: int = 0):
+        self.slow_share = slow_share
+        self.failing = False
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        if self.failing:
+            await asyncio.sleep(FAILURE_MS / 1000)
+            raise UpstreamError("Simulated outage")
+        slow = self._rng.random() < self.slow_share
+        await asyncio.sleep((SLOW_MS if slow else self._rng.uniform(*FAST_MS)) / 1000)
+        return AIMessage(content="reply")
+
+    async def astream(self, inputs):
+        """Sends its first chunk, then dies mid-stream while `failing`"""
+        self.calls += 1
+        await asyncio.sleep(FAST_MS[0] / 1000)
+        yield AIMessage(content="re")
+        if self.failing:
+            raise UpstreamError("Simulated disconnect mid-stream")
+        yield AIMessage(content="ply")
+
+
+def percentile(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(len(ordered) * p / 100 + 0.5) - 1))]
+
+
+def check(ok: bool, label: str, failures: list) -> None:
+    print(f"  {'✅' if ok else '❌'} {label}")
+    if not ok:
+        failures.append(label)
+
+
+async def timed(guard: LLMGuard, upstream: SimulatedUpstream):
+    """(milliseconds, outcome) for one call: "ok", "failed" or "short-circuited" """
+    started = time.perf_counter()
+    try:
+        await guard.invoke(upstream, {"user_message": "hi"})
+        outcome = "ok"
+    except CircuitOpen:
+        outcome = "short-circuited"
+    except UpstreamError:
+        outcome = "failed"
+    return (time.perf_counter() - started) * 1000, outcome
+
+
+async def outage(failures: list) -> None:
+    reset = 0.5
+    breaker = CircuitBreaker(failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD, reset_timeout=reset)
+    guard = LLMGuard(breaker, deadline_seconds=5.0)
+    upstream = SimulatedUpstream()
+    upstream.failing = True
+    print(f"⏱️  Upstream outage: every call fails after {FAILURE_MS} ms "
+          f"(breaker opens after {breaker.failure_threshold} failures)")
+    print("=" * 72)
+
+    results = [await timed(guard, upstream) for _ in range(50)]
+    for outcome in ("failed", "short-circuited"):
+        samples = [ms for ms, result in results if result == outcome]
+        if samples:
+            print(f"  {outcome:<16} {len(samples):>4} calls   p50 {statistics.median(samples):>9.3f} ms   "
+                  f"max {max(samples):>9.3f} ms")
+    short = [ms for ms, result in results if result == "short-circuited"]
+    check(upstream.calls == breaker.failure_threshold,
+          f"upstream saw {upstream.calls} calls, then the circuit opened", failures)
+    check(bool(short) and max(short) < 1.0, "short-circuited calls fail in under 1 ms", failures)
+
+    # Recovery: after the reset timeout, a burst of calls sends exactly one probe upstream
+    upstream.failing = False
+    await asyncio.sleep(reset)
+    before = upstream.calls
+    burst = await asyncio.gather(*(timed(guard, upstream) for _ in range(10)))
+    probes = upstream.calls - before
+    print(f"  after {reset:g}s: a burst of 10 calls sent {probes} probe upstream, "
+          f"{sum(result == 'short-circuited' for _, result in burst)} short-circuited; circuit {breaker.state}")
+    check(probes == 1 and breaker.state == CircuitBreaker.CLOSED, "one probe closed the circuit", failures)
+
+    # A call admitted before the circuit opened can neither free the probe slot nor decide the probe
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    stale = breaker.acquire()
+    breaker.record(breaker.acquire(), False)
+    await asyncio.sleep(0.06)
+    breaker.acquire()
+    breaker.release(stale)
+    breaker.record(stale, True)
+    try:
+        breaker.acquire()
+        second_probe = True
+    except CircuitOpen:
+        second_probe = False
+    check(not second_probe and breaker.state == CircuitBreaker.HALF_OPEN,
+          "an older call ending mid-probe lets no second probe through", failures)
+
+    # Streams that die after their first chunk count as failures too
+    breaker = CircuitBreaker(failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD, reset_timeout=reset)
+    guard = LLMGuard(breaker, deadline_seconds=5.0)
+    upstream = SimulatedUpstream()
+    upstream.failing = True
+    for _ in range(breaker.failure_threshold):
+        try:
+            async for _chunk in guard.stream(upstream, {"user_message": "hi"}):
+                pass
+        except UpstreamError:
+            pass
+    check(breaker.state == CircuitBreaker.OPEN,
+          f"{breaker.failure_threshold} streams dying mid-way opened the circuit", failures)
+    print("=" * 72)
+
+
+async def run_calls(guard: LLMGuard, upstream: SimulatedUpstream, calls: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return (await timed(guard, upstream))[0]
+
+    return await asyncio.gather(*(one() for _ in range(calls)))
+
+
+async def hedging(calls: int, slow_share: float, failures: list) -> None:
+    concurrency = 8
+    print(f"⏱️  {calls} calls, {concurrency} at a time; {slow_share:.0%} take {SLOW_MS} ms, "
+          f"the rest {FAST_MS[0]}-{FAST_MS[1]} ms")
+    print("=" * 72)
+    baseline_p99 = None
+    for hedge in (False, True):
+        breaker = CircuitBreaker(slow_call_seconds=SLOW_MS / 1000 * 2)
+        guard = LLMGuard(breaker, hedge=hedge, hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+                         hedge_min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+                         hedge_max_ratio=settings.LLM_HEDGE_MAX_RATIO)
+        upstream = SimulatedUpstream(slow_share, seed=1)
+        samples = await run_calls(guard, upstream, calls, concurrency)
+        label = f"hedged at p{settings.LLM_HEDGE_PERCENTILE:g}" if hedge else "no hedging"
+        print(f"  {label:<16} p50 {statistics.median(samples):>6.1f} ms   p95 {percentile(samples, 95):>6.1f} ms   "
+              f"p99 {percentile(samples, 99):>6.1f} ms   upstream calls {upstream.calls}")
+        if hedge:
+            ratio = guard.hedges / guard.calls
+            print(f"  {'':<16} {guard.hedges} hedges ({ratio:.1%} of calls), {guard.hedge_wins} answered first")
+            check(ratio <= settings.LLM_HEDGE_MAX_RATIO,
+                  f"hedged share {ratio:.1%} within LLM_HEDGE_MAX_RATIO ({settings.LLM_HEDGE_MAX_RATIO:.0%})", failures)
+        p99 = percentile(samples, 99)
+        if baseline_p99 is None:
+            baseline_p99 = p99
+        else:
+            check(p99 < baseline_p99, "hedging lowered p99", failures)
+    print("=" * 72)
+
+
+async def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    slow_share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.04
+    failures: list = []
+    await outage(failures)
+    print()
+    await hedging(calls, slow_share, failures)
+    if failures:
+        print(f"❌ {len(failures)} check(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
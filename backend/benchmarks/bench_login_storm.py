@@ -0,0 +1,125 @@
+"""
+Benchmark: login storm, bcrypt on the event loop vs the hashing pool
+Fires concurrent logins at /auth/login while a probe keeps calling an
+unrelated endpoint, once with bcrypt called inline in the async handler (what
+using pwd_context directly would do) and once through PasswordHasher.
+Reports login throughput and the probe's latency percentiles.
+
+Usage: python benchmarks/bench_login_storm.py [logins] [concurrency] [workers]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.v1.endpoints import auth
+from app.core.config import settings
+from app.core.database import Base, get_db
+from app.core.security import PasswordHasher, pwd_context
+from app.models.user import User
+
+
+EMAIL = "storm@example.com"
+PASSWORD = "correct horse battery staple"
+
+
+class InlineHasher(PasswordHasher):
+    """Calls bcrypt directly on the event loop"""
+
+    async def _run(self, fn, *args):
+        return fn(*args)
+
+
+def build_app(sessions, hasher: PasswordHasher) -> FastAPI:
+    app = FastAPI()
+    app.state.password_hasher = hasher
+
+    async def override_db():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_db
+    app.include_router(auth.router, prefix="/auth")
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def storm(app: FastAPI, logins: int, concurrency: int):
+    latencies = []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def probe():
+            # Latency is measured from when each ping was due, so a blocked loop
+            # can't hide its stalls by delaying the probe (coordinated omission)
+            interval = 0.01
+            due = time.perf_counter()
+            while not done.is_set():
+                await client.get("/ping")
+                latencies.append((time.perf_counter() - due) * 1000)
+                due += interval
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login():
+            async with semaphore:
+                response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+                assert response.status_code == 200, response.text
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return logins / elapsed, statistics.median(latencies), p99
+
+
+async def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else settings.PASSWORD_HASH_WORKERS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'users.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        async with sessions() as db:
+            db.add(User(email=EMAIL, name="Storm", hashed_password=pwd_context.hash(PASSWORD)))
+            await db.commit()
+
+        print(f"⏱️  {logins} logins @ concurrency {concurrency}, bcrypt cost {settings.BCRYPT_ROUNDS}, "
+              f"{os.cpu_count()} CPUs")
+        print("=" * 72)
+        for label, hasher in [
+            ("bcrypt on the event loop", InlineHasher()),
+            (f"hashing pool ({workers} threads)", PasswordHasher(workers=workers, max_pending=logins))
+        ]:
+            throughput, p50, p99 = await storm(build_app(sessions, hasher), logins, concurrency)
+            hasher.shutdown()
+            print(f"  {label:<28} {throughput:>6.1f} logins/s   /ping p50 {p50:>7.1f} ms   p99 {p99:>7.1f} ms")
+        print("=" * 72)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Benchmark: compiled mood lexicon vs the previous nested substring scan
+Scores a large synthetic corpus of student messages with the old
+`_analyze_mood` algorithm (dict rebuilt per call, `any(keyword in text)` per
+emotion), the compiled lexicon one message at a time, and the batch API.
+
+Usage: python benchmarks/bench_mood_lexicon.py [messages]
+"""
+
+import os
+import random
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.mood_lexicon import MOOD_LEXICON, Lexicon, analyze_mood, analyze_mood_many
+
+
+LEGACY_KEYWORDS = {
+    "anxious": ["anxious", "worried", "nervous", "panic", "fear"],
+    "stressed": ["stressed", "overwhelmed", "pressure", "exam", "deadline"],
+    "sad": ["sad", "depressed", "down", "lonely", "empty"],
+    "angry": ["angry", "frustrated", "annoyed", "mad", "upset"],
+    "happy": ["happy", "good", "great", "excited", "joy"],
+    "tired": ["tired", "exhausted", "sleepy", "fatigue", "worn out"],
+    "confused": ["confused", "lost", "uncertain", "unclear", "don't know"]
+}
+
+
+def legacy_analyze_mood(message: str, mood_keywords: dict = None) -> dict:
+    """The keyword matcher AIChatService used before the lexicon engine"""
+    mood_keywords = dict(mood_keywords or LEGACY_KEYWORDS)  # was rebuilt on every call
+    message_lower = message.lower()
+    detected_emotions = []
+    for emotion, keywords in mood_keywords.items():
+        if any(keyword in message_lower for keyword in keywords):
+            detected_emotions.append(emotion)
+    primary_emotion = detected_emotions[0] if detected_emotions else "neutral"
+    return {
+        "detected_emotion": primary_emotion,
+        "confidence": 0.8 if detected_emotions else 0.5,
+        "all_emotions": detected_emotions
+    }
+
+
+OPENERS = ["I'm", "I feel", "Honestly I'm", "Lately I've been", "Today I am", "I'm not", "I don't feel"]
+FEELINGS = ["stressed", "anxious", "worn out", "lonely", "happy", "confused", "frustrated", "exhausted",
+            "okay", "overwhelmed", "nervous", "sad", "excited", "lost"]
+TOPICS = ["about my exams", "because of the deadline", "since moving to campus", "after the lecture",
+          "and I don't know why", "with my flatmates", "about my thesis", "at night", "this semester"]
+FILLER = ["my roommate keeps the lights on until late and it's been hard to focus on anything",
+          "the library was packed so I ended up studying in the corridor for hours",
+          "my family keeps calling to ask about grades and it adds more pressure",
+          ""]
+
+
+def synthetic_corpus(size: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(OPENERS)} {rng.choice(FEELINGS)} {rng.choice(TOPICS)}. {rng.choice(FILLER)}"
+        for _ in range(size)
+    ]
+
+
+def measure(label: str, fn, corpus: list) -> float:
+    started = time.perf_counter()
+    fn(corpus)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<30} {len(corpus) / elapsed:>12,.0f} msgs/s   {elapsed * 1e6 / len(corpus):>7.2f} µs/msg")
+    return elapsed
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    corpus = synthetic_corpus(size)
+
+    print(f"⏱️  Mood analysis over {size:,} synthetic messages")
+    print("=" * 72)
+    legacy = measure("legacy substring scan", lambda c: [legacy_analyze_mood(m) for m in c], corpus)
+    single = measure("compiled lexicon (per message)", lambda c: [analyze_mood(m) for m in c], corpus)
+    batch = measure("compiled lexicon (batch API)", analyze_mood_many, corpus)
+    print("=" * 72)
+    print(f"  Speed-up vs legacy: {legacy / single:.1f}x per message, {legacy / batch:.1f}x batched")
+
+    # Where the two disagree, e.g. negation ("I'm not stressed") and word boundaries ("mad" in "made")
+    changed = sum(
+        legacy_analyze_mood(m)["detected_emotion"] != analyze_mood(m)["detected_emotion"]
+        for m in corpus[:10_000]
+    )
+    print(f"  Primary emotion differs on {changed / min(size, 10_000):.1%} of messages "
+          "(negation, word boundaries, explicit priority)")
+
+    # A production lexicon is far larger than the starter word lists
+    expanded = {
+        label: terms + [f"{label}{i}word" for i in range(60)]
+        for label, terms in MOOD_LEXICON.items()
+    }
+    expanded_lexicon = Lexicon(expanded)
+    keywords = sum(len(terms) for terms in expanded.values())
+    sample = corpus[:20_000]
+    print()
+    print(f"⏱️  Same corpus, expanded lexicon ({keywords} keywords)")
+    print("=" * 72)
+    legacy = measure("legacy substring scan", lambda c: [legacy_analyze_mood(m, expanded) for m in c], sample)
+    single = measure("compiled lexicon (per message)", lambda c: [expanded_lexicon.score(m) for m in c], sample)
+    batch = measure("compiled lexicon (batch API)", expanded_lexicon.score_many, sample)
+    print("=" * 72)
+    print(f"  Speed-up vs legacy: {legacy / single:.1f}x per message, {legacy / batch:.1f}x batched")
+
+
+if __name__ == "__main__":
+    main()
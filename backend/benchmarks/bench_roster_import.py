@@ -0,0 +1,77 @@
+"""
+Benchmark: onboarding a roster, one create_user call per student vs RosterImporter
+Both paths hash with the same bcrypt cost factor into fresh SQLite databases.
+
+Usage: python benchmarks/bench_roster_import.py [students] [rounds] [workers]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.core.security import PasswordHasher
+from app.schemas.user import UserCreate
+from app.services.roster_import import RosterImporter
+from app.services.user_service import UserService
+
+
+def roster(students: int):
+    return [
+        {"email": f"student{i}@uni.example.com", "name": f"Student {i}", "password": f"password-{i}"}
+        for i in range(students)
+    ]
+
+
+async def fresh_database(tmp: str, name: str):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, name)}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def rows_of(items):
+    for item in items:
+        yield item
+
+
+async def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+    rows = roster(students)
+
+    print(f"⏱️  Importing {students:,} students, bcrypt cost {rounds}, {workers} workers")
+    print("=" * 72)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, sessions = await fresh_database(tmp, "per_user.db")
+        hasher = PasswordHasher(CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds), workers=workers)
+        started = time.perf_counter()
+        async with sessions() as db:
+            service = UserService(db, hasher)
+            for row in rows:
+                await service.create_user(UserCreate(**row))
+        elapsed = time.perf_counter() - started
+        hasher.shutdown()
+        print(f"  create_user per student   {students / elapsed:>8,.0f} users/s   {elapsed:>6.1f}s")
+        await engine.dispose()
+
+        engine, sessions = await fresh_database(tmp, "bulk.db")
+        importer = RosterImporter(session_factory=sessions, workers=workers, batch_size=1000, rounds=rounds)
+        report = await importer.run(rows_of(rows))
+        print(f"  RosterImporter            {report.users_per_second:>8,.0f} users/s   "
+              f"{report.elapsed_seconds:>6.1f}s")
+        await engine.dispose()
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+Benchmark: response serialization cost for list payloads
+Encodes ChatHistoryResponse pages and mood entry lists of 10 / 1k / 10k items
+the way FastAPI does by default (validate against response_model, then
+json.dumps), with the same validation but orjson, and as trusted rows
+returned straight in a FastJSONResponse.
+
+Usage: python benchmarks/bench_serialization.py [repeats]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.responses import FastJSONResponse
+from app.schemas.chat import ChatHistoryResponse
+from app.schemas.mood import MoodEntryResponse
+
+SIZES = (10, 1_000, 10_000)
+LABELS = ["content", "anxious", "stressed", "hopeful", "tired", "peaceful", "lonely", "motivated"]
+SENTENCES = ["I have three deadlines this week and can't sleep.",
+             "It sounds like a lot is landing at once. Let's break the week into smaller steps.",
+             "Talked to my flatmate today, felt better.",
+             "That's good to hear. Keeping in touch with people around you really helps."]
+
+
+def chat_history(size: int, rng: random.Random) -> dict:
+    started = datetime(2024, 1, 1, 9, 0, 0)
+    messages = [
+        {
+            "id": i + 1,
+            "content": rng.choice(SENTENCES),
+            "sender": "user" if i % 2 == 0 else "assistant",
+            "timestamp": started + timedelta(minutes=i // 2, microseconds=rng.randrange(1_000_000)),
+            "companion_avatar": None if i % 2 == 0 else f"/avatars/companion-{rng.randint(1, 6)}.png"
+        }
+        for i in range(size)
+    ]
+    return {"messages": messages, "total": len(messages), "next_cursor": "MjAyNC0wMS0wMVQwOTowMDowMHwx"}
+
+
+def mood_entries(size: int, rng: random.Random) -> list:
+    # Keys in MoodEntryResponse field order, as a row mapping would produce them
+    started = datetime(2024, 1, 1, 21, 0, 0)
+    return [
+        {
+            "score": round(rng.random(), 2),
+            "labels": rng.sample(LABELS, 2),
+            "notes": rng.choice([None, "Had a good day at university", "Exam tomorrow"]),
+            "id": i + 1,
+            "user_id": 42,
+            "postcard_url": None,
+            "created_at": started + timedelta(days=i)
+        }
+        for i in range(size)
+    ]
+
+
+async def default_path(field, content) -> bytes:
+    return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+
+async def validated_orjson_path(field, content) -> bytes:
+    return FastJSONResponse(await serialize_response(field=field, response_content=content)).body
+
+
+async def trusted_path(field, content) -> bytes:
+    return FastJSONResponse(content).body
+
+
+PATHS = [
+    ("response_model + json.dumps", default_path),
+    ("response_model + orjson", validated_orjson_path),
+    ("trusted rows + orjson", trusted_path)
+]
+
+
+async def measure(field, content, repeats: int) -> List[float]:
+    """Best-of-`repeats` time (ms) for each path"""
+    results = []
+    for _, path in PATHS:
+        best = float("inf")
+        for _ in range(repeats):
+            started = time.perf_counter()
+            await path(field, content)
+            best = min(best, time.perf_counter() - started)
+        results.append(best * 1000)
+    return results
+
+
+async def run(repeats: int):
+    rng = random.Random(11)
+    cases = [
+        ("ChatHistoryResponse", create_response_field(name="history", type_=ChatHistoryResponse), chat_history),
+        ("List[MoodEntryResponse]", create_response_field(name="moods", type_=List[MoodEntryResponse]), mood_entries)
+    ]
+    print(f"⏱️  Response serialization, best of {repeats} runs")
+    for name, field, generate in cases:
+        print("=" * 72)
+        print(f"  {name}")
+        for size in SIZES:
+            content = generate(size, rng)
+            # The fast paths must produce the same document
+            assert (await trusted_path(field, content)) == (await validated_orjson_path(field, content))
+            timings = await measure(field, content, repeats)
+            body_kb = len(await trusted_path(field, content)) / 1024
+            print(f"  {size:>6,} items ({body_kb:>7.1f} KiB)")
+            for (label, _), elapsed in zip(PATHS, timings):
+                print(f"    {label:<30} {elapsed:>9.2f} ms   {timings[0] / elapsed:>5.1f}x")
+    print("=" * 72)
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    asyncio.run(run(repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: upstream LLM calls for retried / double-tapped chat messages
+Each simulated user sends the same message several times within a few
+milliseconds (frontend retry, double tap). Compares the number of upstream
+calls and their total upstream time with and without single-flight coalescing.
+
+Usage: python benchmarks/bench_single_flight.py [users] [duplicates] [llm_ms]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.singleflight import SingleFlight
+
+
+class SimulatedUpstream:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def generate(self, message: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return f"reply to {message}"
+
+
+async def burst(users: int, duplicates: int, send) -> float:
+    rng = random.Random(3)
+
+    async def one(user: int, copy: int):
+        await asyncio.sleep(rng.uniform(0, 0.02))  # Retries land within ~20 ms
+        await send(user, f"I'm stressed about exams ({user})")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(user, copy) for user in range(users) for copy in range(duplicates)))
+    return time.perf_counter() - started
+
+
+async def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    duplicates = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    llm = (int(sys.argv[3]) if len(sys.argv) > 3 else 300) / 1000
+
+    print(f"⏱️  {users} users x {duplicates} identical sends, LLM {llm * 1000:.0f} ms")
+    print("=" * 72)
+
+    upstream = SimulatedUpstream(llm)
+    elapsed = await burst(users, duplicates, lambda user, message: upstream.generate(message))
+    print(f"  no coalescing   {upstream.calls:>6} upstream calls   {upstream.calls * llm:>7.1f}s upstream time   "
+          f"wall {elapsed:.2f}s")
+
+    upstream = SimulatedUpstream(llm)
+    single_flight = SingleFlight()
+    elapsed = await burst(users, duplicates, lambda user, message: single_flight.do(
+        (user, message, None), lambda: upstream.generate(message)
+    ))
+    print(f"  single-flight   {upstream.calls:>6} upstream calls   {upstream.calls * llm:>7.1f}s upstream time   "
+          f"wall {elapsed:.2f}s")
+    print("=" * 72)
+    print(f"  Calls saved: {single_flight.coalesced} of {users * duplicates}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
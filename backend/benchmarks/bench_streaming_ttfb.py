@@ -0,0 +1,148 @@
+"""
+Benchmark: time-to-first-byte of buffered vs streamed chat replies
+Serves the chat router with uvicorn on a local port, backed by a simulated
+LLM chain (no Gemini calls) and a throwaway SQLite database, and measures
+TTFB / total time over real HTTP for POST /chat/message and
+POST /chat/message/stream. Fails if any reply is the fallback, since then
+the error path was measured instead of the model.
+
+Usage: python benchmarks/bench_streaming_ttfb.py [requests]
+"""
+
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The engine is created at import, so point it at a throwaway database first
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='wellpal-ttfb-'), 'ttfb.db')}"
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from app.api.v1.endpoints import ai_chat
+from app.core.auth import get_current_user
+from app.core.database import close_db, init_db
+from app.core.llm import LLMRegistry
+from app.schemas.user import UserResponse
+from app.services.ai_chat_service import FALLBACK_RESPONSE
+from app.services.chat_writer import close_chat_writer, init_chat_writer
+from app.services.conversation_cache import init_conversation_cache
+from app.services.enrichment import close_enrichment, init_enrichment
+
+
+FIRST_TOKEN_DELAY = 0.30   # Upstream time until the model starts emitting
+TOKEN_DELAY = 0.02         # Gap between subsequent tokens
+TOKENS = ("It sounds like exams are weighing on you right now. "
+          "That is completely understandable, and you are not alone in it. ").split(" ")
+
+
+class SimulatedChain:
+    """Stand-in for `prompt | llm` with realistic generation timing"""
+
+    async def astream(self, inputs):
+        await asyncio.sleep(FIRST_TOKEN_DELAY)
+        for i, token in enumerate(TOKENS):
+            if i:
+                await asyncio.sleep(TOKEN_DELAY)
+            yield AIMessageChunk(content=token + " ")
+
+    async def ainvoke(self, inputs):
+        chunks = [chunk.content async for chunk in self.astream(inputs)]
+        return AIMessage(content="".join(chunks))
+
+
+async def build_app() -> FastAPI:
+    """The chat router with the schema and app-scoped services the lifespan would set up"""
+    await init_db()
+    registry = LLMRegistry()
+    registry.chain = SimulatedChain()
+    app = FastAPI()
+    app.state.llm = registry
+    app.state.chat_writer = await init_chat_writer()
+    app.state.enrichment = await init_enrichment()
+    app.state.conversation_cache = await init_conversation_cache()
+    # Benchmark traffic is sent as a fixed, already-authenticated student
+    student = UserResponse(id=1, email="student@example.com", name="Student", is_active=True,
+                           created_at=datetime.now(timezone.utc))
+    app.dependency_overrides[get_current_user] = lambda: student
+    app.include_router(ai_chat.router, prefix="/chat")
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def close_app() -> None:
+    await close_enrichment()
+    await close_chat_writer()
+    await close_db()
+
+
+async def time_request(client: httpx.AsyncClient, path: str):
+    """Return (ttfb_ms, total_ms, served the fallback) for one request"""
+    started = time.perf_counter()
+    ttfb = None
+    body = b""
+    # bypass_cache so every request reaches the simulated model
+    async with client.stream("POST", path, json={"message": "I'm stressed about exams", "bypass_cache": True}) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_raw():
+            if ttfb is None and chunk:
+                ttfb = time.perf_counter() - started
+            body += chunk
+    total = time.perf_counter() - started
+    return ttfb * 1000, total * 1000, FALLBACK_RESPONSE.encode("utf-8") in body
+
+
+def report(label: str, samples):
+    ttfbs = sorted(s[0] for s in samples)
+    totals = sorted(s[1] for s in samples)
+    p95 = ttfbs[max(0, int(len(ttfbs) * 0.95) - 1)]
+    print(f"  {label:<22} TTFB p50 {statistics.median(ttfbs):>7.1f} ms  "
+          f"p95 {p95:>7.1f} ms   total p50 {statistics.median(totals):>7.1f} ms")
+
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    port = free_port()
+    app = await build_app()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    print("⏱️  Chat time-to-first-byte (simulated LLM)")
+    print("=" * 78)
+    fallbacks = 0
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            for label, path in (("buffered /message", "/chat/message"),
+                                ("SSE /message/stream", "/chat/message/stream")):
+                samples = [await time_request(client, path) for _ in range(requests)]
+                fallbacks += sum(1 for sample in samples if sample[2])
+                report(label, samples)
+    finally:
+        server.should_exit = True
+        await server_task
+        await close_app()
+    print("=" * 78)
+    if fallbacks:
+        print(f"❌ {fallbacks} replies were the fallback response; these timings are of the error path")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,362 @@
+"""
+Load test: every API router at fixed concurrency levels, against a fake LLM
+Runs the whole application in-process (lifespan, middleware, a throwaway
+SQLite database) with LLM_PROVIDER=fake, so no Gemini calls are made, and
+drives each scenario with N concurrent clients for a fixed duration.
+Reports requests/sec and p50 / p95 / p99 latency per scenario and level.
+Results can be saved as a named baseline and later runs diffed against it;
+with --compare the exit status is 1 when any scenario regressed.
+
+Usage: python benchmarks/load_test.py [--concurrency 1 8 32] [--duration 5] [--scenario chat.message ...]
+                                      [--save NAME] [--compare NAME] [--threshold 15] [--url URL]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+PASSWORD = "LoadTest-Passw0rd"
+CHAT_MESSAGES = ["I have three deadlines this week and can't sleep.",
+                 "Feeling a bit lonely since moving into halls.",
+                 "Exams start on Monday and I'm panicking.",
+                 "Had a really good day today, actually!",
+                 "I keep procrastinating and then feel guilty about it.",
+                 "My flatmates are loud every night and I'm exhausted."]
+MOOD_NOTES = ["Had a good day at university", "Exam tomorrow", "Tired but okay", None]
+OWN_USERS = 32  # Accounts for a scenario with own_users; the more there are, the larger the share of cache hits
+
+
+class User(NamedTuple):
+    email: str
+    token: str
+
+
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    path: str
+    body: Optional[Callable[[User, int], Any]] = None  # (user, request number) -> JSON body
+    own_users: bool = False  # Gets accounts no other scenario has used (e.g. with no chat history)
+
+
+def login_body(user: User, i: int) -> dict:
+    return {"email": user.email, "password": PASSWORD}
+
+
+def mood_body(user: User, i: int) -> dict:
+    return {"score": round((i * 37 % 100) / 100, 2), "labels": ["stressed", "hopeful"],
+            "notes": MOOD_NOTES[i % len(MOOD_NOTES)]}
+
+
+def fresh_chat_body(user: User, i: int) -> dict:
+    # Skip the response cache so every request reaches the (fake) model
+    return {"message": CHAT_MESSAGES[i % len(CHAT_MESSAGES)], "bypass_cache": True}
+
+
+class ScriptedConversation:
+    """
+    Every user sends the same messages in the same order, starting from an empty history
+    The response cache key covers the conversation so far, and the fake LLM
+    is deterministic, so after the first LLM_CACHE_VARIANTS users have
+    reached a turn, everyone else's reply to it is a cache hit
+    """
+
+    def __init__(self):
+        self.turns: Counter = Counter()
+
+    def __call__(self, user: User, i: int) -> dict:
+        turn = self.turns[user.email]
+        self.turns[user.email] += 1
+        return {"message": CHAT_MESSAGES[turn % len(CHAT_MESSAGES)]}
+
+
+# At least one scenario per router in app/api/v1/api.py; admin-only and destructive routes are left out
+SCENARIOS = [
+    Scenario("auth.login", "POST", "/auth/login", login_body),
+    Scenario("users.me", "GET", "/users/me"),
+    Scenario("mood.create", "POST", "/mood/entries", mood_body),
+    Scenario("mood.entries", "GET", "/mood/entries"),
+    Scenario("mood.analytics", "GET", "/mood/analytics"),
+    Scenario("chat.message", "POST", "/chat/message", fresh_chat_body),
+    Scenario("chat.message.cached", "POST", "/chat/message", ScriptedConversation(), own_users=True),
+    Scenario("chat.stream", "POST", "/chat/message/stream", fresh_chat_body),
+    Scenario("chat.history", "GET", "/chat/history?limit=20"),
+    Scenario("support.emergency", "GET", "/support/emergency-contacts"),
+    Scenario("support.resources", "GET", "/support/mental-health-resources"),
+    Scenario("support.counseling", "GET", "/support/counseling-services?location=lon"),
+    Scenario("support.search", "GET", "/support/resources/search?q=sleep")
+]
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, users: List[User], concurrency: int,
+                       duration: float, warmup: float) -> Dict[str, Any]:
+    """Drive `scenario` with `concurrency` clients; requests started during warm-up aren't counted"""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    counter = itertools.count()
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+    last_finished = measure_from
+
+    async def worker(k: int) -> None:
+        nonlocal last_finished
+        # Each worker takes turns over its own share of the users, so no user has two requests in flight
+        mine = itertools.cycle(users[k::concurrency])
+        while True:
+            i = next(counter)
+            sent = time.perf_counter()
+            if sent >= deadline:
+                return
+            user = next(mine)
+            headers = {"Authorization": f"Bearer {user.token}"}
+            body = scenario.body(user, i) if scenario.body else None
+            try:
+                response = await client.request(scenario.method, scenario.path, json=body, headers=headers)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            finished = time.perf_counter()
+            if sent >= measure_from:
+                latencies.append(finished - sent)
+                statuses[status] += 1
+                last_finished = max(last_finished, finished)
+
+    await asyncio.gather(*(worker(k) for k in range(concurrency)))
+    latencies.sort()
+    elapsed = max(last_finished - measure_from, 1e-9)
+    errors = sum(count for status, count in statuses.items() if not (status.isdigit() and int(status) < 400))
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "statuses": dict(sorted(statuses.items()))
+    }
+
+
+async def create_users(client: httpx.AsyncClient, count: int, label: str = "shared") -> List[User]:
+    """At least one account per concurrent client, so per-user limits don't cap throughput"""
+    run_id = int(time.time())
+    users = []
+    for i in range(count):
+        email = f"loadtest-{run_id}-{label}-{i}@example.com"
+        response = await client.post("/auth/register", json={"email": email, "password": PASSWORD,
+                                                              "confirm_password": PASSWORD, "name": f"Student {i}"})
+        response.raise_for_status()
+        users.append(User(email, response.json()["access_token"]))
+    return users
+
+
+async def run_all(client: httpx.AsyncClient, scenarios: List[Scenario], levels: List[int], duration: float,
+                  warmup: float) -> Dict[str, Dict[str, Any]]:
+    users = await create_users(client, max(levels))
+    results = {}
+    print_header()
+    for scenario in scenarios:
+        scenario_users = users
+        if scenario.own_users:
+            scenario_users = await create_users(client, max(max(levels), OWN_USERS), scenario.name.replace(".", "-"))
+        for concurrency in levels:
+            result = await run_scenario(client, scenario, scenario_users, concurrency, duration, warmup)
+            results[f"{scenario.name}@{concurrency}"] = result
+            print_row(scenario.name, concurrency, result)
+    print("=" * 72)
+    return results
+
+
+async def run_in_process(scenarios: List[Scenario], levels: List[int], duration: float,
+                         warmup: float) -> Dict[str, Dict[str, Any]]:
+    # Imported here so configure_environment() has run before settings are read
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest/api/v1", timeout=60) as client:
+            return await run_all(client, scenarios, levels, duration, warmup)
+
+
+async def run_remote(url: str, scenarios: List[Scenario], levels: List[int], duration: float,
+                     warmup: float) -> Dict[str, Dict[str, Any]]:
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=url.rstrip("/") + "/api/v1", timeout=60, limits=limits) as client:
+        return await run_all(client, scenarios, levels, duration, warmup)
+
+
+def print_header() -> None:
+    print("=" * 72)
+    print(f"  {'scenario':<22}{'conc':>5}{'reqs':>7}{'err':>6}{'rps':>9}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}")
+    print("-" * 72)
+
+
+def print_row(name: str, concurrency: int, result: Dict[str, Any]) -> None:
+    print(f"  {name:<22}{concurrency:>5}{result['requests']:>7}{result['errors']:>6}{result['rps']:>9.1f}"
+          f"{result['p50_ms']:>8.1f}{result['p95_ms']:>8.1f}{result['p99_ms']:>8.1f}")
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Settings for the in-process app; must run before anything under app/ is imported"""
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_FIRST_TOKEN_MS"] = str(args.llm_first_token_ms)
+    os.environ["FAKE_LLM_TOKEN_MS"] = str(args.llm_token_ms)
+    os.environ["FAKE_LLM_ERROR_RATE"] = str(args.llm_error_rate)
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    if not os.environ.get("DATABASE_URL"):
+        database = os.path.join(tempfile.mkdtemp(prefix="wellpal-load-"), "load.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{database}"
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "target": args.url or "in-process",
+        "duration_seconds": args.duration,
+        "warmup_seconds": args.warmup,
+        "concurrency": args.concurrency,
+        "fake_llm": {"first_token_ms": args.llm_first_token_ms, "token_ms": args.llm_token_ms,
+                     "error_rate": args.llm_error_rate, "seed": args.seed},
+        "bcrypt_rounds": args.bcrypt_rounds
+    }
+
+
+def baseline_path(name: str) -> str:
+    """A bare name lives under benchmarks/baselines/; anything ending in .json is used as a path"""
+    return name if name.endswith(".json") else os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save_baseline(name: str, metadata: Dict[str, Any], results: Dict[str, Dict[str, Any]]) -> str:
+    path = baseline_path(name)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"metadata": metadata, "results": results}, f, indent=2)
+        f.write("\n")
+    return path
+
+
+def compare(baseline: Dict[str, Any], metadata: Dict[str, Any], results: Dict[str, Dict[str, Any]],
+            threshold: float) -> List[str]:
+    """Print per-scenario deltas against `baseline`; returns the keys that regressed"""
+    before = baseline["results"]
+    for key in ("target", "duration_seconds", "fake_llm", "bcrypt_rounds", "cpu_count"):
+        if baseline["metadata"].get(key) != metadata.get(key):
+            print(f"⚠️  {key} differs from the baseline ({baseline['metadata'].get(key)} vs {metadata.get(key)})")
+
+    regressions = []
+    print(f"  {'scenario@conc':<27}{'rps':>16}{'p95 ms':>18}{'p99 ms':>11}")
+    print("-" * 72)
+    for key, now in results.items():
+        was = before.get(key)
+        if was is None:
+            print(f"  {key:<27}{'(new)':>16}")
+            continue
+        rps_change = _change(was["rps"], now["rps"])
+        p95_change = _change(was["p95_ms"], now["p95_ms"])
+        p99_change = _change(was["p99_ms"], now["p99_ms"])
+        regressed = rps_change < -threshold or p95_change > threshold or now["errors"] > was["errors"]
+        if regressed:
+            regressions.append(key)
+        print(f"  {key:<27}{now['rps']:>9.1f} {rps_change:>+5.0f}%{now['p95_ms']:>11.1f} {p95_change:>+5.0f}%"
+              f"{p99_change:>+10.0f}%{'  ⚠️' if regressed else ''}")
+    skipped = len(before.keys() - results.keys())
+    if skipped:
+        print(f"  ({skipped} baseline entries not run)")
+    print("=" * 72)
+    return regressions
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Levels to run each scenario at")
+    parser.add_argument("--duration", type=float, default=5.0, help="Measured seconds per scenario and level")
+    parser.add_argument("--warmup", type=float, default=0.5, help="Unmeasured seconds before each measurement")
+    parser.add_argument("--scenario", nargs="+", choices=[s.name for s in SCENARIOS], help="Only run these scenarios")
+    parser.add_argument("--url", help="Load a running server instead (start it with LLM_PROVIDER=fake)")
+    parser.add_argument("--save", metavar="NAME", help="Save results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Diff against a saved baseline; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=15.0,
+                        help="Percent drop in rps or rise in p95 counted as a regression")
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-token-ms", type=float, default=20.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    scenarios = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    levels = sorted(set(args.concurrency))
+    baseline = None
+    if args.compare:
+        with open(baseline_path(args.compare), encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(f"⏱️  Load test: {len(scenarios)} scenarios x concurrency {levels}, {args.duration:g}s each "
+          f"({args.url or 'in-process, fake LLM'})")
+    if args.url:
+        results = asyncio.run(run_remote(args.url, scenarios, levels, args.duration, args.warmup))
+    else:
+        configure_environment(args)
+        results = asyncio.run(run_in_process(scenarios, levels, args.duration, args.warmup))
+
+    metadata = run_metadata(args)
+    if args.save:
+        print(f"💾 Baseline saved to {save_baseline(args.save, metadata, results)}")
+    if baseline is not None:
+        print(f"📊 Compared with {args.compare} ({baseline['metadata'].get('git_revision')}, "
+              f"{baseline['metadata'].get('created_at')})")
+        print("=" * 72)
+        regressions = compare(baseline, metadata, results, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) beyond {args.threshold:g}%: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.threshold:g}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Build the support resource vector index offline
+
+Usage:
+    python build_resource_index.py
+    python build_resource_index.py --resources app/data/support_resources.json --out .resource_index
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.config import settings
+from app.services.resource_index import ResourceIndex, build_resource_index, catalogue_resources
+from app.services.support_catalog import DEFAULT_SUPPORT_RESOURCES_FILE
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Vectorize the mental health resource catalogue")
+    parser.add_argument("--resources", default=settings.SUPPORT_RESOURCES_FILE or DEFAULT_SUPPORT_RESOURCES_FILE,
+                        help="Support resources JSON file")
+    parser.add_argument("--out", default=settings.RESOURCE_INDEX_DIR, help="Index directory")
+    parser.add_argument("--dims", type=int, default=settings.RESOURCE_INDEX_DIMS, help="Hashed feature dimensions")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with open(args.resources, "r", encoding="utf-8") as f:
+        resources = catalogue_resources(json.load(f))
+
+    started = time.perf_counter()
+    path = build_resource_index(resources, args.out, args.dims)
+    index = ResourceIndex.load(path)
+    print(f"✅ Indexed {len(index):,} resources x {index.dims:,} dims in "
+          f"{(time.perf_counter() - started) * 1000:.0f} ms -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Bulk-import a university student roster
+
+Usage:
+    python import_roster.py roster.csv
+    python import_roster.py roster.ndjson --invites invites.csv --workers 8
+    python import_roster.py roster.csv --restart   # ignore a previous checkpoint
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.config import settings
+from app.core.database import init_db, close_db
+from app.services.roster_import import ImportReport, RosterImporter, iter_file_lines, parse_roster
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Import students from a CSV or NDJSON roster")
+    parser.add_argument("roster", help="CSV with an email,name[,password] header, or NDJSON")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    parser.add_argument("--invites", help="CSV file that receives email,invite_token for rows without a password")
+    parser.add_argument("--workers", type=int, default=settings.ROSTER_IMPORT_WORKERS, help="Hashing processes")
+    parser.add_argument("--batch-size", type=int, default=settings.ROSTER_IMPORT_BATCH_SIZE)
+    parser.add_argument("--rounds", type=int, default=settings.BCRYPT_ROUNDS, help="bcrypt cost factor")
+    parser.add_argument("--checkpoint", help="Progress file (default: <roster>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Start over instead of resuming")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    roster_format = args.format or ("ndjson" if args.roster.endswith((".ndjson", ".jsonl")) else "csv")
+    checkpoint = args.checkpoint or f"{args.roster}.checkpoint.json"
+    if args.restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    await init_db()
+    importer = RosterImporter(
+        workers=args.workers,
+        batch_size=args.batch_size,
+        rounds=args.rounds,
+        checkpoint_path=checkpoint
+    )
+    print(f"📥 Importing {args.roster} ({roster_format}, {importer.workers} hashing processes)")
+
+    invites_file = open(args.invites, "a", newline="", encoding="utf-8") if args.invites else None
+    invites_writer = csv.writer(invites_file) if invites_file else None
+
+    def on_invites(invites):
+        if invites_writer:
+            invites_writer.writerows(invites)
+            invites_file.flush()
+
+    def on_progress(report: ImportReport):
+        print(f"  {report.rows_read:>8,} rows   {report.created:>8,} created   "
+              f"{report.users_per_second:>7,.1f} users/s")
+
+    try:
+        report = await importer.run(
+            parse_roster(iter_file_lines(args.roster), roster_format),
+            on_invites=on_invites,
+            on_progress=on_progress
+        )
+    finally:
+        if invites_file:
+            invites_file.close()
+        await close_db()
+
+    if report.restarted:
+        print(f"🔁 {checkpoint} was of a finished import; imported the roster again from the start")
+    if report.resumed_from:
+        print(f"↩️  Resumed after row {report.resumed_from:,}")
+    print(f"✅ {report.created:,} users created in {report.elapsed_seconds:.1f}s "
+          f"({report.users_per_second:,.1f} users/s)")
+    print(f"   {report.existing:,} already registered, {report.duplicates:,} duplicates, "
+          f"{report.invalid:,} invalid, {report.invites:,} invites issued")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,11 +5,25 @@ WellPal Backend API Server
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from contextlib import asynccontextmanager
 
 from app.api.v1.api import api_router
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, close_db
+from app.core.llm import init_llm, close_llm
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, metrics
+from app.core.profiling import ProfilingMiddleware, RequestProfiler
+from app.core.responses import FastJSONResponse
+from app.core.revocation import init_revocation, close_revocation
+from app.core.security import init_password_hasher, close_password_hasher
+from app.services.chat_writer import init_chat_writer, close_chat_writer
+from app.services.conversation_cache import init_conversation_cache
+from app.services.counseling_index import init_counseling_directory
+from app.services.enrichment import init_enrichment, close_enrichment
+from app.services.resource_index import catalogue_resources, init_resource_recommender
+from app.services.resource_search import init_resource_search
+from app.services.support_catalog import init_support_catalog
 
 
 @asynccontextmanager
@@ -22,13 +36,27 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🚀 WellPal Backend starting up...")
     await init_db()
+    app.state.revocation = await init_revocation()
+    app.state.llm = await init_llm()
+    app.state.password_hasher = await init_password_hasher()
+    app.state.chat_writer = await init_chat_writer()
+    app.state.enrichment = await init_enrichment()
+    app.state.conversation_cache = await init_conversation_cache()
+    app.state.support_catalog = await init_support_catalog()
+    app.state.counseling_directory = await init_counseling_directory()
+    app.state.resource_recommender = await init_resource_recommender(catalogue_resources(app.state.support_catalog.data))
+    app.state.resource_search_index = await init_resource_search(catalogue_resources(app.state.support_catalog.data))
     
     yield
     
     # Shutdown
     print("🛑 WellPal Backend shutting down...")
-    # TODO: Clean up database connections
-    # TODO: Stop background tasks
+    await close_enrichment()
+    await close_chat_writer()
+    await close_llm()
+    await close_password_hasher()
+    await close_revocation()
+    await close_db()
 
 
 # Create FastAPI application
@@ -38,6 +66,7 @@ app = FastAPI(
     version="1.0.0",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     debug=True  # 👈 add this
 )
 
@@ -55,6 +84,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        profiler=RequestProfiler(
+            directory=settings.PROFILE_DIR,
+            interval_ms=settings.PROFILE_INTERVAL_MS,
+            max_files=settings.PROFILE_MAX_FILES,
+            max_age_seconds=settings.PROFILE_MAX_AGE_HOURS * 3600,
+            max_concurrent=settings.PROFILE_MAX_CONCURRENT
+        ),
+        secret=settings.ADMIN_API_KEY,
+        sample_rate=settings.PROFILE_SAMPLE_RATE
+    )
+
+# Outermost, so recorded latency includes the other middleware
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -71,6 +118,13 @@ async def health_check():
     return {"status": "healthy", "service": "WellPal Backend"}
 
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        """Request, LLM and database metrics in the Prometheus text format"""
+        return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -10,34 +10,34 @@ import os
 sys.path.insert(0, os.path.dirname(__file__))
 
 from app.services.ai_chat_service import AIChatService
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal
+from app.core.llm import init_llm
 
 async def test_ai_chat():
     """Test the AI chat service"""
     print("🧪 Testing AI Chat Service...")
     
     try:
-        # Create a mock database session (for testing)
-        db = next(get_db())
-        
-        # Initialize AI service
-        ai_service = AIChatService(db)
-        
-        # Test message
-        test_message = "I'm feeling stressed about my exams"
-        print(f"📤 Sending test message: '{test_message}'")
-        
-        # Send message to AI
-        response = await ai_service.send_message(test_message)
-        
-        print("📥 AI Response:")
-        print(f"  Response: {response.response}")
-        print(f"  Suggestions: {response.suggestions}")
-        print(f"  Companion Avatar: {response.companion_avatar}")
-        
-        if response.mood_insights:
-            print(f"  Mood Insights: {response.mood_insights}")
-        
+        # Create a database session (for testing)
+        async with AsyncSessionLocal() as db:
+            # Initialize AI service
+            ai_service = AIChatService(db, await init_llm())
+            
+            # Test message
+            test_message = "I'm feeling stressed about my exams"
+            print(f"📤 Sending test message: '{test_message}'")
+            
+            # Send message to AI
+            response = await ai_service.send_message(test_message)
+            
+            print("📥 AI Response:")
+            print(f"  Response: {response.response}")
+            print(f"  Suggestions: {response.suggestions}")
+            print(f"  Companion Avatar: {response.companion_avatar}")
+            
+            if response.mood_insights:
+                print(f"  Mood Insights: {response.mood_insights}")
+            
         print("✅ AI Chat Service test completed successfully!")
         
     except Exception as e:
@@ -0,0 +1,59 @@
+"""
+Write-behind queue vs history purges: queued turns must not outlive a clear
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.core.llm import LLMRegistry
+from app.models import ChatMessage, User
+from app.services.ai_chat_service import AIChatService
+from app.services.chat_writer import ChatWriteQueue
+
+
+async def _queued_turn_then_clear() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'chat.db')}")
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with sessions() as db:
+            user = User(email="student@example.edu", name="Student", hashed_password="x", is_active=True)
+            db.add(user)
+            await db.commit()
+
+        # A long flush interval keeps the turn queued while the history is cleared
+        writer = ChatWriteQueue(session_factory=sessions, flush_interval=0.5)
+        writer.start()
+        try:
+            await writer.enqueue({"user_id": user.id, "message": "hello", "response": "hi there"})
+            async with sessions() as db:
+                await AIChatService(db, LLMRegistry(), writer).clear_chat_history(user.id)
+            await asyncio.sleep(writer.flush_interval * 2)
+        finally:
+            await writer.stop()
+
+        async with sessions() as db:
+            remaining = (await db.execute(
+                select(func.count()).select_from(ChatMessage).where(ChatMessage.user_id == user.id)
+            )).scalar_one()
+        await engine.dispose()
+        return remaining
+
+
+def test_cleared_history_stays_empty_after_flush():
+    assert asyncio.run(_queued_turn_then_clear()) == 0
+
+
+if __name__ == "__main__":
+    test_cleared_history_stays_empty_after_flush()
+    print("✅ Cleared history stayed empty")
@@ -0,0 +1,86 @@
+"""
+Schema upgrade: a database created by the first release must work with the current models
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base, upgrade_schema
+from app.models import ChatMessage
+
+
+# Tables as the first release's create_all() left them
+BASELINE_SCHEMA = [
+    """CREATE TABLE users (
+        id INTEGER NOT NULL PRIMARY KEY,
+        email VARCHAR(255) NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        hashed_password VARCHAR(255) NOT NULL,
+        is_active BOOLEAN,
+        created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+        updated_at DATETIME
+    )""",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    "CREATE INDEX ix_users_id ON users (id)",
+    """CREATE TABLE chat_messages (
+        id INTEGER NOT NULL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        message TEXT NOT NULL,
+        response TEXT NOT NULL,
+        context TEXT,
+        mood_analysis VARCHAR(100),
+        suggestions TEXT,
+        created_at DATETIME DEFAULT (CURRENT_TIMESTAMP)
+    )""",
+    "CREATE INDEX ix_chat_messages_id ON chat_messages (id)",
+    "INSERT INTO users (id, email, name, hashed_password, is_active) VALUES (1, 'a@example.edu', 'A', 'x', 1)",
+    "INSERT INTO chat_messages (user_id, message, response) VALUES (1, 'hello', 'hi')",
+    "INSERT INTO chat_messages (user_id, message, response, created_at) VALUES (1, 'again', 'hi', NULL)",
+]
+
+
+async def _upgrade_baseline():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'baseline.db')}")
+        async with engine.begin() as conn:
+            for statement in BASELINE_SCHEMA:
+                await conn.execute(text(statement))
+
+        # Twice, as on two consecutive startups
+        for _ in range(2):
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(upgrade_schema)
+
+        async with engine.connect() as conn:
+            indexes = await conn.run_sync(
+                lambda sync: {index["name"] for index in inspect(sync).get_indexes("chat_messages")}
+            )
+        async with async_sessionmaker(engine)() as db:
+            rows = (await db.execute(
+                select(ChatMessage.id, ChatMessage.created_at, ChatMessage.companion_avatar)
+                .where(ChatMessage.user_id == 1)
+                .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+            )).all()
+        await engine.dispose()
+        return indexes, rows
+
+
+def test_baseline_database_is_upgraded():
+    indexes, rows = asyncio.run(_upgrade_baseline())
+    assert "ix_chat_messages_user_created_id" in indexes
+    assert len(rows) == 2
+    assert all(row.created_at is not None and row.companion_avatar is None for row in rows)
+
+
+if __name__ == "__main__":
+    test_baseline_database_is_upgraded()
+    print("✅ Baseline database upgraded")
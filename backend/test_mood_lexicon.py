@@ -0,0 +1,61 @@
+"""
+Mood lexicon regressions: messages the original substring matcher detected must still be detected
+"""
+
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.services.mood_lexicon import analyze_mood
+
+
+# The keyword table of the original substring matcher
+BASELINE_KEYWORDS = {
+    "anxious": ["anxious", "worried", "nervous", "panic", "fear"],
+    "stressed": ["stressed", "overwhelmed", "pressure", "exam", "deadline"],
+    "sad": ["sad", "depressed", "down", "lonely", "empty"],
+    "angry": ["angry", "frustrated", "annoyed", "mad", "upset"],
+    "happy": ["happy", "good", "great", "excited", "joy"],
+    "tired": ["tired", "exhausted", "sleepy", "fatigue", "worn out"],
+    "confused": ["confused", "lost", "uncertain", "unclear", "don't know"]
+}
+
+# Phrases and inflected forms the substring matcher caught
+PHRASES = {
+    "I feel down today": "sad",
+    "She feels down lately": "sad",
+    "I am sadness": "sad",
+    "Sadly nobody called": "sad",
+    "My depression is back": "sad",
+    "Everything is so depressing": "sad",
+    "I am nervousness itself": "anxious",
+    "I panicked in the exam hall": "anxious",
+    "I felt pressured by my parents": "stressed",
+    "Deadlines everywhere": "stressed"
+}
+
+
+def test_baseline_keywords_still_detected():
+    for emotion, keywords in BASELINE_KEYWORDS.items():
+        for keyword in keywords:
+            mood = analyze_mood(f"Honestly I am {keyword} this week")
+            assert emotion in mood["all_emotions"], (keyword, mood)
+
+
+def test_phrases_and_inflections_detected():
+    for message, emotion in PHRASES.items():
+        assert analyze_mood(message)["detected_emotion"] == emotion, message
+
+
+def test_negated_keywords_ignored():
+    assert analyze_mood("I am not down at all")["detected_emotion"] == "neutral"
+    assert analyze_mood("I'm not sad, just thinking")["detected_emotion"] == "neutral"
+
+
+if __name__ == "__main__":
+    test_baseline_keywords_still_detected()
+    test_phrases_and_inflections_detected()
+    test_negated_keywords_ignored()
+    print("✅ Mood lexicon regressions passed")